@@ -0,0 +1,133 @@
+"""Benchmark: Speicherbedarf und Latenz der Session-Speicherung.
+
+Vergleicht Backends (file/sqlite) mit und ohne Kompression anhand langer,
+tool-lastiger Verläufe. Aufruf (aus dem Projektverzeichnis):
+
+    PYTHONPATH=src python examples/session_benchmark.py --sessions 50 --messages 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from mcp_server.config import Config
+from mcp_server.utils.compression import zstandard
+from mcp_server.utils.session import SessionManager
+
+WORDS = (
+    "model prompt token context embedding vector tool result status error "
+    "ollama server request response stream chunk latency cache session"
+).split()
+
+
+def make_history(rng: random.Random, messages: int) -> list:
+    """Erzeugt einen Verlauf mit kurzen Nachrichten und großen Tool-Ergebnissen."""
+    history = []
+    for index in range(messages):
+        if index % 5 == 4:
+            rows = [
+                {"id": rng.randrange(10**6), "name": rng.choice(WORDS), "score": rng.random()}
+                for _ in range(150)
+            ]
+            history.append({"role": "tool", "content": repr(rows)})
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(10, 80)))
+            history.append({"role": rng.choice(("user", "assistant")), "content": text})
+    return history
+
+
+def disk_usage(path: Path) -> int:
+    """Summiert die Dateigrößen unterhalb von ``path``."""
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Gibt ein Perzentil in Millisekunden zurück."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+async def run(backend: str, compression: str, histories: dict, threshold: int) -> dict:
+    """Misst Speichern, Anhängen und kaltes Laden für eine Konfiguration."""
+    with tempfile.TemporaryDirectory() as directory:
+        config = Config(
+            session_storage_path=Path(directory),
+            session_backend=backend,
+            session_compression=compression,
+            session_compression_threshold=threshold,
+            session_flush_interval=3600.0,
+            session_sweep_interval=0,
+        )
+
+        manager = SessionManager(config)
+        save_times = []
+        for session_id, history in histories.items():
+            started = time.perf_counter()
+            await manager.save_context(session_id, history)
+            await manager.flush()
+            save_times.append(time.perf_counter() - started)
+
+        append_times = []
+        for session_id in histories:
+            started = time.perf_counter()
+            await manager.update_context(session_id, {"role": "user", "content": "weiter"})
+            await manager.flush()
+            append_times.append(time.perf_counter() - started)
+        await manager.close()
+        footprint = disk_usage(Path(directory))
+
+        # Neuer Manager: Laden ohne Cache
+        manager = SessionManager(config)
+        load_times = []
+        for session_id in histories:
+            started = time.perf_counter()
+            await manager.load_context(session_id)
+            load_times.append(time.perf_counter() - started)
+        await manager.close()
+
+    return {
+        "backend": backend,
+        "compression": compression,
+        "disk_mb": footprint / 2**20,
+        "save_ms": statistics.mean(save_times) * 1000,
+        "append_ms": statistics.mean(append_times) * 1000,
+        "load_ms": statistics.mean(load_times) * 1000,
+        "load_p95_ms": percentile(load_times, 0.95),
+    }
+
+
+async def main() -> None:
+    """Führt alle Kombinationen aus und gibt eine Tabelle aus."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--threshold", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    histories = {f"bench{i}": make_history(rng, args.messages) for i in range(args.sessions)}
+    compressions = ["none", "gzip"] + (["zstd"] if zstandard is not None else [])
+
+    print(
+        f"{'backend':8} {'kompression':12} {'disk MB':>9} {'save ms':>9} "
+        f"{'append ms':>10} {'load ms':>9} {'load p95':>9}"
+    )
+    for backend in ("file", "sqlite"):
+        for compression in compressions:
+            result = await run(backend, compression, histories, args.threshold)
+            print(
+                f"{result['backend']:8} {result['compression']:12} {result['disk_mb']:9.2f} "
+                f"{result['save_ms']:9.2f} {result['append_ms']:10.2f} "
+                f"{result['load_ms']:9.2f} {result['load_p95_ms']:9.2f}"
+            )
+    if zstandard is None:
+        print("(zstd übersprungen: Paket 'zstandard' nicht installiert)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
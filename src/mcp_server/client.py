@@ -1,30 +1,67 @@
 """Ollama API Client für MCP Server."""
 
+import asyncio
 import json
-from typing import Any, AsyncGenerator, Dict, List, Optional
+import logging
+import time
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 import httpx
 
 from mcp_server.config import get_config
 from mcp_server.exceptions import OllamaAPIError, OllamaConnectionError
+from mcp_server.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Lesende POST-Endpunkte, deren Antwort nur von der Anfrage abhängt
+IDEMPOTENT_POST_ENDPOINTS = {"/api/show", "/api/embeddings", "/api/embed"}
 
 
 class OllamaClient:
     """Client für Ollama API."""
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, base_url: Optional[str] = None):
         """Initialisiert den Ollama Client."""
         self.config = config or get_config()
-        self.base_url = self.config.ollama_base_url
+        self.base_url = base_url or self.config.ollama_base_url
         self.timeout = self.config.ollama_timeout
         self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        self._requests = 0
+        self._pool_timeouts = 0
+        self._inflight_requests: Dict[str, Tuple[asyncio.Task, List[int]]] = {}
+        self._coalesced = 0
+
+    def _timeout(self, read: Optional[float]) -> httpx.Timeout:
+        """Erstellt die Timeouts für Verbindungsaufbau, Lesen, Schreiben und Pool."""
+        return httpx.Timeout(
+            connect=self.config.ollama_connect_timeout,
+            read=read,
+            write=self.config.ollama_write_timeout,
+            pool=self.config.ollama_pool_timeout,
+        )
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Gibt den HTTP Client zurück (lazy initialization)."""
         if self._client is None:
+            http2 = self.config.ollama_http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("OLLAMA_HTTP2 aktiv, aber Paket 'h2' fehlt - nutze HTTP/1.1")
+                    http2 = False
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
-                timeout=self.timeout,
+                timeout=self._timeout(self.config.ollama_read_timeout or self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.config.ollama_max_connections,
+                    max_keepalive_connections=self.config.ollama_max_keepalive_connections,
+                    keepalive_expiry=self.config.ollama_keepalive_expiry,
+                ),
+                http2=http2,
             )
         return self._client
 
@@ -34,6 +71,41 @@ class OllamaClient:
             await self._client.aclose()
             self._client = None
 
+    def stats(self) -> Dict[str, Any]:
+        """Gibt die Auslastung des Verbindungspools zurück."""
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "base_url": self.base_url,
+            "in_flight": self._in_flight,
+            "requests": self._requests,
+            "pool_timeouts": self._pool_timeouts,
+            "coalesced_requests": self._coalesced,
+            "connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+            "max_connections": self.config.ollama_max_connections,
+            "max_keepalive_connections": self.config.ollama_max_keepalive_connections,
+        }
+
+    def _translate_error(self, error: Exception) -> Exception:
+        """Übersetzt httpx-Fehler in Server-Exceptions."""
+        if isinstance(error, httpx.ConnectError):
+            return OllamaConnectionError(f"Verbindung zu Ollama fehlgeschlagen: {error}")
+        if isinstance(error, httpx.TimeoutException):
+            if isinstance(error, httpx.PoolTimeout):
+                self._pool_timeouts += 1
+            return OllamaAPIError(
+                f"Zeitüberschreitung bei Ollama-Anfrage ({type(error).__name__}): {error}"
+            )
+        if isinstance(error, httpx.HTTPStatusError):
+            return OllamaAPIError(
+                f"Ollama API Fehler: {error.response.text}",
+                status_code=error.response.status_code,
+            )
+        return OllamaAPIError(f"Unerwarteter Fehler: {error}")
+
     async def _request(
         self,
         method: str,
@@ -41,7 +113,49 @@ class OllamaClient:
         json_data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Führt eine HTTP-Anfrage an Ollama API durch."""
+        """Führt eine HTTP-Anfrage an Ollama API durch.
+
+        Identische idempotente Anfragen, die gleichzeitig laufen, teilen sich eine
+        Upstream-Anfrage und deren Ergebnis (Single-Flight).
+        """
+        if not self.config.ollama_single_flight or not (
+            method == "GET" or endpoint in IDEMPOTENT_POST_ENDPOINTS
+        ):
+            return await self._send(method, endpoint, json_data, params)
+
+        key = json.dumps([method, endpoint, json_data, params], sort_keys=True)
+        entry = self._inflight_requests.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self._send(method, endpoint, json_data, params))
+            entry = (task, [0])
+            self._inflight_requests[key] = entry
+            task.add_done_callback(lambda _: self._inflight_requests.pop(key, None))
+        else:
+            self._coalesced += 1
+
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Letzter Wartender abgebrochen: Upstream-Anfrage wird nicht mehr gebraucht
+            if waiters[0] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        json_data: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Sendet eine einzelne HTTP-Anfrage an Ollama API."""
+        self._in_flight += 1
+        self._requests += 1
+        started = time.perf_counter()
         try:
             client = await self._get_client()
             response = await client.request(
@@ -52,15 +166,44 @@ class OllamaClient:
             )
             response.raise_for_status()
             return response.json()
-        except httpx.ConnectError as e:
-            raise OllamaConnectionError(f"Verbindung zu Ollama fehlgeschlagen: {e}")
-        except httpx.HTTPStatusError as e:
-            raise OllamaAPIError(
-                f"Ollama API Fehler: {e.response.text}",
-                status_code=e.response.status_code,
-            )
         except Exception as e:
-            raise OllamaAPIError(f"Unerwarteter Fehler: {e}")
+            get_metrics().upstream_errors.inc(endpoint)
+            raise self._translate_error(e)
+        finally:
+            self._in_flight -= 1
+            get_metrics().upstream_duration.observe(time.perf_counter() - started, endpoint)
+
+    async def _stream(
+        self, endpoint: str, payload: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Sendet eine POST-Anfrage und liefert die NDJSON-Zeilen der Antwort.
+
+        Der Read-Timeout gilt hier pro Chunk (ollama_stream_idle_timeout), sodass lange
+        Generierungen nicht am Gesamt-Timeout scheitern, hängende Streams aber schon.
+        """
+        self._in_flight += 1
+        self._requests += 1
+        started = time.perf_counter()
+        try:
+            client = await self._get_client()
+            async with client.stream(
+                "POST",
+                endpoint,
+                json=payload,
+                timeout=self._timeout(self.config.ollama_stream_idle_timeout),
+            ) as response:
+                async for line in response.aiter_lines():
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+        except httpx.HTTPError as e:
+            get_metrics().upstream_errors.inc(endpoint)
+            raise self._translate_error(e)
+        finally:
+            self._in_flight -= 1
+            get_metrics().upstream_duration.observe(time.perf_counter() - started, endpoint)
 
     async def list_models(self) -> Dict[str, Any]:
         """Listet alle verfügbaren Modelle auf."""
@@ -74,18 +217,11 @@ class OllamaClient:
         self, model: str, insecure: bool = False
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Lädt ein Modell herunter (Streaming)."""
-        client = await self._get_client()
-        async with client.stream(
-            "POST",
-            "/api/pull",
-            json={"name": model, "insecure": insecure},
-        ) as response:
-            async for line in response.aiter_lines():
-                if line:
-                    try:
-                        yield json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
+        async with aclosing(
+            self._stream("/api/pull", {"name": model, "insecure": insecure})
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
 
     async def delete_model(self, model: str) -> Dict[str, Any]:
         """Löscht ein Modell."""
@@ -104,18 +240,13 @@ class OllamaClient:
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Erstellt ein Modell aus einer Modelfile."""
         if stream:
-            client = await self._get_client()
-            async with client.stream(
-                "POST",
-                "/api/create",
-                json={"name": model, "modelfile": modelfile, "stream": stream},
-            ) as response:
-                async for line in response.aiter_lines():
-                    if line:
-                        try:
-                            yield json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
+            async with aclosing(
+                self._stream(
+                    "/api/create", {"name": model, "modelfile": modelfile, "stream": stream}
+                )
+            ) as chunks:
+                async for chunk in chunks:
+                    yield chunk
         else:
             result = await self._request(
                 "POST",
@@ -151,16 +282,15 @@ class OllamaClient:
             payload["options"] = options
 
         if stream:
-            client = await self._get_client()
-            async with client.stream("POST", "/api/generate", json=payload) as response:
-                async for line in response.aiter_lines():
-                    if line:
-                        try:
-                            yield json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
+            # aclosing: Abbruch durch den Aufrufer schließt den HTTP-Stream sofort
+            async with aclosing(self._stream("/api/generate", payload)) as chunks:
+                async for chunk in chunks:
+                    if chunk.get("done"):
+                        get_metrics().observe_ollama_timings(model, chunk)
+                    yield chunk
         else:
             result = await self._request("POST", "/api/generate", json_data=payload)
+            get_metrics().observe_ollama_timings(model, result)
             yield result
 
     async def chat(
@@ -181,16 +311,15 @@ class OllamaClient:
             payload["options"] = options
 
         if stream:
-            client = await self._get_client()
-            async with client.stream("POST", "/api/chat", json=payload) as response:
-                async for line in response.aiter_lines():
-                    if line:
-                        try:
-                            yield json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
+            # aclosing: Abbruch durch den Aufrufer schließt den HTTP-Stream sofort
+            async with aclosing(self._stream("/api/chat", payload)) as chunks:
+                async for chunk in chunks:
+                    if chunk.get("done"):
+                        get_metrics().observe_ollama_timings(model, chunk)
+                    yield chunk
         else:
             result = await self._request("POST", "/api/chat", json_data=payload)
+            get_metrics().observe_ollama_timings(model, result)
             yield result
 
     async def embeddings(
@@ -205,6 +334,51 @@ class OllamaClient:
             payload["options"] = options
         return await self._request("POST", "/api/embeddings", json_data=payload)
 
+    async def embed(
+        self,
+        model: str,
+        inputs: List[str],
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Generiert Embeddings für mehrere Texte in einer Anfrage (/api/embed)."""
+        payload: Dict[str, Any] = {"model": model, "input": inputs}
+        if options:
+            payload["options"] = options
+        return await self._request("POST", "/api/embed", json_data=payload)
+
+    async def embed_batch(
+        self,
+        model: str,
+        inputs: List[str],
+        options: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> List[List[float]]:
+        """Generiert Embeddings für beliebig viele Texte.
+
+        Die Eingaben werden in Chunks zu ``batch_size`` Texten aufgeteilt, die mit
+        höchstens ``max_concurrency`` gleichzeitigen Anfragen an /api/embed gehen.
+        Die Embeddings stehen in Eingabereihenfolge.
+        """
+        batch_size = max(1, batch_size or self.config.embed_batch_size)
+        semaphore = asyncio.Semaphore(
+            max(1, max_concurrency or self.config.batch_max_concurrency)
+        )
+
+        async def embed_chunk(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response = await self.embed(model, chunk, options)
+            embeddings = response.get("embeddings", [])
+            if len(embeddings) != len(chunk):
+                raise OllamaAPIError(
+                    f"Ollama lieferte {len(embeddings)} Embeddings für {len(chunk)} Texte"
+                )
+            return embeddings
+
+        chunks = [inputs[i : i + batch_size] for i in range(0, len(inputs), batch_size)]
+        results = await asyncio.gather(*(embed_chunk(chunk) for chunk in chunks))
+        return [embedding for chunk_result in results for embedding in chunk_result]
+
     async def list_processes(self) -> Dict[str, Any]:
         """Listet laufende Prozesse auf."""
         return await self._request("GET", "/api/ps")
@@ -20,6 +20,103 @@ class Config(BaseSettings):
     ollama_port: int = Field(default=11434, description="Ollama API Port")
     ollama_timeout: int = Field(default=60, description="Ollama API Timeout in Sekunden")
 
+    # HTTP-Verbindungspool zu Ollama
+    ollama_max_connections: int = Field(default=100, description="Maximale Verbindungen")
+    ollama_max_keepalive_connections: int = Field(
+        default=20, description="Maximale Keep-Alive-Verbindungen"
+    )
+    ollama_keepalive_expiry: float = Field(
+        default=5.0, description="Leerlaufzeit bis Keep-Alive-Verbindungen geschlossen werden"
+    )
+    ollama_connect_timeout: float = Field(default=10.0, description="Timeout Verbindungsaufbau")
+    ollama_read_timeout: Optional[float] = Field(
+        default=None, description="Read-Timeout ohne Streaming (leer = ollama_timeout)"
+    )
+    ollama_write_timeout: float = Field(default=30.0, description="Timeout beim Senden")
+    ollama_pool_timeout: float = Field(
+        default=10.0, description="Wartezeit auf eine freie Verbindung aus dem Pool"
+    )
+    ollama_stream_idle_timeout: float = Field(
+        default=120.0, description="Maximale Pause zwischen zwei Stream-Chunks"
+    )
+    ollama_http2: bool = Field(
+        default=False, description="HTTP/2 verwenden (benötigt das Paket 'h2')"
+    )
+    ollama_single_flight: bool = Field(
+        default=True, description="Identische gleichzeitige Leseanfragen zusammenfassen"
+    )
+
+    # Mehrere Ollama-Backends (kommagetrennte URLs, leer = nur ollama_host:ollama_port)
+    ollama_backends: str = Field(
+        default="", description="Liste von Ollama-Endpunkten für den Backend-Pool"
+    )
+    backend_poll_interval: int = Field(
+        default=10, description="Abfrageintervall für /api/ps und /api/tags in Sekunden"
+    )
+
+    # Batch-Verarbeitung
+    batch_max_concurrency: int = Field(
+        default=4, description="Maximal gleichzeitige Ollama-Anfragen pro Batch"
+    )
+    fanout_max_concurrency: int = Field(
+        default=8, description="Maximal gleichzeitige Anfragen bei Modell-Fan-out"
+    )
+    embed_batch_size: int = Field(
+        default=64, description="Texte pro /api/embed Anfrage"
+    )
+
+    # Admission Control vor Ollama
+    scheduler_enabled: bool = Field(default=True, description="Admission Control aktivieren")
+    scheduler_max_concurrency_per_model: int = Field(
+        default=4, description="Maximal gleichzeitige Ollama-Anfragen pro Modell"
+    )
+    scheduler_max_queue: int = Field(
+        default=64, description="Maximal wartende Anfragen pro Modell (darüber: 429)"
+    )
+
+    # Modellkatalog-Cache
+    model_catalog_ttl: int = Field(
+        default=30, description="Gültigkeit gecachter Modell-Metadaten in Sekunden"
+    )
+
+    # Embedding-Cache
+    embedding_cache_enabled: bool = Field(
+        default=True, description="Embeddings zwischenspeichern"
+    )
+    embedding_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, description="Speicherbudget des In-Memory-Caches in Bytes"
+    )
+    embedding_cache_path: Optional[Path] = Field(
+        default=None, description="SQLite-Datei für persistente Embeddings (leer = nur RAM)"
+    )
+
+    # Vektor-Collections
+    vector_index_path: Path = Field(
+        default=Path("./vector_index"), description="Verzeichnis für Vektor-Collections"
+    )
+
+    # Hintergrund-Jobs (Pull, Create, Batch)
+    job_store_path: Path = Field(
+        default=Path("./jobs"), description="Verzeichnis für Job-Zustände"
+    )
+    job_max_workers: int = Field(default=2, description="Gleichzeitig laufende Jobs")
+    job_max_history: int = Field(
+        default=200, description="Abgeschlossene Jobs, die aufbewahrt werden"
+    )
+
+    # Kontext-Handles für ollama_generate
+    context_handles_enabled: bool = Field(
+        default=True, description="Kontexte serverseitig halten und als Handle zurückgeben"
+    )
+    context_store_max_bytes: int = Field(
+        default=64 * 1024 * 1024, description="Speicherbudget für gehaltene Kontexte"
+    )
+
+    # WebSocket-Transport
+    websocket_max_in_flight: int = Field(
+        default=32, description="Maximale gleichzeitige Tool-Aufrufe pro WebSocket-Verbindung"
+    )
+
     # Logging
     log_level: str = Field(default="INFO", description="Log-Level")
     log_format: str = Field(default="json", description="Log-Format (json/text)")
@@ -31,12 +128,53 @@ class Config(BaseSettings):
     session_ttl: int = Field(
         default=3600, description="Session TTL in Sekunden"
     )
+    session_flush_interval: float = Field(
+        default=1.0, description="Sammelzeit für Session-Änderungen vor dem Schreiben (s)"
+    )
+    session_cache_size: int = Field(
+        default=1000, description="Anzahl Sessions im Speicher-Cache"
+    )
+    session_backend: str = Field(
+        default="file", description="Session-Speicher (file/sqlite)"
+    )
+    session_compact_records: int = Field(
+        default=200, description="Log-Einträge pro Session, ab denen verdichtet wird"
+    )
+    session_compression: str = Field(
+        default="none", description="Kompression gespeicherter Sessions (none/gzip/zstd)"
+    )
+    session_compression_threshold: int = Field(
+        default=4096, description="Mindestgröße (Bytes), ab der komprimiert wird"
+    )
+    session_sweep_interval: float = Field(
+        default=60.0, description="Intervall des Sweepers für abgelaufene Sessions (s, 0 = aus)"
+    )
+    session_sweep_batch: int = Field(
+        default=500, description="Sessions pro Lösch-Batch des Sweepers"
+    )
 
     # Rate Limiting
     rate_limit_enabled: bool = Field(default=False, description="Rate Limiting aktivieren")
     rate_limit_requests_per_minute: int = Field(
         default=60, description="Anfragen pro Minute"
     )
+    rate_limit_burst: Optional[int] = Field(
+        default=None, description="Bucket-Größe für Lastspitzen (leer = Anfragen pro Minute)"
+    )
+    rate_limit_cost_mode: str = Field(
+        default="request",
+        description="Kostenmodell: request (1 pro Aufruf) oder weighted (nach Generierungslänge)",
+    )
+    rate_limit_cost_unit: int = Field(
+        default=256, description="Tokens pro Kosteneinheit im weighted-Modus"
+    )
+    rate_limit_store_path: Optional[Path] = Field(
+        default=None, description="SQLite-Datei für Limits über mehrere Worker (leer = RAM)"
+    )
+    rate_limit_api_keys: str = Field(
+        default="",
+        description="Kommagetrennte API-Keys mit eigenem Limit (sonst gilt die Client-IP)",
+    )
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -50,6 +188,17 @@ class Config(BaseSettings):
         """Gibt die Basis-URL für Ollama API zurück."""
         return f"http://{self.ollama_host}:{self.ollama_port}"
 
+    @property
+    def ollama_backend_urls(self) -> list[str]:
+        """Gibt die URLs aller konfigurierten Ollama-Backends zurück."""
+        urls = [url.strip().rstrip("/") for url in self.ollama_backends.split(",")]
+        return [url for url in urls if url] or [self.ollama_base_url]
+
+    @property
+    def rate_limit_api_key_set(self) -> frozenset:
+        """Gibt die erlaubten API-Keys für eigene Rate-Limit-Buckets zurück."""
+        return frozenset(key.strip() for key in self.rate_limit_api_keys.split(",") if key.strip())
+
     @property
     def mcp_address(self) -> tuple[str, int]:
         """Gibt die Bind-Adresse für den MCP Server zurück."""
@@ -64,25 +213,120 @@ class Config(BaseSettings):
             "OLLAMA_HOST": "ollama_host",
             "OLLAMA_PORT": "ollama_port",
             "OLLAMA_TIMEOUT": "ollama_timeout",
+            "OLLAMA_MAX_CONNECTIONS": "ollama_max_connections",
+            "OLLAMA_MAX_KEEPALIVE_CONNECTIONS": "ollama_max_keepalive_connections",
+            "OLLAMA_KEEPALIVE_EXPIRY": "ollama_keepalive_expiry",
+            "OLLAMA_CONNECT_TIMEOUT": "ollama_connect_timeout",
+            "OLLAMA_READ_TIMEOUT": "ollama_read_timeout",
+            "OLLAMA_WRITE_TIMEOUT": "ollama_write_timeout",
+            "OLLAMA_POOL_TIMEOUT": "ollama_pool_timeout",
+            "OLLAMA_STREAM_IDLE_TIMEOUT": "ollama_stream_idle_timeout",
+            "OLLAMA_HTTP2": "ollama_http2",
+            "OLLAMA_SINGLE_FLIGHT": "ollama_single_flight",
+            "OLLAMA_BACKENDS": "ollama_backends",
+            "BACKEND_POLL_INTERVAL": "backend_poll_interval",
+            "BATCH_MAX_CONCURRENCY": "batch_max_concurrency",
+            "FANOUT_MAX_CONCURRENCY": "fanout_max_concurrency",
+            "EMBED_BATCH_SIZE": "embed_batch_size",
+            "SCHEDULER_ENABLED": "scheduler_enabled",
+            "SCHEDULER_MAX_CONCURRENCY_PER_MODEL": "scheduler_max_concurrency_per_model",
+            "SCHEDULER_MAX_QUEUE": "scheduler_max_queue",
+            "MODEL_CATALOG_TTL": "model_catalog_ttl",
+            "EMBEDDING_CACHE_ENABLED": "embedding_cache_enabled",
+            "EMBEDDING_CACHE_MAX_BYTES": "embedding_cache_max_bytes",
+            "EMBEDDING_CACHE_PATH": "embedding_cache_path",
+            "VECTOR_INDEX_PATH": "vector_index_path",
+            "JOB_STORE_PATH": "job_store_path",
+            "JOB_MAX_WORKERS": "job_max_workers",
+            "JOB_MAX_HISTORY": "job_max_history",
+            "CONTEXT_HANDLES_ENABLED": "context_handles_enabled",
+            "CONTEXT_STORE_MAX_BYTES": "context_store_max_bytes",
+            "WEBSOCKET_MAX_IN_FLIGHT": "websocket_max_in_flight",
             "LOG_LEVEL": "log_level",
             "LOG_FORMAT": "log_format",
             "SESSION_STORAGE_PATH": "session_storage_path",
             "SESSION_TTL": "session_ttl",
+            "SESSION_FLUSH_INTERVAL": "session_flush_interval",
+            "SESSION_CACHE_SIZE": "session_cache_size",
+            "SESSION_BACKEND": "session_backend",
+            "SESSION_COMPACT_RECORDS": "session_compact_records",
+            "SESSION_COMPRESSION": "session_compression",
+            "SESSION_COMPRESSION_THRESHOLD": "session_compression_threshold",
+            "SESSION_SWEEP_INTERVAL": "session_sweep_interval",
+            "SESSION_SWEEP_BATCH": "session_sweep_batch",
             "RATE_LIMIT_ENABLED": "rate_limit_enabled",
             "RATE_LIMIT_REQUESTS_PER_MINUTE": "rate_limit_requests_per_minute",
+            "RATE_LIMIT_BURST": "rate_limit_burst",
+            "RATE_LIMIT_COST_MODE": "rate_limit_cost_mode",
+            "RATE_LIMIT_COST_UNIT": "rate_limit_cost_unit",
+            "RATE_LIMIT_STORE_PATH": "rate_limit_store_path",
+            "RATE_LIMIT_API_KEYS": "rate_limit_api_keys",
         }
 
         # Lese Umgebungsvariablen und überschreibe kwargs
-        int_fields = ["mcp_port", "ollama_port", "ollama_timeout", "session_ttl", "rate_limit_requests_per_minute"]
-        
+        int_fields = [
+            "mcp_port",
+            "ollama_port",
+            "ollama_timeout",
+            "session_ttl",
+            "rate_limit_requests_per_minute",
+            "batch_max_concurrency",
+            "embed_batch_size",
+            "embedding_cache_max_bytes",
+            "model_catalog_ttl",
+            "fanout_max_concurrency",
+            "backend_poll_interval",
+            "ollama_max_connections",
+            "ollama_max_keepalive_connections",
+            "scheduler_max_concurrency_per_model",
+            "scheduler_max_queue",
+            "rate_limit_burst",
+            "rate_limit_cost_unit",
+            "websocket_max_in_flight",
+            "context_store_max_bytes",
+            "job_max_workers",
+            "job_max_history",
+            "session_cache_size",
+            "session_compact_records",
+            "session_sweep_batch",
+            "session_compression_threshold",
+        ]
+        float_fields = [
+            "ollama_keepalive_expiry",
+            "ollama_connect_timeout",
+            "ollama_read_timeout",
+            "ollama_write_timeout",
+            "ollama_pool_timeout",
+            "ollama_stream_idle_timeout",
+            "session_flush_interval",
+            "session_sweep_interval",
+        ]
+        bool_fields = [
+            "rate_limit_enabled",
+            "embedding_cache_enabled",
+            "ollama_http2",
+            "ollama_single_flight",
+            "scheduler_enabled",
+            "context_handles_enabled",
+        ]
+        path_fields = [
+            "session_storage_path",
+            "embedding_cache_path",
+            "rate_limit_store_path",
+            "vector_index_path",
+            "job_store_path",
+        ]
+
         for env_key, config_key in env_mapping.items():
             env_value = os.getenv(env_key)
             if env_value is not None and config_key not in kwargs:
                 if config_key in int_fields:
-                    kwargs[config_key] = int(env_value)
-                elif config_key == "session_storage_path":
-                    kwargs[config_key] = Path(env_value)
-                elif config_key == "rate_limit_enabled":
+                    kwargs[config_key] = int(env_value) if env_value else None
+                elif config_key in float_fields:
+                    kwargs[config_key] = float(env_value) if env_value else None
+                elif config_key in path_fields:
+                    kwargs[config_key] = Path(env_value) if env_value else None
+                elif config_key in bool_fields:
                     kwargs[config_key] = env_value.lower() in ("true", "1", "yes")
                 else:
                     kwargs[config_key] = env_value
@@ -21,6 +21,20 @@ class OllamaAPIError(MCPError):
         self.status_code = status_code
 
 
+class OverloadedError(MCPError):
+    """Anfrage wegen Überlastung abgelehnt."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitError(OverloadedError):
+    """Anfrage wegen überschrittenem Rate Limit abgelehnt."""
+
+    pass
+
+
 class ToolError(MCPError):
     """Fehler bei Tool-Ausführung."""
 
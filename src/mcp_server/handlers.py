@@ -1,11 +1,19 @@
 """Request-Handler für MCP Server."""
 
 import asyncio
+import hashlib
 import json
+import logging
+import math
+import time
+from contextlib import aclosing, nullcontext
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
 from mcp_server.client import OllamaClient
-from mcp_server.exceptions import MCPError, OllamaAPIError, ValidationError
+from mcp_server.config import get_config
+from mcp_server.exceptions import MCPError, OllamaAPIError, OverloadedError, ValidationError
+from mcp_server.metrics import get_metrics
+from mcp_server.tools.definitions import TOOLS
 from mcp_server.utils.formatting import (
     format_chat_response,
     format_embedding_response,
@@ -13,20 +21,138 @@ from mcp_server.utils.formatting import (
     format_generate_response,
     format_model_list,
 )
+from mcp_server.utils.concurrency import gather_limited
+from mcp_server.utils.context_store import ContextStore, is_context_handle
+from mcp_server.utils.embedding_cache import EmbeddingCache
+from mcp_server.utils.jobs import JobManager, Report
+from mcp_server.utils.model_catalog import ModelCatalog
+from mcp_server.utils.scheduler import (
+    PRIORITY_ADMIN,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    AdmissionScheduler,
+)
 from mcp_server.utils.session import SessionManager
-from mcp_server.utils.validation import validate_model_name
+from mcp_server.utils.validation import validate_model_name, validate_session_id
+from mcp_server.utils.vector_codec import validate_encoding
+from mcp_server.utils.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _is_error_result(result: Any) -> bool:
+    """Prüft ob ein Tool-Ergebnis ein formatierter Fehler ist."""
+    return isinstance(result, dict) and "error" in result and "error_type" in result
+
+
+# Tools, deren Chunks inkrementell an den Client weitergereicht werden können
+STREAMING_TOOLS = {"ollama_generate_stream", "ollama_chat_stream", "ollama_watch_job"}
+
+# Tools, die genau eine Generierung anstoßen (für die Schätzung eingesparter Tokens)
+SINGLE_GENERATION_TOOLS = {
+    "ollama_generate",
+    "ollama_generate_stream",
+    "ollama_chat",
+    "ollama_chat_stream",
+}
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    """Normiert einen Vektor auf Länge 1 (wie /api/embed)."""
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _pull_progress(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrahiert den Fortschritt aus einem /api/pull-Chunk."""
+    progress = {"status": chunk.get("status", "")}
+    if chunk.get("digest"):
+        progress["digest"] = chunk["digest"]
+    total = chunk.get("total")
+    if total:
+        completed = chunk.get("completed") or 0
+        progress.update(completed=completed, total=total, percent=round(completed * 100 / total, 1))
+    return progress
+
+
+# Bekannte Tool-Namen; alles andere landet in den Metriken unter "unknown"
+TOOL_NAMES = frozenset(tool["name"] for tool in TOOLS)
+
+
+def _metric_label(tool_name: str) -> str:
+    """Begrenzt das ``tool``-Label auf bekannte Tools (Namen kommen vom Client)."""
+    return tool_name if tool_name in TOOL_NAMES else "unknown"
+
+
+def _observe_cancelled(tool_name: str, arguments: Dict[str, Any], produced: int = 0) -> None:
+    """Erfasst einen abgebrochenen Tool-Aufruf in den Metriken."""
+    model = arguments.get("model") if tool_name in SINGLE_GENERATION_TOOLS else None
+    num_predict = (arguments.get("options") or {}).get("num_predict")
+    get_metrics().observe_cancelled(_metric_label(tool_name), model, produced, num_predict)
 
 
 class ToolHandler:
     """Handler für Tool-Aufrufe."""
 
-    def __init__(self, ollama_client: OllamaClient, session_manager: SessionManager):
+    def __init__(
+        self, ollama_client: OllamaClient, session_manager: SessionManager, config=None
+    ):
         """Initialisiert den Tool Handler."""
+        self.config = config or get_config()
         self.client = ollama_client
         self.sessions = session_manager
+        self.catalog = ModelCatalog(ollama_client, self.config.model_catalog_ttl)
+        self.scheduler: Optional[AdmissionScheduler] = None
+        if self.config.scheduler_enabled:
+            self.scheduler = AdmissionScheduler(
+                self.config.scheduler_max_concurrency_per_model,
+                self.config.scheduler_max_queue,
+            )
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if self.config.embedding_cache_enabled:
+            self.embedding_cache = EmbeddingCache(
+                self.config.embedding_cache_max_bytes, self.config.embedding_cache_path
+            )
+        self.vector_index = VectorIndex(self.config.vector_index_path)
+        self.jobs = JobManager(
+            self.config.job_store_path,
+            {
+                "pull": self._pull_model,
+                "create": self._create_model,
+                "batch_generate": self._batch_generate,
+            },
+            max_workers=self.config.job_max_workers,
+            max_history=self.config.job_max_history,
+        )
+        self.context_store: Optional[ContextStore] = None
+        if self.config.context_handles_enabled:
+            self.context_store = ContextStore(self.config.context_store_max_bytes)
 
     async def handle_tool_call(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
-        """Führt ein Tool aus."""
+        """Führt ein Tool aus und erfasst Anzahl, Fehler und Dauer des Aufrufs."""
+        metrics = get_metrics()
+        label = _metric_label(tool_name)
+        metrics.tool_requests.inc(label)
+        metrics.tool_in_flight.inc(label)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await self._dispatch(tool_name, arguments)
+            failed = _is_error_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Client hat aufgegeben: Ollama-Anfrage wurde mit abgebrochen
+            failed = False
+            _observe_cancelled(tool_name, arguments)
+            raise
+        finally:
+            metrics.tool_in_flight.dec(label)
+            metrics.tool_duration.observe(time.perf_counter() - started, label)
+            if failed:
+                metrics.tool_errors.inc(label)
+
+    async def _dispatch(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Leitet einen Tool-Aufruf an die passende Methode weiter."""
         try:
             if tool_name == "ollama_check_health":
                 return await self._check_health()
@@ -82,13 +208,124 @@ class ToolHandler:
                 return await self._batch_generate(arguments)
             elif tool_name == "ollama_compare_models":
                 return await self._compare_models(arguments)
+            elif tool_name == "ollama_create_collection":
+                return await self._create_collection(arguments)
+            elif tool_name == "ollama_upsert_texts":
+                return await self._upsert_texts(arguments)
+            elif tool_name == "ollama_query_collection":
+                return await self._query_collection(arguments)
+            elif tool_name == "ollama_list_collections":
+                return await self._list_collections()
+            elif tool_name == "ollama_delete_collection":
+                return await self._delete_collection(arguments)
+            elif tool_name == "ollama_submit_job":
+                return await self._submit_job(arguments)
+            elif tool_name == "ollama_job_status":
+                return await self._job_status(arguments)
+            elif tool_name == "ollama_list_jobs":
+                return await self._list_jobs(arguments)
+            elif tool_name == "ollama_cancel_job":
+                return await self._cancel_job(arguments)
+            elif tool_name == "ollama_watch_job":
+                return await self._watch_job(arguments)
             else:
                 raise MCPError(f"Unbekanntes Tool: {tool_name}")
+        except OverloadedError:
+            raise
         except Exception as e:
             return format_error(e)
 
+    async def start(self) -> None:
+        """Startet Hintergrundarbeit (setzt unterbrochene Jobs fort, Session-Sweeper)."""
+        resumed = self.jobs.resume()
+        if resumed:
+            logger.info(f"{resumed} unterbrochene Jobs wieder aufgenommen")
+        if self.sessions is not None:
+            await self.sessions.start()
+
+    async def close(self) -> None:
+        """Gibt Ressourcen der Handler-Komponenten frei."""
+        await self.jobs.close()
+        if self.sessions is not None:
+            await self.sessions.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Laufzeit-Statistiken der Handler-Komponenten zurück."""
+        result: Dict[str, Any] = {"model_catalog": self.catalog.stats()}
+        if hasattr(self.client, "stats"):
+            result["ollama"] = self.client.stats()
+        if self.scheduler is not None:
+            result["scheduler"] = self.scheduler.stats()
+        if self.embedding_cache is not None:
+            result["embedding_cache"] = self.embedding_cache.stats()
+        if self.context_store is not None:
+            result["context_store"] = self.context_store.stats()
+        result["jobs"] = self.jobs.stats()
+        if self.sessions is not None:
+            result["sessions"] = self.sessions.stats()
+        return result
+
+    def is_streaming_tool(self, tool_name: str) -> bool:
+        """Prüft ob ein Tool inkrementelles Streaming unterstützt."""
+        return tool_name in STREAMING_TOOLS
+
+    async def stream_tool_call(
+        self, tool_name: str, arguments: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Führt ein Tool aus und liefert Chunks, sobald sie von Ollama eintreffen.
+
+        Nicht-Streaming-Tools liefern genau einen Chunk mit dem vollständigen Ergebnis.
+        Fehler werden als letzter Chunk im Format von format_error geliefert.
+        """
+        if not self.is_streaming_tool(tool_name):
+            try:
+                yield await self.handle_tool_call(tool_name, arguments)
+            except Exception as e:
+                yield format_error(e)
+            return
+
+        iterate = {
+            "ollama_generate_stream": self._iter_generate_stream,
+            "ollama_chat_stream": self._iter_chat_stream,
+            "ollama_watch_job": self._iter_watch_job,
+        }[tool_name]
+        metrics = get_metrics()
+        label = _metric_label(tool_name)
+        metrics.tool_requests.inc(label)
+        metrics.tool_in_flight.inc(label)
+        started = time.perf_counter()
+        failed = True
+        produced = 0
+        try:
+            async with aclosing(iterate(arguments)) as chunks:
+                async for chunk in chunks:
+                    if not chunk.get("done"):
+                        produced += 1
+                    yield chunk
+            failed = False
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client getrennt: Schließen des Generators beendet den Ollama-Stream
+            failed = False
+            _observe_cancelled(tool_name, arguments, produced)
+            raise
+        except Exception as e:
+            yield format_error(e)
+        finally:
+            metrics.tool_in_flight.dec(label)
+            metrics.tool_duration.observe(time.perf_counter() - started, label)
+            if failed:
+                metrics.tool_errors.inc(label)
+
+    def _slot(self, model: str, priority: int):
+        """Gibt den Admission-Slot für eine Ollama-Anfrage zurück."""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(model, priority)
+
     async def _check_health(self) -> Dict[str, Any]:
-        """Health-Check."""
+        """Health-Check (fragt Ollama direkt, nicht den gecachten Katalog)."""
         try:
             await self.client.list_models()
             return {"status": "healthy", "ollama_connected": True}
@@ -97,63 +334,111 @@ class ToolHandler:
 
     async def _list_models(self) -> Dict[str, Any]:
         """Listet Modelle auf."""
-        response = await self.client.list_models()
+        response = await self.catalog.list_models()
         return format_model_list(response)
 
     async def _show_model(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Zeigt Modell-Details."""
         model = validate_model_name(args.get("model", ""))
-        return await self.client.show_model(model)
+        return await self.catalog.show_model(model)
 
-    async def _pull_model(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Lädt ein Modell herunter."""
+    async def _pull_model(
+        self, args: Dict[str, Any], report: Optional[Report] = None
+    ) -> Dict[str, Any]:
+        """Lädt ein Modell herunter; ``report`` erhält den Fortschritt jedes Chunks."""
         model = validate_model_name(args.get("model", ""))
         insecure = args.get("insecure", False)
 
         result = {"status": "downloading", "model": model}
-        chunks = []
-        async for chunk in self.client.pull_model(model, insecure):
-            chunks.append(chunk)
-            if chunk.get("status") == "success":
-                result["status"] = "success"
-                break
-            elif chunk.get("error"):
-                result["status"] = "error"
-                result["error"] = chunk.get("error")
-                break
+        async with self._slot(model, PRIORITY_ADMIN):
+            async with aclosing(self.client.pull_model(model, insecure)) as chunks:
+                async for chunk in chunks:
+                    if report is not None:
+                        report(_pull_progress(chunk))
+                    if chunk.get("status") == "success":
+                        result["status"] = "success"
+                        self.catalog.invalidate()
+                        break
+                    elif chunk.get("error"):
+                        result["status"] = "error"
+                        result["error"] = chunk.get("error")
+                        break
 
         return result
 
     async def _delete_model(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Löscht ein Modell."""
         model = validate_model_name(args.get("model", ""))
-        return await self.client.delete_model(model)
+        async with self._slot(model, PRIORITY_ADMIN):
+            result = await self.client.delete_model(model)
+        self.catalog.invalidate()
+        return result
 
     async def _copy_model(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Kopiert ein Modell."""
         source = validate_model_name(args.get("source", ""))
         destination = validate_model_name(args.get("destination", ""))
-        return await self.client.copy_model(source, destination)
+        async with self._slot(source, PRIORITY_ADMIN):
+            result = await self.client.copy_model(source, destination)
+        self.catalog.invalidate()
+        return result
 
-    async def _create_model(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Erstellt ein Modell."""
+    async def _create_model(
+        self, args: Dict[str, Any], report: Optional[Report] = None
+    ) -> Dict[str, Any]:
+        """Erstellt ein Modell; mit ``report`` wird der Fortschritt gestreamt."""
         model = validate_model_name(args.get("model", ""))
         modelfile = args.get("modelfile", "")
         if not modelfile:
             raise ValidationError("modelfile ist erforderlich")
 
         result = {"status": "creating", "model": model}
-        async for chunk in self.client.create_model(model, modelfile):
-            if chunk.get("status") == "success":
-                result["status"] = "success"
-                break
-            elif chunk.get("error"):
-                result["status"] = "error"
-                result["error"] = chunk.get("error")
-                break
+        async with self._slot(model, PRIORITY_ADMIN):
+            async with aclosing(
+                self.client.create_model(model, modelfile, stream=report is not None)
+            ) as chunks:
+                async for chunk in chunks:
+                    if report is not None:
+                        report({"status": chunk.get("status", "")})
+                    if chunk.get("status") == "success":
+                        result["status"] = "success"
+                        self.catalog.invalidate()
+                        break
+                    elif chunk.get("error"):
+                        result["status"] = "error"
+                        result["error"] = chunk.get("error")
+                        break
 
         return result
 
+    def _resolve_context(self, context: Any) -> Optional[List[int]]:
+        """Löst einen Kontext-Handle in Token-IDs auf; Arrays werden durchgereicht."""
+        if not is_context_handle(context):
+            return context
+        tokens = self.context_store.get(context) if self.context_store else None
+        if tokens is None:
+            raise ValidationError(f"Unbekannter oder abgelaufener Kontext-Handle: {context}")
+        return tokens
+
+    def _format_generate(
+        self, response: Dict[str, Any], include_context: bool = False
+    ) -> Dict[str, Any]:
+        """Formatiert eine Generate-Antwort und ersetzt den Kontext durch einen Handle.
+
+        Das Token-Array bleibt nur erhalten, wenn ``include_context`` gesetzt ist oder
+        kein Handle vergeben werden konnte (Handles deaktiviert, Kontext über Budget).
+        """
+        result = format_generate_response(response)
+        if self.context_store is None:
+            return result
+        tokens = result.pop("context")
+        handle = self.context_store.put(tokens)
+        if handle:
+            result["context_handle"] = handle
+        if include_context or (tokens and not handle):
+            result["context"] = tokens
+        return result
+
     async def _generate(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Generiert Text."""
         model = validate_model_name(args.get("model", ""))
@@ -163,16 +448,29 @@ class ToolHandler:
 
         system = args.get("system")
         template = args.get("template")
-        context = args.get("context")
+        context = self._resolve_context(args.get("context"))
         options = args.get("options", {})
+        include_context = bool(args.get("include_context"))
 
-        async for response in self.client.generate(
-            model, prompt, system, template, context, stream=False, options=options
-        ):
-            return format_generate_response(response)
+        async with self._slot(model, PRIORITY_INTERACTIVE):
+            async with aclosing(
+                self.client.generate(
+                    model, prompt, system, template, context, stream=False, options=options
+                )
+            ) as responses:
+                async for response in responses:
+                    if response.get("error"):
+                        raise OllamaAPIError(response["error"])
+                    return self._format_generate(response, include_context)
 
     async def _generate_stream(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generiert Text im Streaming-Modus."""
+        """Generiert Text im Streaming-Modus (gesammelt für nicht-streamende Clients)."""
+        return [chunk async for chunk in self._iter_generate_stream(args)]
+
+    async def _iter_generate_stream(
+        self, args: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Liefert Generate-Chunks inkrementell."""
         model = validate_model_name(args.get("model", ""))
         prompt = args.get("prompt", "")
         if not prompt:
@@ -180,15 +478,20 @@ class ToolHandler:
 
         system = args.get("system")
         template = args.get("template")
-        context = args.get("context")
+        context = self._resolve_context(args.get("context"))
         options = args.get("options", {})
+        include_context = bool(args.get("include_context"))
 
-        chunks = []
-        async for chunk in self.client.generate(
-            model, prompt, system, template, context, stream=True, options=options
-        ):
-            chunks.append(format_generate_response(chunk))
-        return chunks
+        async with self._slot(model, PRIORITY_INTERACTIVE):
+            async with aclosing(
+                self.client.generate(
+                    model, prompt, system, template, context, stream=True, options=options
+                )
+            ) as chunks:
+                async for chunk in chunks:
+                    if chunk.get("error"):
+                        raise OllamaAPIError(chunk["error"])
+                    yield self._format_generate(chunk, include_context)
 
     async def _chat(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Chat-Kompletierung."""
@@ -199,11 +502,23 @@ class ToolHandler:
 
         options = args.get("options", {})
 
-        async for response in self.client.chat(model, messages, stream=False, options=options):
-            return format_chat_response(response)
+        async with self._slot(model, PRIORITY_INTERACTIVE):
+            async with aclosing(
+                self.client.chat(model, messages, stream=False, options=options)
+            ) as responses:
+                async for response in responses:
+                    if response.get("error"):
+                        raise OllamaAPIError(response["error"])
+                    return format_chat_response(response)
 
     async def _chat_stream(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Chat im Streaming-Modus."""
+        """Chat im Streaming-Modus (gesammelt für nicht-streamende Clients)."""
+        return [chunk async for chunk in self._iter_chat_stream(args)]
+
+    async def _iter_chat_stream(
+        self, args: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Liefert Chat-Chunks inkrementell."""
         model = validate_model_name(args.get("model", ""))
         messages = args.get("messages", [])
         if not messages:
@@ -211,10 +526,58 @@ class ToolHandler:
 
         options = args.get("options", {})
 
-        chunks = []
-        async for chunk in self.client.chat(model, messages, stream=True, options=options):
-            chunks.append(format_chat_response(chunk))
-        return chunks
+        async with self._slot(model, PRIORITY_INTERACTIVE):
+            async with aclosing(
+                self.client.chat(model, messages, stream=True, options=options)
+            ) as chunks:
+                async for chunk in chunks:
+                    if chunk.get("error"):
+                        raise OllamaAPIError(chunk["error"])
+                    yield format_chat_response(chunk)
+
+    async def _model_digest(self, model: str) -> Optional[str]:
+        """Ermittelt den Digest eines installierten Modells aus /api/tags."""
+        model_data = await self.catalog.get_model(model)
+        return (model_data or {}).get("digest") or None
+
+    async def _embedding_cache_keys(
+        self, endpoint: str, model: str, options: Dict[str, Any], texts: List[str]
+    ) -> Optional[List[str]]:
+        """Bildet Cache-Schlüssel; None wenn kein Cache aktiv oder Digest unbekannt.
+
+        ``endpoint`` (``embed``/``embeddings``) trennt normierte von rohen Vektoren.
+        """
+        if self.embedding_cache is None:
+            return None
+        digest = await self._model_digest(model)
+        if digest is None:
+            return None
+        return [EmbeddingCache.make_key(endpoint, digest, options, text) for text in texts]
+
+    async def _fetch_embeddings(
+        self,
+        model: str,
+        texts: List[str],
+        options: Dict[str, Any],
+        batch_size: Optional[int] = None,
+    ) -> List[List[float]]:
+        """Holt Embeddings von Ollama, gebündelt über /api/embed."""
+        async with self._slot(model, PRIORITY_BATCH):
+            try:
+                return await self.client.embed_batch(
+                    model, texts, options, batch_size=batch_size
+                )
+            except OllamaAPIError as e:
+                # Ältere Ollama-Versionen kennen /api/embed noch nicht; deren rohe
+                # Vektoren wie bei /api/embed normieren
+                if e.status_code != 404:
+                    raise
+                return [
+                    _normalize(
+                        (await self.client.embeddings(model, text, options)).get("embedding", [])
+                    )
+                    for text in texts
+                ]
 
     async def _embeddings(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Generiert Embeddings."""
@@ -224,8 +587,18 @@ class ToolHandler:
             raise ValidationError("prompt ist erforderlich")
 
         options = args.get("options", {})
-        response = await self.client.embeddings(model, prompt, options)
-        return format_embedding_response(response)
+        encoding = validate_encoding(args.get("encoding"))
+        keys = await self._embedding_cache_keys("embeddings", model, options, [prompt])
+        if keys:
+            cached = await self.embedding_cache.get(keys[0])
+            if cached is not None:
+                return format_embedding_response({"embedding": cached}, encoding)
+
+        async with self._slot(model, PRIORITY_INTERACTIVE):
+            response = await self.client.embeddings(model, prompt, options)
+        if keys and response.get("embedding"):
+            await self.embedding_cache.put(keys[0], response["embedding"])
+        return format_embedding_response(response, encoding)
 
     async def _create_embeddings(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Erstellt Embeddings für mehrere Texte."""
@@ -235,11 +608,143 @@ class ToolHandler:
             raise ValidationError("prompts sind erforderlich")
 
         options = args.get("options", {})
-        results = []
-        for prompt in prompts:
-            response = await self.client.embeddings(model, prompt, options)
-            results.append(format_embedding_response(response))
-        return results
+        encoding = validate_encoding(args.get("encoding"))
+        embeddings = await self._embed_texts(
+            model, prompts, options, batch_size=args.get("batch_size")
+        )
+        return [
+            format_embedding_response({"embedding": embedding}, encoding)
+            for embedding in embeddings
+        ]
+
+    async def _embed_texts(
+        self,
+        model: str,
+        prompts: List[str],
+        options: Dict[str, Any],
+        batch_size: Optional[int] = None,
+    ) -> List[List[float]]:
+        """Liefert Embeddings für Texte über Cache und Ollama (Reihenfolge wie Eingabe)."""
+        keys = await self._embedding_cache_keys("embed", model, options, prompts)
+        embeddings: List[Optional[List[float]]] = [None] * len(prompts)
+        if keys:
+            embeddings = await self.embedding_cache.get_many(keys)
+
+        missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # Doppelte Texte nur einmal an Ollama senden
+            unique_texts = list(dict.fromkeys(prompts[index] for index in missing))
+            fetched = await self._fetch_embeddings(
+                model, unique_texts, options, batch_size=batch_size
+            )
+            by_text = dict(zip(unique_texts, fetched))
+            for index in missing:
+                embeddings[index] = by_text[prompts[index]]
+            if keys:
+                await self.embedding_cache.put_many(
+                    {keys[index]: embeddings[index] for index in missing}
+                )
+        return embeddings
+
+    async def _create_collection(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Legt eine Vektor-Collection an."""
+        name = args.get("name", "")
+        model = validate_model_name(args.get("model", ""))
+        collection = await asyncio.to_thread(self.vector_index.create, name, model)
+        return {"success": True, "name": name, **collection.info()}
+
+    async def _upsert_texts(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Bettet Texte ein und legt sie in einer Collection ab."""
+        name = args.get("collection", "")
+        texts = args.get("texts", [])
+        if not texts:
+            raise ValidationError("texts sind erforderlich")
+        ids = args.get("ids") or [
+            hashlib.sha256(text.encode("utf-8")).hexdigest()[:16] for text in texts
+        ]
+        metadata = args.get("metadata") or [{} for _ in texts]
+        if len(ids) != len(texts) or len(metadata) != len(texts):
+            raise ValidationError("ids und metadata müssen so lang sein wie texts")
+
+        collection = await asyncio.to_thread(self.vector_index.get, name)
+        vectors = await self._embed_texts(collection.model, texts, args.get("options", {}))
+        added = await asyncio.to_thread(
+            collection.upsert, [str(i) for i in ids], texts, vectors, metadata
+        )
+        return {
+            "collection": name,
+            "upserted": len(texts),
+            "added": added,
+            "ids": ids,
+            **collection.info(),
+        }
+
+    async def _query_collection(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Sucht die ähnlichsten Texte einer Collection (Kosinus-Ähnlichkeit)."""
+        name = args.get("collection", "")
+        query = args.get("query", "")
+        if not query:
+            raise ValidationError("query ist erforderlich")
+        top_k = int(args.get("top_k") or 5)
+        if top_k < 1:
+            raise ValidationError("top_k muss mindestens 1 sein")
+
+        collection = await asyncio.to_thread(self.vector_index.get, name)
+        vectors = await self._embed_texts(collection.model, [query], args.get("options", {}))
+        matches = await asyncio.to_thread(collection.query, vectors[0], top_k)
+        return {"collection": name, "matches": matches, "count": len(matches)}
+
+    async def _list_collections(self) -> Dict[str, Any]:
+        """Listet alle Vektor-Collections auf."""
+        return {"collections": self.vector_index.names()}
+
+    async def _delete_collection(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Löscht eine Vektor-Collection."""
+        name = args.get("name", "")
+        success = await asyncio.to_thread(self.vector_index.delete, name)
+        return {"success": success, "name": name}
+
+    async def _submit_job(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Startet einen Hintergrund-Job und gibt sofort seine ID zurück."""
+        kind = args.get("kind", "")
+        arguments = args.get("arguments") or {}
+        job = self.jobs.submit(kind, arguments)
+        return {"job_id": job["id"], "kind": kind, "status": job["status"]}
+
+    async def _job_status(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Gibt Status, Fortschritt und Ergebnis eines Jobs zurück."""
+        return dict(self.jobs.get(args.get("job_id", "")))
+
+    async def _list_jobs(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Listet Jobs ohne Ergebnisse auf."""
+        jobs = [
+            {key: value for key, value in job.items() if key != "result"}
+            for job in self.jobs.list(args.get("status"))
+        ]
+        return {"jobs": jobs, "count": len(jobs)}
+
+    async def _cancel_job(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Bricht einen Job ab."""
+        job = await self.jobs.cancel(args.get("job_id", ""))
+        return {"job_id": job["id"], "status": job["status"]}
+
+    async def _watch_job(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Beobachtet einen Job bis zum Ende (gesammelt für nicht-streamende Clients)."""
+        return [chunk async for chunk in self._iter_watch_job(args)]
+
+    async def _iter_watch_job(
+        self, args: Dict[str, Any]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Liefert den Job-Zustand bei jeder Fortschrittsänderung."""
+        async with aclosing(self.jobs.watch(args.get("job_id", ""))) as updates:
+            async for job in updates:
+                yield {
+                    "job_id": job["id"],
+                    "status": job["status"],
+                    "progress": job["progress"],
+                    "result": job["result"],
+                    "error": job["error"],
+                }
 
     async def _list_processes(self) -> Dict[str, Any]:
         """Listet Prozesse auf."""
@@ -266,51 +771,50 @@ class ToolHandler:
 
         # update_model ist im Grunde create_model mit overwrite
         result = {"status": "updating", "model": model}
-        async for chunk in self.client.create_model(model, modelfile):
-            if chunk.get("status") == "success":
-                result["status"] = "success"
-                break
-            elif chunk.get("error"):
-                result["status"] = "error"
-                result["error"] = chunk.get("error")
-                break
+        async with self._slot(model, PRIORITY_ADMIN), aclosing(
+            self.client.create_model(model, modelfile)
+        ) as chunks:
+            async for chunk in chunks:
+                if chunk.get("status") == "success":
+                    result["status"] = "success"
+                    self.catalog.invalidate()
+                    break
+                elif chunk.get("error"):
+                    result["status"] = "error"
+                    result["error"] = chunk.get("error")
+                    break
 
         return result
 
     async def _get_modelfile(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Ruft Modelfile ab."""
         model = validate_model_name(args.get("model", ""))
-        response = await self.client.show_model(model)
+        response = await self.catalog.show_model(model)
         modelfile = response.get("modelfile", "")
         return {"model": model, "modelfile": modelfile}
 
     async def _get_models_info(self) -> Dict[str, Any]:
-        """Ruft Informationen über alle Modelle ab."""
-        models_response = await self.client.list_models()
+        """Ruft Informationen über alle Modelle ab (Details nebenläufig)."""
+        models_response = await self.catalog.list_models()
         models = models_response.get("models", [])
 
-        models_info = []
-        for model_data in models:
-            model_name = model_data.get("name", "")
-            try:
-                model_details = await self.client.show_model(model_name)
-                models_info.append(
-                    {
-                        "name": model_name,
-                        "size": model_data.get("size", 0),
-                        "modified_at": model_data.get("modified_at", ""),
-                        "details": model_details,
-                    }
-                )
-            except Exception:
-                models_info.append(
-                    {
-                        "name": model_name,
-                        "size": model_data.get("size", 0),
-                        "modified_at": model_data.get("modified_at", ""),
-                        "details": None,
-                    }
-                )
+        details = await gather_limited(
+            [
+                lambda name=model_data.get("name", ""): self.catalog.show_model(name)
+                for model_data in models
+            ],
+            self.config.fanout_max_concurrency,
+        )
+
+        models_info = [
+            {
+                "name": model_data.get("name", ""),
+                "size": model_data.get("size", 0),
+                "modified_at": model_data.get("modified_at", ""),
+                "details": None if isinstance(model_details, BaseException) else model_details,
+            }
+            for model_data, model_details in zip(models, details)
+        ]
 
         return {"models": models_info, "count": len(models_info)}
 
@@ -318,7 +822,7 @@ class ToolHandler:
         """Validiert ein Modell."""
         model = validate_model_name(args.get("model", ""))
         try:
-            model_info = await self.client.show_model(model)
+            model_info = await self.catalog.show_model(model)
             return {
                 "valid": True,
                 "model": model,
@@ -334,23 +838,20 @@ class ToolHandler:
     async def _get_model_size(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Ruft Modell-Größe ab."""
         model = validate_model_name(args.get("model", ""))
-        models_response = await self.client.list_models()
-        models = models_response.get("models", [])
-
-        for model_data in models:
-            if model_data.get("name") == model:
-                size_bytes = model_data.get("size", 0)
-                size_mb = size_bytes / (1024 * 1024)
-                size_gb = size_bytes / (1024 * 1024 * 1024)
-                return {
-                    "model": model,
-                    "size_bytes": size_bytes,
-                    "size_mb": round(size_mb, 2),
-                    "size_gb": round(size_gb, 2),
-                    "size_human": f"{size_gb:.2f} GB" if size_gb >= 1 else f"{size_mb:.2f} MB",
-                }
-
-        raise ValidationError(f"Modell {model} nicht gefunden")
+        model_data = await self.catalog.get_model(model)
+        if model_data is None:
+            raise ValidationError(f"Modell {model} nicht gefunden")
+
+        size_bytes = model_data.get("size", 0)
+        size_mb = size_bytes / (1024 * 1024)
+        size_gb = size_bytes / (1024 * 1024 * 1024)
+        return {
+            "model": model,
+            "size_bytes": size_bytes,
+            "size_mb": round(size_mb, 2),
+            "size_gb": round(size_gb, 2),
+            "size_human": f"{size_gb:.2f} GB" if size_gb >= 1 else f"{size_mb:.2f} MB",
+        }
 
     async def _search_models(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Durchsucht Modelle."""
@@ -358,7 +859,7 @@ class ToolHandler:
         if not query:
             raise ValidationError("query ist erforderlich")
 
-        models_response = await self.client.list_models()
+        models_response = await self.catalog.list_models()
         models = models_response.get("models", [])
 
         matching_models = [
@@ -374,12 +875,13 @@ class ToolHandler:
         session_id = args.get("session_id", "")
         if not session_id:
             raise ValidationError("session_id ist erforderlich")
+        validate_session_id(session_id)
 
         messages = args.get("messages", [])
         if not messages:
             raise ValidationError("messages sind erforderlich")
 
-        success = self.sessions.save_context(session_id, messages)
+        success = await self.sessions.save_context(session_id, messages)
         return {"session_id": session_id, "saved": success}
 
     async def _load_context(self, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -387,8 +889,9 @@ class ToolHandler:
         session_id = args.get("session_id", "")
         if not session_id:
             raise ValidationError("session_id ist erforderlich")
+        validate_session_id(session_id)
 
-        messages = self.sessions.load_context(session_id)
+        messages = await self.sessions.load_context(session_id)
         return {"session_id": session_id, "messages": messages or []}
 
     async def _clear_context(self, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -396,31 +899,117 @@ class ToolHandler:
         session_id = args.get("session_id", "")
         if not session_id:
             raise ValidationError("session_id ist erforderlich")
+        validate_session_id(session_id)
 
-        success = self.sessions.clear_context(session_id)
+        success = await self.sessions.clear_context(session_id)
         return {"session_id": session_id, "cleared": success}
 
-    async def _batch_generate(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Batch-Generierung."""
+    async def _batch_generate(
+        self, args: Dict[str, Any], report: Optional[Report] = None
+    ) -> Dict[str, Any]:
+        """Batch-Generierung mit begrenzter Parallelität.
+
+        Ergebnisse stehen in Eingabereihenfolge; Fehler einzelner Prompts werden pro
+        Eintrag gemeldet, ohne den Batch abzubrechen. ``report`` erhält die Anzahl
+        fertiger Prompts.
+        """
         model = validate_model_name(args.get("model", ""))
         prompts = args.get("prompts", [])
         if not prompts:
             raise ValidationError("prompts sind erforderlich")
 
         options = args.get("options", {})
+        max_concurrency = max(
+            1, int(args.get("max_concurrency") or self.config.batch_max_concurrency)
+        )
+        if self.scheduler is not None:
+            # Mehr als die Slots pro Modell würde nur die eigene Warteschlange füllen
+            max_concurrency = min(max_concurrency, self.scheduler.max_concurrency)
+        include_context = bool(args.get("include_context"))
+
+        completed = 0
+
+        async def generate_one(prompt: str) -> Dict[str, Any]:
+            nonlocal completed
+            try:
+                async with self._slot(model, PRIORITY_BATCH), aclosing(
+                    self.client.generate(model, prompt, stream=False, options=options)
+                ) as responses:
+                    async for response in responses:
+                        return self._format_generate(response, include_context)
+                raise OllamaAPIError("Leere Antwort von Ollama")
+            finally:
+                completed += 1
+                if report is not None:
+                    report({"completed": completed, "total": len(prompts)})
+
+        started = time.perf_counter()
+        outcomes = await gather_limited(
+            [lambda p=prompt: generate_one(p) for prompt in prompts], max_concurrency
+        )
+        wall_time = time.perf_counter() - started
 
         results = []
-        for prompt in prompts:
-            async for response in self.client.generate(
-                model, prompt, stream=False, options=options
-            ):
-                results.append(format_generate_response(response))
-                break
-
-        return results
+        errors = 0
+        eval_count = 0
+        eval_duration = 0
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                errors += 1
+                results.append(format_error(outcome))
+                continue
+            eval_count += outcome.get("eval_count", 0)
+            eval_duration += outcome.get("eval_duration", 0)
+            results.append(outcome)
+
+        return {
+            "model": model,
+            "results": results,
+            "count": len(results),
+            "errors": errors,
+            "max_concurrency": max_concurrency,
+            "wall_time_s": round(wall_time, 3),
+            "eval_count": eval_count,
+            # Modell-Durchsatz (Summe der Decode-Zeiten) und effektiver Durchsatz (Wall-Clock)
+            "tokens_per_second": (
+                round(eval_count / (eval_duration / 1e9), 2) if eval_duration else 0.0
+            ),
+            "effective_tokens_per_second": (
+                round(eval_count / wall_time, 2) if wall_time else 0.0
+            ),
+        }
+
+    async def _generate_timed(
+        self, model: str, prompt: str, options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Generiert per Streaming und misst Wall-Time und Time-to-First-Token."""
+        first_token_at: Optional[float] = None
+        parts: List[str] = []
+        final: Dict[str, Any] = {}
+        async with self._slot(model, PRIORITY_BATCH):
+            # Zeitmessung erst nach der Wartezeit in der Admission-Queue
+            started = time.perf_counter()
+            async with aclosing(
+                self.client.generate(model, prompt, stream=True, options=options)
+            ) as chunks:
+                async for chunk in chunks:
+                    if chunk.get("error"):
+                        raise OllamaAPIError(chunk["error"])
+                    if first_token_at is None and chunk.get("response"):
+                        first_token_at = time.perf_counter()
+                    parts.append(chunk.get("response", ""))
+                    final = chunk
+        finished = time.perf_counter()
+
+        result = self._format_generate({**final, "response": "".join(parts)})
+        result["wall_time_ms"] = round((finished - started) * 1000, 2)
+        result["time_to_first_token_ms"] = (
+            round((first_token_at - started) * 1000, 2) if first_token_at else None
+        )
+        return result
 
     async def _compare_models(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Vergleicht Modelle."""
+        """Vergleicht Modelle (nebenläufig, mit Latenzmessung pro Modell)."""
         models = args.get("models", [])
         if not models or len(models) < 2:
             raise ValidationError("mindestens 2 Modelle erforderlich")
@@ -430,18 +1019,21 @@ class ToolHandler:
             raise ValidationError("prompt ist erforderlich")
 
         options = args.get("options", {})
+        max_concurrency = int(args.get("max_concurrency") or self.config.fanout_max_concurrency)
+
+        async def compare_one(model_name: str) -> Dict[str, Any]:
+            return await self._generate_timed(validate_model_name(model_name), prompt, options)
+
+        outcomes = await gather_limited(
+            [lambda name=model_name: compare_one(name) for model_name in models],
+            max_concurrency,
+        )
 
         results = {}
-        for model_name in models:
-            try:
-                validate_model_name(model_name)
-                async for response in self.client.generate(
-                    model_name, prompt, stream=False, options=options
-                ):
-                    results[model_name] = format_generate_response(response)
-                    break
-            except Exception as e:
-                results[model_name] = {"error": str(e)}
+        for model_name, outcome in zip(models, outcomes):
+            if isinstance(outcome, BaseException):
+                results[model_name] = {"error": str(outcome)}
+            else:
+                results[model_name] = outcome
 
         return {"prompt": prompt, "results": results}
-
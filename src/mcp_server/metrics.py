@@ -0,0 +1,214 @@
+"""Leichtgewichtige Metriken im Prometheus-Textformat."""
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKENS_PER_SECOND_BUCKETS = (1, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Maskiert einen Label-Wert."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    """Formatiert Labels als ``{name="wert",...}``."""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Gemeinsame Basis für Metriken mit Labels."""
+
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+
+    def header(self) -> List[str]:
+        """Gibt HELP- und TYPE-Zeilen zurück."""
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Erhöht den Zähler."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        """Gibt die Metrik im Textformat aus."""
+        lines = self.header()
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Wert, der steigen und fallen kann."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        """Verringert den Wert."""
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(_Metric):
+    """Histogramm mit festen Buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+        # Pro Label-Kombination: [Zähler je Bucket..., +Inf], Summe
+        self.values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Erfasst einen Messwert."""
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = ([0] * (len(self.buckets) + 1), [0.0])
+            self.values[labels] = entry
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def render(self) -> List[str]:
+        """Gibt die Metrik im Textformat aus."""
+        lines = self.header()
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                label_str = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            cumulative += counts[-1]
+            label_str = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            plain = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{plain} {total[0]}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Sammlung aller Server-Metriken."""
+
+    def __init__(self):
+        """Initialisiert die Metriken."""
+        self.tool_requests = Counter("mcp_tool_requests_total", "Tool-Aufrufe", ["tool"])
+        self.tool_errors = Counter(
+            "mcp_tool_errors_total", "Fehlgeschlagene Tool-Aufrufe", ["tool"]
+        )
+        self.tool_duration = Histogram(
+            "mcp_tool_duration_seconds", "Dauer von Tool-Aufrufen", ["tool"]
+        )
+        self.tool_in_flight = Gauge("mcp_tool_in_flight", "Laufende Tool-Aufrufe", ["tool"])
+        self.tool_cancelled = Counter(
+            "mcp_tool_cancelled_total", "Abgebrochene Tool-Aufrufe (Client getrennt)", ["tool"]
+        )
+        self.tokens_saved = Counter(
+            "ollama_tokens_saved_total",
+            "Geschätzt nicht generierte Tokens durch abgebrochene Anfragen",
+            ["model"],
+        )
+        self.upstream_duration = Histogram(
+            "ollama_request_duration_seconds", "Dauer von Ollama-Anfragen", ["endpoint"]
+        )
+        self.upstream_errors = Counter(
+            "ollama_request_errors_total", "Fehlgeschlagene Ollama-Anfragen", ["endpoint"]
+        )
+        self.model_load = Histogram(
+            "ollama_model_load_seconds", "Ladezeit des Modells (load_duration)", ["model"]
+        )
+        self.prompt_eval = Histogram(
+            "ollama_prompt_eval_seconds", "Prompt-Auswertung (prompt_eval_duration)", ["model"]
+        )
+        self.generation = Histogram(
+            "ollama_generation_seconds", "Gesamtdauer laut Ollama (total_duration)", ["model"]
+        )
+        self.tokens_per_second = Histogram(
+            "ollama_eval_tokens_per_second",
+            "Generierungsgeschwindigkeit (eval_count / eval_duration)",
+            ["model"],
+            buckets=TOKENS_PER_SECOND_BUCKETS,
+        )
+        self.eval_tokens = Counter("ollama_eval_tokens_total", "Generierte Tokens", ["model"])
+        # Abgeschlossene Generierungen pro Modell (Basis für die Schätzung eingesparter Tokens)
+        self._completions: Dict[str, int] = {}
+
+    def _all(self) -> List[_Metric]:
+        """Gibt alle registrierten Metriken zurück."""
+        return [value for value in vars(self).values() if isinstance(value, _Metric)]
+
+    def observe_ollama_timings(self, model: str, response: Dict[str, Any]) -> None:
+        """Erfasst die Zeitangaben einer abgeschlossenen Generate-/Chat-Antwort."""
+        load_duration = response.get("load_duration")
+        if load_duration:
+            self.model_load.observe(load_duration / 1e9, model)
+        prompt_eval_duration = response.get("prompt_eval_duration")
+        if prompt_eval_duration:
+            self.prompt_eval.observe(prompt_eval_duration / 1e9, model)
+        total_duration = response.get("total_duration")
+        if total_duration:
+            self.generation.observe(total_duration / 1e9, model)
+        eval_count = response.get("eval_count") or 0
+        eval_duration = response.get("eval_duration")
+        if eval_count:
+            self.eval_tokens.inc(model, amount=eval_count)
+            self._completions[model] = self._completions.get(model, 0) + 1
+            if eval_duration:
+                self.tokens_per_second.observe(eval_count / (eval_duration / 1e9), model)
+
+    def observe_cancelled(
+        self, tool: str, model: Optional[str], produced: int = 0,
+        num_predict: Optional[int] = None,
+    ) -> None:
+        """Erfasst einen abgebrochenen Tool-Aufruf und die eingesparten Tokens.
+
+        Erwartet werden ``num_predict`` Tokens, sonst die durchschnittliche Länge
+        bisheriger Antworten des Modells; gezählt wird der noch ausstehende Rest.
+        """
+        self.tool_cancelled.inc(tool)
+        if not model:
+            return
+        expected = num_predict if isinstance(num_predict, int) and num_predict > 0 else None
+        if expected is None and self._completions.get(model):
+            expected = self.eval_tokens.values.get((model,), 0) / self._completions[model]
+        if expected and expected > produced:
+            self.tokens_saved.inc(model, amount=round(expected - produced))
+
+    def render(self) -> str:
+        """Gibt alle Metriken im Prometheus-Textformat zurück."""
+        lines: List[str] = []
+        for metric in self._all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Globale Metrikinstanz
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Gibt die globale Metrikinstanz zurück."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,321 @@
+"""Backend-Pool für mehrere Ollama-Server mit modellaffinem Routing."""
+
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Set, TypeVar
+
+from mcp_server.client import OllamaClient
+from mcp_server.config import get_config
+from mcp_server.exceptions import OllamaConnectionError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def normalize_model_name(model: str) -> str:
+    """Ergänzt fehlende Tags um ``:latest``, wie Ollama es tut."""
+    return model if ":" in model else f"{model}:latest"
+
+
+class Backend:
+    """Ein einzelner Ollama-Server im Pool."""
+
+    def __init__(self, url: str, config):
+        """Initialisiert das Backend."""
+        self.url = url
+        self.client = OllamaClient(config, base_url=url)
+        self.healthy = True
+        self.loaded_models: Set[str] = set()
+        self.installed_models: Set[str] = set()
+        self.in_flight = 0
+        self.last_error: Optional[str] = None
+
+    async def refresh(self) -> None:
+        """Aktualisiert Gesundheitsstatus sowie geladene und installierte Modelle."""
+        try:
+            processes, tags = await asyncio.gather(
+                self.client.list_processes(), self.client.list_models()
+            )
+        except Exception as e:
+            if self.healthy:
+                logger.warning(f"Ollama-Backend {self.url} entfernt: {e}")
+            self.healthy = False
+            self.last_error = str(e)
+            return
+
+        if not self.healthy:
+            logger.info(f"Ollama-Backend {self.url} wieder aufgenommen")
+        self.healthy = True
+        self.last_error = None
+        self.loaded_models = {
+            normalize_model_name(m.get("name", "")) for m in processes.get("models", [])
+        }
+        self.installed_models = {
+            normalize_model_name(m.get("name", "")) for m in tags.get("models", [])
+        }
+
+    def mark_installed(self, model: str) -> None:
+        """Vermerkt ein neu installiertes Modell sofort (nicht erst beim nächsten Polling)."""
+        self.installed_models.add(normalize_model_name(model))
+
+    def mark_removed(self, model: str) -> None:
+        """Vermerkt ein gelöschtes Modell sofort (nicht erst beim nächsten Polling)."""
+        name = normalize_model_name(model)
+        self.installed_models.discard(name)
+        self.loaded_models.discard(name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt den Zustand des Backends zurück."""
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "loaded_models": sorted(self.loaded_models),
+            "installed_models": len(self.installed_models),
+            "last_error": self.last_error,
+            "http": self.client.stats(),
+        }
+
+
+class BackendPool:
+    """Verteilt Anfragen auf mehrere Ollama-Backends.
+
+    Bietet dieselbe Schnittstelle wie ``OllamaClient``. Modellbezogene Anfragen gehen
+    bevorzugt an ein Backend, das das Modell bereits geladen hat (kein
+    ``load_duration``), sonst an eines, das es installiert hat, sonst an das am
+    wenigsten ausgelastete. Nicht erreichbare Backends werden entfernt und nach
+    erfolgreicher Abfrage wieder aufgenommen. Pull, Create, Copy und Delete
+    aktualisieren die Modelllisten des betroffenen Backends sofort, damit das
+    Routing nicht bis zum nächsten Polling veraltet ist.
+    """
+
+    def __init__(self, config=None, urls: Optional[List[str]] = None):
+        """Initialisiert den Pool."""
+        self.config = config or get_config()
+        urls = urls or self.config.ollama_backend_urls
+        self.backends = [Backend(url, self.config) for url in urls]
+        self.poll_interval = self.config.backend_poll_interval
+        self._poll_task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        """Fragt alle Backends einmal ab."""
+        await asyncio.gather(*(backend.refresh() for backend in self.backends))
+
+    async def _poll_loop(self) -> None:
+        """Fragt die Backends periodisch ab."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.refresh()
+
+    async def start(self) -> None:
+        """Führt eine erste Abfrage durch und startet das periodische Polling."""
+        await self.refresh()
+        if self._poll_task is None:
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def close(self) -> None:
+        """Stoppt das Polling und schließt alle HTTP-Clients."""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        for backend in self.backends:
+            await backend.client.close()
+
+    def _healthy(self) -> List[Backend]:
+        """Gibt alle gesunden Backends zurück."""
+        healthy = [backend for backend in self.backends if backend.healthy]
+        if not healthy:
+            raise OllamaConnectionError("Kein Ollama-Backend erreichbar")
+        return healthy
+
+    def select(self, model: Optional[str] = None) -> Backend:
+        """Wählt das Backend für eine Anfrage."""
+        candidates = self._healthy()
+        if model:
+            name = normalize_model_name(model)
+            loaded = [b for b in candidates if name in b.loaded_models]
+            installed = [b for b in candidates if name in b.installed_models]
+            candidates = loaded or installed or candidates
+        return min(candidates, key=lambda backend: backend.in_flight)
+
+    def _holders(self, model: str) -> List[Backend]:
+        """Gibt alle gesunden Backends zurück, auf denen ein Modell installiert ist."""
+        name = normalize_model_name(model)
+        holders = [b for b in self._healthy() if name in b.installed_models]
+        return holders or [self.select(model)]
+
+    def _mark_failed(self, backend: Backend, error: Exception) -> None:
+        """Entfernt ein Backend nach einem Verbindungsfehler bis zur nächsten Abfrage."""
+        logger.warning(f"Ollama-Backend {backend.url} entfernt: {error}")
+        backend.healthy = False
+        backend.last_error = str(error)
+
+    async def _call(
+        self, backend: Backend, call: Callable[[OllamaClient], Awaitable[T]]
+    ) -> T:
+        """Führt einen Aufruf auf einem Backend aus und zählt laufende Anfragen."""
+        backend.in_flight += 1
+        try:
+            return await call(backend.client)
+        except OllamaConnectionError as e:
+            self._mark_failed(backend, e)
+            raise
+        finally:
+            backend.in_flight -= 1
+
+    async def _stream(
+        self,
+        backend: Backend,
+        call: Callable[[OllamaClient], AsyncGenerator[Dict[str, Any], None]],
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Reicht einen Chunk-Stream eines Backends weiter und zählt laufende Anfragen."""
+        backend.in_flight += 1
+        try:
+            async with aclosing(call(backend.client)) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        except OllamaConnectionError as e:
+            self._mark_failed(backend, e)
+            raise
+        finally:
+            backend.in_flight -= 1
+
+    async def list_models(self) -> Dict[str, Any]:
+        """Listet die Modelle aller gesunden Backends (ohne Duplikate)."""
+        responses = await asyncio.gather(
+            *(self._call(b, lambda c: c.list_models()) for b in self._healthy()),
+            return_exceptions=True,
+        )
+        models: Dict[str, Dict[str, Any]] = {}
+        for response in responses:
+            if isinstance(response, BaseException):
+                continue
+            for model_data in response.get("models", []):
+                models.setdefault(model_data.get("name", ""), model_data)
+        return {"models": list(models.values())}
+
+    async def list_processes(self) -> Dict[str, Any]:
+        """Listet laufende Modelle aller gesunden Backends."""
+        backends = self._healthy()
+        responses = await asyncio.gather(
+            *(self._call(b, lambda c: c.list_processes()) for b in backends),
+            return_exceptions=True,
+        )
+        models = []
+        for backend, response in zip(backends, responses):
+            if isinstance(response, BaseException):
+                continue
+            for model_data in response.get("models", []):
+                models.append({**model_data, "backend": backend.url})
+        return {"models": models}
+
+    async def show_model(self, model: str) -> Dict[str, Any]:
+        """Zeigt Details zu einem Modell."""
+        return await self._call(self.select(model), lambda c: c.show_model(model))
+
+    async def pull_model(
+        self, model: str, insecure: bool = False
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Lädt ein Modell auf das passendste Backend herunter."""
+        backend = self.select(model)
+        async with aclosing(
+            self._stream(backend, lambda c: c.pull_model(model, insecure))
+        ) as chunks:
+            async for chunk in chunks:
+                if chunk.get("status") == "success":
+                    backend.mark_installed(model)
+                yield chunk
+
+    async def delete_model(self, model: str) -> Dict[str, Any]:
+        """Löscht ein Modell auf allen Backends, die es installiert haben."""
+        result: Dict[str, Any] = {}
+        for backend in self._holders(model):
+            result = await self._call(backend, lambda c: c.delete_model(model))
+            backend.mark_removed(model)
+        return result
+
+    async def copy_model(self, source: str, destination: str) -> Dict[str, Any]:
+        """Kopiert ein Modell auf allen Backends, die es installiert haben."""
+        result: Dict[str, Any] = {}
+        for backend in self._holders(source):
+            result = await self._call(backend, lambda c: c.copy_model(source, destination))
+            backend.mark_installed(destination)
+        return result
+
+    async def create_model(
+        self, model: str, modelfile: str, stream: bool = False
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Erstellt ein Modell auf dem passendsten Backend."""
+        backend = self.select(model)
+        async with aclosing(
+            self._stream(backend, lambda c: c.create_model(model, modelfile, stream))
+        ) as chunks:
+            async for chunk in chunks:
+                if chunk.get("status") == "success":
+                    backend.mark_installed(model)
+                yield chunk
+
+    async def generate(
+        self, model: str, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Generiert Text auf dem Backend mit der besten Modell-Affinität."""
+        async with aclosing(
+            self._stream(self.select(model), lambda c: c.generate(model, *args, **kwargs))
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def chat(
+        self, model: str, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Führt einen Chat auf dem Backend mit der besten Modell-Affinität."""
+        async with aclosing(
+            self._stream(self.select(model), lambda c: c.chat(model, *args, **kwargs))
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def embeddings(self, model: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Generiert Embeddings für einen Text."""
+        return await self._call(self.select(model), lambda c: c.embeddings(model, *args, **kwargs))
+
+    async def embed(self, model: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Generiert Embeddings für mehrere Texte in einer Anfrage."""
+        return await self._call(self.select(model), lambda c: c.embed(model, *args, **kwargs))
+
+    async def embed_batch(self, model: str, *args: Any, **kwargs: Any) -> List[List[float]]:
+        """Generiert Embeddings für beliebig viele Texte."""
+        return await self._call(
+            self.select(model), lambda c: c.embed_batch(model, *args, **kwargs)
+        )
+
+    async def check_blob(self, digest: str) -> bool:
+        """Prüft ob ein Blob auf irgendeinem Backend vorhanden ist."""
+        results = await asyncio.gather(
+            *(backend.client.check_blob(digest) for backend in self._healthy())
+        )
+        return any(results)
+
+    async def get_version(self) -> Dict[str, Any]:
+        """Ruft die Ollama-Version des am wenigsten ausgelasteten Backends ab."""
+        return await self._call(self.select(), lambda c: c.get_version())
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt den Zustand aller Backends zurück."""
+        return {"backends": [backend.stats() for backend in self.backends]}
+
+
+async def create_ollama_client(config=None) -> "OllamaClient | BackendPool":
+    """Erstellt einen einzelnen Client oder bei mehreren Backends einen gestarteten Pool."""
+    config = config or get_config()
+    if len(config.ollama_backend_urls) > 1:
+        pool = BackendPool(config)
+        await pool.start()
+        return pool
+    return OllamaClient(config)
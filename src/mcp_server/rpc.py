@@ -0,0 +1,236 @@
+"""Transportunabhängige JSON-RPC 2.0 Sitzung für nachrichtenbasierte Transports."""
+
+import asyncio
+import json
+import logging
+from contextlib import aclosing
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from mcp_server import __version__
+from mcp_server.exceptions import OverloadedError
+from mcp_server.handlers import ToolHandler
+from mcp_server.tools.definitions import TOOLS
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2024-11-05"
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+SERVER_ERROR = -32000
+OVERLOADED = -32001
+REQUEST_CANCELLED = -32800
+
+
+class RPCMethodError(Exception):
+    """Fehler, der als JSON-RPC Error-Objekt an den Client geht."""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+def error_response(request_id: Any, code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    """Baut eine JSON-RPC 2.0 Fehler-Response."""
+    error: Dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+class RPCSession:
+    """Verarbeitet JSON-RPC Nachrichten einer Verbindung.
+
+    Anfragen laufen als eigene Tasks nebenläufig; Streaming-Tools senden mit
+    ``"stream": true`` in den Parametern jeden Chunk als ``notifications/progress``,
+    bevor die abschließende Response folgt. ``notifications/cancelled`` bricht eine
+    laufende Anfrage anhand ihrer ID ab.
+
+    Mit ``max_in_flight`` werden Anfragen über dem Limit sofort mit ``OVERLOADED``
+    (inkl. ``retry_after``) abgelehnt. ``handle_text`` blockiert nie, damit der
+    Transport weiterliest und ``notifications/cancelled`` auch unter Last ankommt.
+    ``check_call`` wird vor jedem Tool-Aufruf mit Tool-Name und Argumenten
+    aufgerufen (z. B. für Rate Limiting) und kann durch eine Exception ablehnen.
+    """
+
+    def __init__(
+        self,
+        handler: ToolHandler,
+        send: Callable[[Any], Awaitable[None]],
+        max_in_flight: Optional[int] = None,
+        check_call: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+    ):
+        """Initialisiert die Sitzung mit Tool-Handler und Sende-Funktion."""
+        self.handler = handler
+        self._send = send
+        self._check_call = check_call
+        self._slots = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self._background: set = set()
+
+    async def handle_text(self, text: str) -> None:
+        """Verarbeitet eine empfangene Nachricht (Einzelanfrage oder Batch)."""
+        try:
+            message = json.loads(text)
+        except json.JSONDecodeError:
+            await self._send(error_response(None, PARSE_ERROR, "Ungültiges JSON"))
+            return
+
+        if isinstance(message, dict) and message.get("method") == "notifications/cancelled":
+            # Abbrüche belegen keinen In-Flight-Platz
+            self.cancel((message.get("params") or {}).get("requestId"))
+            return
+
+        if self._slots is not None:
+            if self._slots.locked():
+                await self._reject_overloaded(message)
+                return
+            # Kehrt sofort zurück, da ein Platz frei ist
+            await self._slots.acquire()
+        if isinstance(message, list):
+            self._spawn(None, self._handle_batch(message))
+        elif isinstance(message, dict):
+            self._dispatch(message)
+        else:
+            invalid = error_response(None, INVALID_REQUEST, "Ungültige Anfrage")
+            self._spawn(None, self._send(invalid))
+
+    async def _reject_overloaded(self, message: Any) -> None:
+        """Lehnt eine Nachricht über dem In-Flight-Limit ab (Notifications still)."""
+        requests = message if isinstance(message, list) else [message]
+        responses = [
+            error_response(
+                request.get("id"), OVERLOADED, "Zu viele gleichzeitige Anfragen",
+                {"retry_after": 1},
+            )
+            for request in requests
+            if isinstance(request, dict) and "id" in request
+        ]
+        if not responses:
+            return
+        await self._send(responses if isinstance(message, list) else responses[0])
+
+    def _spawn(self, request_id: Any, coro: Awaitable[None]) -> asyncio.Task:
+        """Startet eine Anfrage als Task und merkt sie sich für Abbruch und Shutdown."""
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        if self._slots is not None:
+            task.add_done_callback(lambda _: self._slots.release())
+        if request_id is not None:
+            self._tasks[request_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(request_id, None))
+        return task
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        """Startet die Verarbeitung einer Einzelnachricht."""
+
+        async def run() -> None:
+            response = await self._handle(message, allow_stream=True)
+            if response is not None:
+                await self._send(response)
+
+        self._spawn(message.get("id"), run())
+
+    async def _handle_batch(self, messages: List[Any]) -> None:
+        """Führt einen Batch nebenläufig aus und sendet die Responses gesammelt."""
+        if not messages:
+            await self._send(error_response(None, INVALID_REQUEST, "Ungültige Anfrage"))
+            return
+
+        async def run(message: Any) -> Optional[Dict[str, Any]]:
+            if not isinstance(message, dict):
+                return error_response(None, INVALID_REQUEST, "Ungültige Anfrage")
+            return await self._handle(message, allow_stream=False)
+
+        responses = [r for r in await asyncio.gather(*(run(m) for m in messages)) if r]
+        if responses:
+            await self._send(responses)
+
+    async def _handle(
+        self, message: Dict[str, Any], allow_stream: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Führt eine Anfrage aus; Notifications (ohne ``id``) liefern None."""
+        request_id = message.get("id")
+        is_notification = "id" not in message
+        try:
+            result = await self._call(
+                request_id, message.get("method"), message.get("params") or {}, allow_stream
+            )
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except asyncio.CancelledError:
+            if is_notification:
+                raise
+            response = error_response(request_id, REQUEST_CANCELLED, "Anfrage abgebrochen")
+        except RPCMethodError as e:
+            response = error_response(request_id, e.code, str(e), e.data)
+        except OverloadedError as e:
+            response = error_response(
+                request_id, OVERLOADED, str(e), {"retry_after": e.retry_after}
+            )
+        except Exception as e:
+            logger.error(f"Fehler bei JSON-RPC: {e}", exc_info=True)
+            response = error_response(request_id, SERVER_ERROR, str(e))
+        return None if is_notification else response
+
+    async def _call(
+        self, request_id: Any, method: str, params: Dict[str, Any], allow_stream: bool
+    ) -> Any:
+        """Führt eine JSON-RPC-Methode aus."""
+        if method == "initialize":
+            return {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "Ollama MCP Server", "version": __version__},
+            }
+        if method == "ping" or (method or "").startswith("notifications/"):
+            return {}
+        if method == "tools/list":
+            return {"tools": TOOLS}
+        if method == "tools/call":
+            tool_name = params.get("name")
+            arguments = params.get("arguments", {})
+            if self._check_call is not None:
+                await self._check_call(tool_name, arguments)
+            if allow_stream and params.get("stream") and self.handler.is_streaming_tool(tool_name):
+                return {"result": await self._stream_tool(request_id, tool_name, arguments)}
+            return {"result": await self.handler.handle_tool_call(tool_name, arguments)}
+        raise RPCMethodError(METHOD_NOT_FOUND, f"Unbekannte Methode: {method}")
+
+    async def _stream_tool(
+        self, request_id: Any, tool_name: str, arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Sendet Tool-Chunks als Progress-Notifications und gibt den letzten zurück."""
+        last_chunk: Dict[str, Any] = {}
+        async with aclosing(self.handler.stream_tool_call(tool_name, arguments)) as chunks:
+            async for chunk in chunks:
+                last_chunk = chunk
+                await self._send(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "notifications/progress",
+                        "params": {"id": request_id, "chunk": chunk},
+                    }
+                )
+        return last_chunk
+
+    def cancel(self, request_id: Any) -> bool:
+        """Bricht eine laufende Anfrage ab."""
+        task = self._tasks.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def drain(self) -> None:
+        """Wartet auf alle laufenden Anfragen."""
+        while self._background:
+            await asyncio.gather(*list(self._background), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Bricht alle laufenden Anfragen ab."""
+        for task in list(self._background):
+            task.cancel()
+        await self.drain()
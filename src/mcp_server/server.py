@@ -1,29 +1,44 @@
 """Haupt-MCP Server Implementierung."""
 
 import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List
+from contextlib import aclosing, suppress
+from typing import Any, AsyncGenerator, Awaitable, Dict, List, Optional, TypeVar
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.requests import HTTPConnection
 from uvicorn import run
 
 from mcp_server.client import OllamaClient
 from mcp_server.config import Config, get_config
+from mcp_server.exceptions import OverloadedError
 from mcp_server.handlers import ToolHandler
+from mcp_server.metrics import get_metrics
+from mcp_server.pool import BackendPool, create_ollama_client
+from mcp_server.rpc import RPCSession
+from mcp_server.tools.definitions import TOOLS
+from mcp_server.utils.rate_limit import TokenBucketLimiter, request_cost
 from mcp_server.utils.session import SessionManager
 
 # Logging Setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Statuscode (nginx-Konvention) für Anfragen, deren Client die Verbindung getrennt hat
+CLIENT_CLOSED_REQUEST = 499
+
 # Globale Instanzen
 config: Config = None
-ollama_client: OllamaClient = None
+ollama_client: OllamaClient | BackendPool = None
 session_manager: SessionManager = None
 tool_handler: ToolHandler = None
+rate_limiter: Optional[TokenBucketLimiter] = None
 
 
 from contextlib import asynccontextmanager
@@ -33,19 +48,30 @@ from contextlib import asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan-Context für Startup/Shutdown."""
     # Startup
-    global config, ollama_client, session_manager, tool_handler
+    global config, ollama_client, session_manager, tool_handler, rate_limiter
 
     config = get_config()
-    ollama_client = OllamaClient(config)
+    ollama_client = await create_ollama_client(config)
     session_manager = SessionManager(config)
-    tool_handler = ToolHandler(ollama_client, session_manager)
+    tool_handler = ToolHandler(ollama_client, session_manager, config)
+    await tool_handler.start()
+    if config.rate_limit_enabled:
+        rate_limiter = TokenBucketLimiter(
+            config.rate_limit_requests_per_minute,
+            burst=config.rate_limit_burst,
+            store_path=config.rate_limit_store_path,
+        )
 
     logger.info(f"MCP Server startet auf {config.mcp_host}:{config.mcp_port}")
-    logger.info(f"Ollama API: {config.ollama_base_url}")
+    logger.info(f"Ollama API: {', '.join(config.ollama_backend_urls)}")
 
     yield
 
     # Shutdown
+    if rate_limiter:
+        rate_limiter.close()
+    if tool_handler:
+        await tool_handler.close()
     if ollama_client:
         await ollama_client.close()
     logger.info("MCP Server beendet")
@@ -63,351 +89,6 @@ app.add_middleware(
 )
 
 
-# Tool-Definitionen für MCP
-TOOLS = [
-    {
-        "name": "ollama_check_health",
-        "description": "Prüft ob Ollama-Server erreichbar und funktionsfähig ist",
-        "inputSchema": {
-            "type": "object",
-            "properties": {},
-        },
-    },
-    {
-        "name": "ollama_list_models",
-        "description": "Listet alle verfügbaren Ollama-Modelle mit Details auf",
-        "inputSchema": {
-            "type": "object",
-            "properties": {},
-        },
-    },
-    {
-        "name": "ollama_show_model",
-        "description": "Zeigt detaillierte Informationen zu einem spezifischen Modell an",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-            },
-            "required": ["model"],
-        },
-    },
-    {
-        "name": "ollama_pull_model",
-        "description": "Lädt ein Modell aus dem Ollama-Registry herunter",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "insecure": {"type": "boolean", "description": "Unsichere Registry verwenden"},
-            },
-            "required": ["model"],
-        },
-    },
-    {
-        "name": "ollama_delete_model",
-        "description": "Löscht ein Modell vom lokalen System",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-            },
-            "required": ["model"],
-        },
-    },
-    {
-        "name": "ollama_copy_model",
-        "description": "Kopiert ein Modell unter neuem Namen",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "source": {"type": "string", "description": "Quell-Modellname"},
-                "destination": {"type": "string", "description": "Ziel-Modellname"},
-            },
-            "required": ["source", "destination"],
-        },
-    },
-    {
-        "name": "ollama_create_model",
-        "description": "Erstellt ein neues Modell aus einer Modelfile",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "modelfile": {"type": "string", "description": "Modelfile-Inhalt"},
-            },
-            "required": ["model", "modelfile"],
-        },
-    },
-    {
-        "name": "ollama_generate",
-        "description": "Generiert Text mit einem Ollama-Modell basierend auf einem Prompt",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "prompt": {"type": "string", "description": "Eingabe-Prompt"},
-                "system": {"type": "string", "description": "System-Prompt"},
-                "template": {"type": "string", "description": "Prompt-Template"},
-                "context": {"type": "array", "description": "Kontext-Array"},
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "prompt"],
-        },
-    },
-    {
-        "name": "ollama_generate_stream",
-        "description": "Generiert Text im Streaming-Modus (Token für Token)",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "prompt": {"type": "string", "description": "Eingabe-Prompt"},
-                "system": {"type": "string", "description": "System-Prompt"},
-                "template": {"type": "string", "description": "Prompt-Template"},
-                "context": {"type": "array", "description": "Kontext-Array"},
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "prompt"],
-        },
-    },
-    {
-        "name": "ollama_chat",
-        "description": "Führt eine Chat-Konversation mit einem Modell",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "messages": {
-                    "type": "array",
-                    "description": "Array von Chat-Nachrichten",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "role": {"type": "string", "enum": ["system", "user", "assistant"]},
-                            "content": {"type": "string"},
-                        },
-                    },
-                },
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "messages"],
-        },
-    },
-    {
-        "name": "ollama_chat_stream",
-        "description": "Führt Chat im Streaming-Modus durch",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "messages": {
-                    "type": "array",
-                    "description": "Array von Chat-Nachrichten",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "role": {"type": "string", "enum": ["system", "user", "assistant"]},
-                            "content": {"type": "string"},
-                        },
-                    },
-                },
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "messages"],
-        },
-    },
-    {
-        "name": "ollama_embeddings",
-        "description": "Generiert Embedding-Vektoren für einen gegebenen Text",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "prompt": {"type": "string", "description": "Text für Embedding"},
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "prompt"],
-        },
-    },
-    {
-        "name": "ollama_create_embeddings",
-        "description": "Erstellt Embeddings für mehrere Texte gleichzeitig",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "prompts": {"type": "array", "items": {"type": "string"}, "description": "Array von Texten"},
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "prompts"],
-        },
-    },
-    {
-        "name": "ollama_list_processes",
-        "description": "Listet alle laufenden Modell-Inferenz-Prozesse auf",
-        "inputSchema": {
-            "type": "object",
-            "properties": {},
-        },
-    },
-    {
-        "name": "ollama_check_blobs",
-        "description": "Prüft ob ein Blob (Modell-Teil) vorhanden ist",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "digest": {"type": "string", "description": "Blob-Digest"},
-            },
-            "required": ["digest"],
-        },
-    },
-    {
-        "name": "ollama_get_version",
-        "description": "Ruft die Ollama-Server-Version ab",
-        "inputSchema": {
-            "type": "object",
-            "properties": {},
-        },
-    },
-    {
-        "name": "ollama_update_model",
-        "description": "Aktualisiert ein bestehendes Modell mit neuer Modelfile",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "modelfile": {"type": "string", "description": "Neue Modelfile-Definition"},
-            },
-            "required": ["model", "modelfile"],
-        },
-    },
-    {
-        "name": "ollama_get_modelfile",
-        "description": "Ruft die Modelfile-Konfiguration eines Modells ab",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-            },
-            "required": ["model"],
-        },
-    },
-    {
-        "name": "ollama_get_models_info",
-        "description": "Ruft detaillierte Informationen über alle Modelle ab",
-        "inputSchema": {
-            "type": "object",
-            "properties": {},
-        },
-    },
-    {
-        "name": "ollama_validate_model",
-        "description": "Validiert ob ein Modell korrekt installiert und funktionsfähig ist",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-            },
-            "required": ["model"],
-        },
-    },
-    {
-        "name": "ollama_get_model_size",
-        "description": "Ruft die Speichergröße eines Modells ab",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-            },
-            "required": ["model"],
-        },
-    },
-    {
-        "name": "ollama_search_models",
-        "description": "Durchsucht verfügbare Modelle nach Namen oder Tags",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "query": {"type": "string", "description": "Suchbegriff"},
-                "remote": {"type": "boolean", "description": "Auch Remote-Registry durchsuchen"},
-            },
-            "required": ["query"],
-        },
-    },
-    {
-        "name": "ollama_save_context",
-        "description": "Speichert Chat-Kontext für spätere Verwendung",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "session_id": {"type": "string", "description": "Session-ID"},
-                "messages": {
-                    "type": "array",
-                    "description": "Chat-Messages",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "role": {"type": "string"},
-                            "content": {"type": "string"},
-                        },
-                    },
-                },
-            },
-            "required": ["session_id", "messages"],
-        },
-    },
-    {
-        "name": "ollama_load_context",
-        "description": "Lädt gespeicherten Chat-Kontext",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "session_id": {"type": "string", "description": "Session-ID"},
-            },
-            "required": ["session_id"],
-        },
-    },
-    {
-        "name": "ollama_clear_context",
-        "description": "Löscht gespeicherten Chat-Kontext",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "session_id": {"type": "string", "description": "Session-ID"},
-            },
-            "required": ["session_id"],
-        },
-    },
-    {
-        "name": "ollama_batch_generate",
-        "description": "Generiert Text für mehrere Prompts gleichzeitig",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "model": {"type": "string", "description": "Modellname"},
-                "prompts": {"type": "array", "items": {"type": "string"}, "description": "Array von Prompts"},
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["model", "prompts"],
-        },
-    },
-    {
-        "name": "ollama_compare_models",
-        "description": "Vergleicht Ausgaben verschiedener Modelle für denselben Prompt",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "models": {"type": "array", "items": {"type": "string"}, "description": "Array von Modellnamen"},
-                "prompt": {"type": "string", "description": "Vergleichs-Prompt"},
-                "options": {"type": "object", "description": "Modell-Optionen"},
-            },
-            "required": ["models", "prompt"],
-        },
-    },
-]
-
-
 @app.get("/")
 async def root():
     """Root-Endpunkt."""
@@ -428,17 +109,136 @@ async def health():
     return {"status": "unhealthy", "message": "Server nicht initialisiert"}
 
 
+@app.get("/stats")
+async def stats():
+    """Laufzeit-Statistiken der Server-Komponenten."""
+    result = tool_handler.stats() if tool_handler else {}
+    if rate_limiter:
+        result["rate_limit"] = rate_limiter.stats()
+    return result
+
+
+@app.get("/metrics")
+async def metrics():
+    """Metriken im Prometheus-Textformat."""
+    return PlainTextResponse(
+        get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _client_key(request: HTTPConnection) -> str:
+    """Identifiziert den Client über API-Key oder IP-Adresse.
+
+    Der Server authentifiziert nicht; ein API-Key zählt daher nur, wenn er in
+    ``RATE_LIMIT_API_KEYS`` steht. Sonst könnte ein Client mit jedem Request einen
+    neuen Key und damit einen frischen Bucket bekommen.
+    """
+    api_key = request.headers.get("x-api-key")
+    authorization = request.headers.get("authorization", "")
+    if not api_key and authorization.lower().startswith("bearer "):
+        api_key = authorization[7:]
+    if api_key and api_key in config.rate_limit_api_key_set:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+async def _check_rate_limit(
+    request: HTTPConnection, tool_name: str, arguments: Dict[str, Any]
+) -> None:
+    """Verbraucht das Rate-Limit-Budget des Clients für ein Tool."""
+    if rate_limiter is None:
+        return
+    cost = 1
+    if config.rate_limit_cost_mode == "weighted":
+        cost = request_cost(tool_name, arguments, config.rate_limit_cost_unit)
+    await rate_limiter.acquire(f"{_client_key(request)}:{tool_name}", cost)
+
+
 @app.post("/mcp/tools/list")
 async def list_tools():
     """Listet alle verfügbaren Tools auf."""
     return {"tools": TOOLS}
 
 
+def _wants_stream(payload: Dict[str, Any], request: Request) -> bool:
+    """Prüft ob der Client eine Streaming-Antwort angefordert hat."""
+    return bool(payload.get("stream")) or _wants_sse(request)
+
+
+def _wants_sse(request: Request) -> bool:
+    """Prüft ob der Client Server-Sent Events akzeptiert."""
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def _stream_response(
+    chunks: AsyncGenerator[Dict[str, Any], None], sse: bool
+) -> StreamingResponse:
+    """Verpackt einen Chunk-Generator als SSE- oder NDJSON-Antwort."""
+
+    async def body() -> AsyncGenerator[str, None]:
+        # Trennt der Client die Verbindung, schließt aclosing die Kette bis zu Ollama
+        async with aclosing(chunks) as source:
+            async for chunk in source:
+                line = json.dumps(chunk, ensure_ascii=False)
+                yield f"data: {line}\n\n" if sse else f"{line}\n"
+        if sse:
+            yield "event: done\ndata: {}\n\n"
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+class ClientDisconnected(Exception):
+    """Der Client hat die Verbindung vor der Antwort getrennt."""
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """Wartet, bis der Client die Verbindung trennt."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """Führt ``awaitable`` aus und bricht es ab, sobald der Client die Verbindung trennt.
+
+    Der Abbruch erreicht über den Handler den HTTP-Aufruf an Ollama; dessen
+    Verbindung wird geschlossen und Ollama beendet die Generierung.
+    """
+    task = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    if task.cancelled():
+        raise ClientDisconnected()
+    return task.result()
+
+
+def _overloaded_response(error: OverloadedError) -> JSONResponse:
+    """Antwortet mit 429 und Retry-After bei Überlastung."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(error), "retry_after": error.retry_after},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
 @app.post("/mcp/tools/call")
-async def call_tool(request: Dict[str, Any]):
-    """Führt ein Tool aus."""
-    tool_name = request.get("name")
-    arguments = request.get("arguments", {})
+async def call_tool(payload: Dict[str, Any], request: Request):
+    """Führt ein Tool aus.
+
+    Mit ``"stream": true`` im Body (NDJSON) oder ``Accept: text/event-stream`` (SSE)
+    werden die Chunks von Streaming-Tools weitergereicht, sobald sie eintreffen.
+    """
+    tool_name = payload.get("name")
+    arguments = payload.get("arguments", {})
 
     if not tool_name:
         raise HTTPException(status_code=400, detail="Tool-Name ist erforderlich")
@@ -447,8 +247,28 @@ async def call_tool(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail="Tool-Handler nicht initialisiert")
 
     try:
-        result = await tool_handler.handle_tool_call(tool_name, arguments)
+        await _check_rate_limit(request, tool_name, arguments)
+    except OverloadedError as e:
+        return _overloaded_response(e)
+
+    if _wants_stream(payload, request) and tool_handler.is_streaming_tool(tool_name):
+
+        async def chunks() -> AsyncGenerator[Dict[str, Any], None]:
+            async with aclosing(tool_handler.stream_tool_call(tool_name, arguments)) as source:
+                async for chunk in source:
+                    yield {"result": chunk}
+
+        return _stream_response(chunks(), sse=_wants_sse(request))
+
+    try:
+        result = await _cancel_on_disconnect(
+            request, tool_handler.handle_tool_call(tool_name, arguments)
+        )
         return {"result": result}
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except OverloadedError as e:
+        return _overloaded_response(e)
     except Exception as e:
         logger.error(f"Fehler bei Tool-Aufruf {tool_name}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -457,29 +277,37 @@ async def call_tool(request: Dict[str, Any]):
 # JSON-RPC 2.0 Support
 @app.post("/rpc")
 async def json_rpc(request: Request):
-    """JSON-RPC 2.0 Endpunkt."""
+    """JSON-RPC 2.0 Endpunkt (Einzel- und Batch-Anfragen)."""
     try:
         body = await request.json()
     except Exception:
         raise HTTPException(status_code=400, detail="Ungültiges JSON")
 
+    if isinstance(body, list):
+        try:
+            return await _cancel_on_disconnect(request, _rpc_batch(body, request))
+        except ClientDisconnected:
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+
     # JSON-RPC 2.0 Request
     request_id = body.get("id")
     method = body.get("method")
     params = body.get("params", {})
 
     try:
-        if method == "tools/list":
-            result = {"tools": TOOLS}
-        elif method == "tools/call":
-            tool_name = params.get("name")
-            arguments = params.get("arguments", {})
-            if not tool_handler:
-                raise HTTPException(status_code=500, detail="Tool-Handler nicht initialisiert")
-            tool_result = await tool_handler.handle_tool_call(tool_name, arguments)
-            result = {"result": tool_result}
-        else:
-            raise HTTPException(status_code=400, detail=f"Unbekannte Methode: {method}")
+        if (
+            method == "tools/call"
+            and tool_handler
+            and (params.get("stream") or _wants_sse(request))
+            and tool_handler.is_streaming_tool(params.get("name"))
+        ):
+            await _check_rate_limit(request, params["name"], params.get("arguments", {}))
+            return _stream_response(
+                _rpc_stream(request_id, params["name"], params.get("arguments", {})),
+                sse=_wants_sse(request),
+            )
+
+        result = await _cancel_on_disconnect(request, _rpc_result(request, method, params))
 
         # JSON-RPC 2.0 Response
         return {
@@ -489,16 +317,131 @@ async def json_rpc(request: Request):
         }
     except HTTPException:
         raise
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
-        logger.error(f"Fehler bei JSON-RPC: {e}", exc_info=True)
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "error": {
-                "code": -32000,
-                "message": str(e),
-            },
+        return _rpc_error(request_id, e)
+
+
+async def _rpc_result(request: Request, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Führt eine JSON-RPC-Methode aus und gibt das Ergebnis zurück."""
+    if method == "tools/list":
+        return {"tools": TOOLS}
+    if method == "tools/call":
+        tool_name = params.get("name")
+        arguments = params.get("arguments", {})
+        if not tool_handler:
+            raise HTTPException(status_code=500, detail="Tool-Handler nicht initialisiert")
+        await _check_rate_limit(request, tool_name, arguments)
+        tool_result = await tool_handler.handle_tool_call(tool_name, arguments)
+        return {"result": tool_result}
+    raise HTTPException(status_code=400, detail=f"Unbekannte Methode: {method}")
+
+
+def _rpc_error(request_id: Any, error: Exception) -> Dict[str, Any]:
+    """Baut eine JSON-RPC 2.0 Fehler-Response."""
+    if isinstance(error, OverloadedError):
+        payload = {
+            "code": -32001,
+            "message": str(error),
+            "data": {"retry_after": error.retry_after},
         }
+    elif isinstance(error, HTTPException):
+        code = -32601 if error.status_code == 400 else -32603
+        payload = {"code": code, "message": str(error.detail)}
+    else:
+        logger.error(f"Fehler bei JSON-RPC: {error}", exc_info=True)
+        payload = {"code": -32000, "message": str(error)}
+    return {"jsonrpc": "2.0", "id": request_id, "error": payload}
+
+
+async def _rpc_batch(messages: List[Any], request: Request):
+    """Führt eine JSON-RPC 2.0 Batch-Anfrage nebenläufig aus.
+
+    Responses tragen die ID ihrer Anfrage; Notifications (ohne ``id``) erzeugen
+    keinen Eintrag. Besteht der Batch nur aus Notifications, wird 204 geantwortet.
+    """
+    invalid_request = {"code": -32600, "message": "Ungültige Anfrage"}
+    if not messages:
+        return {"jsonrpc": "2.0", "id": None, "error": invalid_request}
+
+    async def run(message: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(message, dict):
+            return {"jsonrpc": "2.0", "id": None, "error": invalid_request}
+        request_id = message.get("id")
+        try:
+            result = await _rpc_result(
+                request, message.get("method"), message.get("params") or {}
+            )
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except Exception as e:
+            response = _rpc_error(request_id, e)
+        return response if "id" in message else None
+
+    responses = [r for r in await asyncio.gather(*(run(m) for m in messages)) if r is not None]
+    if not responses:
+        return Response(status_code=204)
+    return responses
+
+
+async def _rpc_stream(
+    request_id: Any, tool_name: str, arguments: Dict[str, Any]
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Liefert Streaming-Chunks als JSON-RPC Notifications, gefolgt von der Response.
+
+    Jeder Chunk wird als ``notifications/progress`` mit der Request-ID gesendet; die
+    abschließende Response enthält den letzten Chunk als Ergebnis.
+    """
+    last_chunk: Dict[str, Any] = {}
+    async with aclosing(tool_handler.stream_tool_call(tool_name, arguments)) as chunks:
+        async for chunk in chunks:
+            last_chunk = chunk
+            yield {
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {"id": request_id, "chunk": chunk},
+            }
+    yield {"jsonrpc": "2.0", "id": request_id, "result": {"result": last_chunk}}
+
+
+@app.websocket("/ws")
+async def websocket_rpc(websocket: WebSocket):
+    """JSON-RPC 2.0 über WebSocket mit vielen gleichzeitigen Tool-Aufrufen.
+
+    Jede Text-Nachricht ist eine Anfrage oder ein Batch; Anfragen laufen nebenläufig
+    und werden über ihre ID zugeordnet. Streaming-Tools senden mit ``"stream": true``
+    Chunks als ``notifications/progress``. Jeder Chunk wird erst aus Ollama gelesen,
+    wenn der vorige an den Socket übergeben ist, sodass ein langsamer Client den
+    Upstream bremst statt Speicher zu füllen. ``notifications/cancelled`` mit
+    ``requestId`` bricht einen einzelnen Aufruf ab.
+    """
+    await websocket.accept()
+    if not tool_handler:
+        await websocket.close(code=1011, reason="Tool-Handler nicht initialisiert")
+        return
+
+    send_lock = asyncio.Lock()
+
+    async def send(message: Any) -> None:
+        async with send_lock:
+            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+
+    async def check_call(tool_name: str, arguments: Dict[str, Any]) -> None:
+        await _check_rate_limit(websocket, tool_name, arguments)
+
+    session = RPCSession(
+        tool_handler,
+        send,
+        max_in_flight=config.websocket_max_in_flight if config else None,
+        check_call=check_call,
+    )
+    try:
+        while True:
+            await session.handle_text(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
 
 
 def main():
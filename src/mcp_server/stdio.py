@@ -0,0 +1,91 @@
+"""stdio-Transport für lokale MCP-Clients (JSON-RPC, eine Nachricht pro Zeile).
+
+Importiert weder FastAPI noch uvicorn, damit der Prozess schnell startet, wenn ein
+Agent-Host den Server als Subprozess aufruft. Log-Ausgaben gehen nach stderr, da
+stdout dem Protokoll vorbehalten ist.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, Awaitable, Callable
+
+from mcp_server.config import get_config
+from mcp_server.handlers import ToolHandler
+from mcp_server.pool import create_ollama_client
+from mcp_server.rpc import RPCSession
+from mcp_server.utils.session import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# Maximale Zeilenlänge einer Nachricht (große Batches/Embeddings)
+STDIO_LINE_LIMIT = 64 * 1024 * 1024
+
+
+async def run_session(
+    handler: ToolHandler,
+    reader: asyncio.StreamReader,
+    write: Callable[[bytes], Awaitable[None]],
+) -> None:
+    """Liest Nachrichten zeilenweise bis EOF und schreibt Antworten zeilenweise."""
+    write_lock = asyncio.Lock()
+
+    async def send(message: Any) -> None:
+        data = json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n"
+        async with write_lock:
+            await write(data.encode("utf-8"))
+
+    session = RPCSession(handler, send)
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if line.strip():
+            await session.handle_text(line.decode("utf-8"))
+    await session.drain()
+
+
+async def _stdio_streams() -> tuple:
+    """Verbindet stdin/stdout mit asyncio."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STDIO_LINE_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, sys.stdout
+    )
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    async def write(data: bytes) -> None:
+        writer.write(data)
+        await writer.drain()
+
+    return reader, write
+
+
+async def serve(config=None) -> None:
+    """Startet den stdio-Server und läuft bis stdin geschlossen wird."""
+    config = config or get_config()
+    ollama_client = await create_ollama_client(config)
+    handler = ToolHandler(ollama_client, SessionManager(config), config)
+    await handler.start()
+    try:
+        reader, write = await _stdio_streams()
+        await run_session(handler, reader, write)
+    finally:
+        await handler.close()
+        await ollama_client.close()
+
+
+def main() -> None:
+    """Hauptfunktion zum Starten des stdio-Servers."""
+    config = get_config()
+    logging.basicConfig(level=config.log_level.upper(), stream=sys.stderr)
+    try:
+        asyncio.run(serve(config))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+"""Tool-Definitionen für MCP."""
+
+TOOLS = [
+    {
+        "name": "ollama_check_health",
+        "description": "Prüft ob Ollama-Server erreichbar und funktionsfähig ist",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+        },
+    },
+    {
+        "name": "ollama_list_models",
+        "description": "Listet alle verfügbaren Ollama-Modelle mit Details auf",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+        },
+    },
+    {
+        "name": "ollama_show_model",
+        "description": "Zeigt detaillierte Informationen zu einem spezifischen Modell an",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+            },
+            "required": ["model"],
+        },
+    },
+    {
+        "name": "ollama_pull_model",
+        "description": "Lädt ein Modell aus dem Ollama-Registry herunter",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "insecure": {"type": "boolean", "description": "Unsichere Registry verwenden"},
+            },
+            "required": ["model"],
+        },
+    },
+    {
+        "name": "ollama_delete_model",
+        "description": "Löscht ein Modell vom lokalen System",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+            },
+            "required": ["model"],
+        },
+    },
+    {
+        "name": "ollama_copy_model",
+        "description": "Kopiert ein Modell unter neuem Namen",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "source": {"type": "string", "description": "Quell-Modellname"},
+                "destination": {"type": "string", "description": "Ziel-Modellname"},
+            },
+            "required": ["source", "destination"],
+        },
+    },
+    {
+        "name": "ollama_create_model",
+        "description": "Erstellt ein neues Modell aus einer Modelfile",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "modelfile": {"type": "string", "description": "Modelfile-Inhalt"},
+            },
+            "required": ["model", "modelfile"],
+        },
+    },
+    {
+        "name": "ollama_generate",
+        "description": "Generiert Text mit einem Ollama-Modell basierend auf einem Prompt",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "prompt": {"type": "string", "description": "Eingabe-Prompt"},
+                "system": {"type": "string", "description": "System-Prompt"},
+                "template": {"type": "string", "description": "Prompt-Template"},
+                "context": {
+                    "type": ["string", "array"],
+                    "description": "Kontext-Handle (context_handle einer früheren Antwort) "
+                    "oder Kontext-Array",
+                },
+                "include_context": {
+                    "type": "boolean",
+                    "description": "Zusätzlich zum Handle das vollständige Kontext-Array liefern",
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+            },
+            "required": ["model", "prompt"],
+        },
+    },
+    {
+        "name": "ollama_generate_stream",
+        "description": "Generiert Text im Streaming-Modus (Token für Token)",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "prompt": {"type": "string", "description": "Eingabe-Prompt"},
+                "system": {"type": "string", "description": "System-Prompt"},
+                "template": {"type": "string", "description": "Prompt-Template"},
+                "context": {
+                    "type": ["string", "array"],
+                    "description": "Kontext-Handle (context_handle einer früheren Antwort) "
+                    "oder Kontext-Array",
+                },
+                "include_context": {
+                    "type": "boolean",
+                    "description": "Zusätzlich zum Handle das vollständige Kontext-Array liefern",
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+            },
+            "required": ["model", "prompt"],
+        },
+    },
+    {
+        "name": "ollama_chat",
+        "description": "Führt eine Chat-Konversation mit einem Modell",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "messages": {
+                    "type": "array",
+                    "description": "Array von Chat-Nachrichten",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "role": {"type": "string", "enum": ["system", "user", "assistant"]},
+                            "content": {"type": "string"},
+                        },
+                    },
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+            },
+            "required": ["model", "messages"],
+        },
+    },
+    {
+        "name": "ollama_chat_stream",
+        "description": "Führt Chat im Streaming-Modus durch",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "messages": {
+                    "type": "array",
+                    "description": "Array von Chat-Nachrichten",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "role": {"type": "string", "enum": ["system", "user", "assistant"]},
+                            "content": {"type": "string"},
+                        },
+                    },
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+            },
+            "required": ["model", "messages"],
+        },
+    },
+    {
+        "name": "ollama_embeddings",
+        "description": "Generiert Embedding-Vektoren für einen gegebenen Text",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "prompt": {"type": "string", "description": "Text für Embedding"},
+                "options": {"type": "object", "description": "Modell-Optionen"},
+                "encoding": {
+                    "type": "string",
+                    "enum": ["float", "float32", "float16", "int8"],
+                    "description": "Ausgabeformat: float (JSON-Liste) oder base64 "
+                    "(float32, float16, int8 mit scale; int8 benötigt numpy)",
+                },
+            },
+            "required": ["model", "prompt"],
+        },
+    },
+    {
+        "name": "ollama_create_embeddings",
+        "description": "Erstellt Embeddings für mehrere Texte gleichzeitig",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "prompts": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Array von Texten",
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+                "batch_size": {
+                    "type": "integer",
+                    "description": "Texte pro Ollama-Anfrage (Standard: EMBED_BATCH_SIZE)",
+                },
+                "encoding": {
+                    "type": "string",
+                    "enum": ["float", "float32", "float16", "int8"],
+                    "description": "Ausgabeformat: float (JSON-Liste) oder base64 "
+                    "(float32, float16, int8 mit scale; int8 benötigt numpy)",
+                },
+            },
+            "required": ["model", "prompts"],
+        },
+    },
+    {
+        "name": "ollama_list_processes",
+        "description": "Listet alle laufenden Modell-Inferenz-Prozesse auf",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+        },
+    },
+    {
+        "name": "ollama_check_blobs",
+        "description": "Prüft ob ein Blob (Modell-Teil) vorhanden ist",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "digest": {"type": "string", "description": "Blob-Digest"},
+            },
+            "required": ["digest"],
+        },
+    },
+    {
+        "name": "ollama_get_version",
+        "description": "Ruft die Ollama-Server-Version ab",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+        },
+    },
+    {
+        "name": "ollama_update_model",
+        "description": "Aktualisiert ein bestehendes Modell mit neuer Modelfile",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "modelfile": {"type": "string", "description": "Neue Modelfile-Definition"},
+            },
+            "required": ["model", "modelfile"],
+        },
+    },
+    {
+        "name": "ollama_get_modelfile",
+        "description": "Ruft die Modelfile-Konfiguration eines Modells ab",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+            },
+            "required": ["model"],
+        },
+    },
+    {
+        "name": "ollama_get_models_info",
+        "description": "Ruft detaillierte Informationen über alle Modelle ab",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+        },
+    },
+    {
+        "name": "ollama_validate_model",
+        "description": "Validiert ob ein Modell korrekt installiert und funktionsfähig ist",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+            },
+            "required": ["model"],
+        },
+    },
+    {
+        "name": "ollama_get_model_size",
+        "description": "Ruft die Speichergröße eines Modells ab",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+            },
+            "required": ["model"],
+        },
+    },
+    {
+        "name": "ollama_search_models",
+        "description": "Durchsucht verfügbare Modelle nach Namen oder Tags",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Suchbegriff"},
+                "remote": {"type": "boolean", "description": "Auch Remote-Registry durchsuchen"},
+            },
+            "required": ["query"],
+        },
+    },
+    {
+        "name": "ollama_save_context",
+        "description": "Speichert Chat-Kontext für spätere Verwendung",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "pattern": "^[A-Za-z0-9_-]{1,128}$",
+                    "description": "Session-ID (A-Z, a-z, 0-9, '_' und '-')",
+                },
+                "messages": {
+                    "type": "array",
+                    "description": "Chat-Messages",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "role": {"type": "string"},
+                            "content": {"type": "string"},
+                        },
+                    },
+                },
+            },
+            "required": ["session_id", "messages"],
+        },
+    },
+    {
+        "name": "ollama_load_context",
+        "description": "Lädt gespeicherten Chat-Kontext",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "pattern": "^[A-Za-z0-9_-]{1,128}$",
+                    "description": "Session-ID (A-Z, a-z, 0-9, '_' und '-')",
+                },
+            },
+            "required": ["session_id"],
+        },
+    },
+    {
+        "name": "ollama_clear_context",
+        "description": "Löscht gespeicherten Chat-Kontext",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "session_id": {
+                    "type": "string",
+                    "pattern": "^[A-Za-z0-9_-]{1,128}$",
+                    "description": "Session-ID (A-Z, a-z, 0-9, '_' und '-')",
+                },
+            },
+            "required": ["session_id"],
+        },
+    },
+    {
+        "name": "ollama_batch_generate",
+        "description": "Generiert Text für mehrere Prompts gleichzeitig",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "model": {"type": "string", "description": "Modellname"},
+                "prompts": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Array von Prompts",
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+                "max_concurrency": {
+                    "type": "integer",
+                    "description": "Maximal gleichzeitige Anfragen "
+                    "(Standard: BATCH_MAX_CONCURRENCY, max. Scheduler-Slots)",
+                },
+                "include_context": {
+                    "type": "boolean",
+                    "description": "Zusätzlich zum Handle das vollständige Kontext-Array liefern",
+                },
+            },
+            "required": ["model", "prompts"],
+        },
+    },
+    {
+        "name": "ollama_compare_models",
+        "description": "Vergleicht Ausgaben verschiedener Modelle für denselben Prompt",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "models": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Array von Modellnamen",
+                },
+                "prompt": {"type": "string", "description": "Vergleichs-Prompt"},
+                "options": {"type": "object", "description": "Modell-Optionen"},
+                "max_concurrency": {
+                    "type": "integer",
+                    "description": "Maximal gleichzeitige Modelle "
+                    "(Standard: FANOUT_MAX_CONCURRENCY)",
+                },
+            },
+            "required": ["models", "prompt"],
+        },
+    },
+    {
+        "name": "ollama_create_collection",
+        "description": "Legt eine lokale Vektor-Collection für Ähnlichkeitssuche an",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Name der Collection"},
+                "model": {"type": "string", "description": "Embedding-Modell der Collection"},
+            },
+            "required": ["name", "model"],
+        },
+    },
+    {
+        "name": "ollama_upsert_texts",
+        "description": "Bettet Texte ein und speichert sie in einer Collection "
+        "(gleiche ID ersetzt)",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "collection": {"type": "string", "description": "Name der Collection"},
+                "texts": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Array von Texten",
+                },
+                "ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "IDs pro Text (Standard: Hash des Textes)",
+                },
+                "metadata": {
+                    "type": "array",
+                    "items": {"type": "object"},
+                    "description": "Metadaten pro Text",
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+            },
+            "required": ["collection", "texts"],
+        },
+    },
+    {
+        "name": "ollama_query_collection",
+        "description": "Findet die ähnlichsten Texte einer Collection (Kosinus-Ähnlichkeit)",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "collection": {"type": "string", "description": "Name der Collection"},
+                "query": {"type": "string", "description": "Suchtext"},
+                "top_k": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": "Anzahl Treffer (Standard: 5)",
+                },
+                "options": {"type": "object", "description": "Modell-Optionen"},
+            },
+            "required": ["collection", "query"],
+        },
+    },
+    {
+        "name": "ollama_list_collections",
+        "description": "Listet alle Vektor-Collections auf",
+        "inputSchema": {
+            "type": "object",
+            "properties": {},
+        },
+    },
+    {
+        "name": "ollama_delete_collection",
+        "description": "Löscht eine Vektor-Collection",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"name": {"type": "string", "description": "Name der Collection"}},
+            "required": ["name"],
+        },
+    },
+    {
+        "name": "ollama_submit_job",
+        "description": "Startet pull, create oder batch_generate als Hintergrund-Job",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "kind": {
+                    "type": "string",
+                    "enum": ["pull", "create", "batch_generate"],
+                    "description": "Job-Typ",
+                },
+                "arguments": {
+                    "type": "object",
+                    "description": "Argumente wie beim entsprechenden Tool "
+                    "(ollama_pull_model, ollama_create_model, ollama_batch_generate)",
+                },
+            },
+            "required": ["kind", "arguments"],
+        },
+    },
+    {
+        "name": "ollama_job_status",
+        "description": "Gibt Status, Fortschritt und Ergebnis eines Jobs zurück",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"job_id": {"type": "string", "description": "Job-ID"}},
+            "required": ["job_id"],
+        },
+    },
+    {
+        "name": "ollama_list_jobs",
+        "description": "Listet Hintergrund-Jobs auf",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "status": {
+                    "type": "string",
+                    "description": "Filter: queued, running, succeeded, failed, cancelled",
+                },
+            },
+        },
+    },
+    {
+        "name": "ollama_cancel_job",
+        "description": "Bricht einen wartenden oder laufenden Job ab",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"job_id": {"type": "string", "description": "Job-ID"}},
+            "required": ["job_id"],
+        },
+    },
+    {
+        "name": "ollama_watch_job",
+        "description": "Streamt den Fortschritt eines Jobs bis zu seinem Ende",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"job_id": {"type": "string", "description": "Job-ID"}},
+            "required": ["job_id"],
+        },
+    },
+]
@@ -0,0 +1,75 @@
+"""Optionale Kompression gespeicherter Daten (gzip oder zstd)."""
+
+import gzip
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard ist optional
+    zstandard = None
+
+from mcp_server.exceptions import ConfigError, MCPError
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+# Erkennung des Formats an den ersten Bytes, unabhängig von der aktuellen Konfiguration
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def is_compressed(data: bytes) -> bool:
+    """Prüft, ob Daten mit einem unterstützten Verfahren komprimiert sind."""
+    return data[:2] == GZIP_MAGIC or data[:4] == ZSTD_MAGIC
+
+
+def decompress(data: bytes) -> bytes:
+    """Entpackt gzip- oder zstd-Daten anhand ihrer Magic Bytes."""
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise MCPError("zstd-komprimierte Daten benötigen das Paket 'zstandard'")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise MCPError("Unbekanntes Kompressionsformat")
+
+
+class Compressor:
+    """Komprimiert Daten ab einer Mindestgröße.
+
+    Kleinere Daten bleiben roh, ebenso Daten, die durch Kompression nicht kleiner
+    werden; ``compress`` gibt dann ``None`` zurück.
+    """
+
+    def __init__(self, method: str = "none", threshold: int = 0, level: Optional[int] = None):
+        """Initialisiert den Kompressor."""
+        if method not in COMPRESSIONS:
+            raise ConfigError(
+                f"Unbekannte Kompression: {method} (erlaubt: {', '.join(COMPRESSIONS)})"
+            )
+        if method == "zstd" and zstandard is None:
+            raise ConfigError("Kompression 'zstd' benötigt das Paket 'zstandard'")
+        self.method = method
+        self.threshold = threshold
+        self._zstd = zstandard.ZstdCompressor(level=level or 3) if method == "zstd" else None
+        self._level = level or 6
+
+    @property
+    def enabled(self) -> bool:
+        """Gibt an, ob überhaupt komprimiert wird."""
+        return self.method != "none"
+
+    def compress(self, data: bytes, base64_encoded: bool = False) -> Optional[bytes]:
+        """Komprimiert ``data`` oder gibt ``None`` zurück, wenn es roh bleiben soll.
+
+        Mit ``base64_encoded`` wird das Ergebnis als base64 gespeichert; verglichen
+        wird dann dessen Länge (4 Zeichen je angefangene 3 Bytes).
+        """
+        if not self.enabled or len(data) < self.threshold:
+            return None
+        if self._zstd is not None:
+            packed = self._zstd.compress(data)
+        else:
+            # mtime=0: gleiche Eingabe ergibt gleiche Bytes
+            packed = gzip.compress(data, compresslevel=self._level, mtime=0)
+        stored = -(-len(packed) // 3) * 4 if base64_encoded else len(packed)
+        return packed if stored < len(data) else None
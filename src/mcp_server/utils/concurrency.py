@@ -0,0 +1,24 @@
+"""Hilfsfunktionen für nebenläufige Ausführung mit begrenzter Parallelität."""
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, TypeVar, Union
+
+T = TypeVar("T")
+
+
+async def gather_limited(
+    factories: Iterable[Callable[[], Awaitable[T]]],
+    limit: int,
+) -> List[Union[T, BaseException]]:
+    """Führt Coroutine-Fabriken mit maximal ``limit`` gleichzeitigen Aufrufen aus.
+
+    Die Ergebnisse stehen in Eingabereihenfolge. Ausnahmen einzelner Aufrufe werden
+    als Ergebnis zurückgegeben, statt die übrigen Aufrufe abzubrechen.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(*(run(f) for f in factories), return_exceptions=True)
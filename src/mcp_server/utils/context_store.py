@@ -0,0 +1,84 @@
+"""Serverseitige Ablage von Generate-Kontexten hinter kurzen Handles."""
+
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+# Präfix, an dem Handles von Token-Arrays unterschieden werden
+HANDLE_PREFIX = "ctx_"
+
+
+def is_context_handle(value: Any) -> bool:
+    """Prüft ob ein Wert ein Kontext-Handle ist."""
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+class ContextStore:
+    """LRU-Speicher für Ollama-Kontexte mit Byte-Budget.
+
+    Token-Arrays werden als ``array("i")`` (int32, bei Bedarf int64) statt als
+    Python-Listen mit ~36 Byte pro Zahl gehalten. Der Handle leitet sich aus dem
+    Inhalt ab, sodass identische Kontexte nur einmal gespeichert werden.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Initialisiert den Speicher."""
+        self.max_bytes = max_bytes
+        self._contexts: "OrderedDict[str, array]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _pack(tokens: Sequence[int]) -> array:
+        """Packt Token-IDs in ein kompaktes Array."""
+        packed = array("i")
+        try:
+            packed.fromlist(list(tokens))
+        except OverflowError:
+            packed = array("q", tokens)
+        return packed
+
+    def put(self, tokens: Sequence[int]) -> Optional[str]:
+        """Legt einen Kontext ab und gibt seinen Handle zurück (None wenn leer)."""
+        if not tokens:
+            return None
+        packed = self._pack(tokens)
+        handle = HANDLE_PREFIX + hashlib.sha256(packed.tobytes()).hexdigest()[:24]
+        size = len(packed) * packed.itemsize
+        if handle in self._contexts:
+            self._contexts.move_to_end(handle)
+            return handle
+        if size > self.max_bytes:
+            return None
+
+        self._contexts[handle] = packed
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._contexts.popitem(last=False)
+            self._bytes -= len(evicted) * evicted.itemsize
+            self.evictions += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[List[int]]:
+        """Gibt die Token-IDs eines Handles zurück oder None, wenn er unbekannt ist."""
+        packed = self._contexts.get(handle)
+        if packed is None:
+            self.misses += 1
+            return None
+        self._contexts.move_to_end(handle)
+        self.hits += 1
+        return packed.tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Belegung und Trefferzähler zurück."""
+        return {
+            "entries": len(self._contexts),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
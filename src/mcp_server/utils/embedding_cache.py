@@ -0,0 +1,154 @@
+"""Inhaltsadressierter Cache für Embeddings (LRU im Speicher + SQLite auf Disk)."""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class EmbeddingCache:
+    """Zweistufiger Embedding-Cache.
+
+    Schlüssel werden aus Endpunkt, Modell-Digest, Optionen und Text-Hash gebildet.
+    Der Endpunkt gehört dazu, weil ``/api/embed`` normierte und ``/api/embeddings``
+    rohe Vektoren liefert. Wird ein Modell neu gepullt, ändert sich der Digest und
+    alte Einträge werden nicht mehr getroffen. Vektoren werden kompakt als float32
+    gehalten.
+    """
+
+    def __init__(self, max_bytes: int, path: Optional[Path] = None):
+        """Initialisiert den Cache."""
+        self.max_bytes = max_bytes
+        self.path = Path(path) if path else None
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._memory_bytes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(
+        endpoint: str, digest: str, options: Optional[Dict[str, Any]], text: str
+    ) -> str:
+        """Bildet den Cache-Schlüssel aus Endpunkt, Modell-Digest, Optionen und Text."""
+        options_json = json.dumps(options or {}, sort_keys=True, separators=(",", ":"))
+        options_hash = hashlib.sha256(options_json.encode()).hexdigest()[:16]
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{endpoint}:{digest}:{options_hash}:{text_hash}"
+
+    def _remember(self, key: str, vector: array) -> None:
+        """Legt einen Vektor im LRU-Speicher ab und verdrängt alte Einträge."""
+        size = len(vector) * vector.itemsize
+        if size > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous) * previous.itemsize
+        self._memory[key] = vector
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted) * evicted.itemsize
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, array]:
+        """Liest Vektoren aus SQLite (blockierend)."""
+        found: Dict[str, array] = {}
+        with self._db_lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+        return found
+
+    def _store_on_disk(self, items: Dict[str, array]) -> None:
+        """Schreibt Vektoren nach SQLite (blockierend)."""
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in items.items()],
+            )
+            self._db.commit()
+
+    async def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Liefert gecachte Vektoren in Schlüsselreihenfolge (None bei Miss)."""
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+        for index, key in enumerate(keys):
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                results[index] = vector.tolist()
+            else:
+                missing.setdefault(key, []).append(index)
+
+        if missing and self._db is not None:
+            found = await asyncio.to_thread(self._load_from_disk, list(missing))
+            for key, vector in found.items():
+                self._remember(key, vector)
+                for index in missing.pop(key):
+                    self.hits += 1
+                    self.disk_hits += 1
+                    results[index] = vector.tolist()
+
+        self.misses += sum(len(indices) for indices in missing.values())
+        return results
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        """Liefert einen gecachten Vektor oder None."""
+        return (await self.get_many([key]))[0]
+
+    async def put_many(self, items: Dict[str, List[float]]) -> None:
+        """Speichert Vektoren in beiden Cache-Stufen."""
+        packed = {key: array("f", vector) for key, vector in items.items()}
+        for key, vector in packed.items():
+            self._remember(key, vector)
+        if packed and self._db is not None:
+            await asyncio.to_thread(self._store_on_disk, packed)
+
+    async def put(self, key: str, vector: List[float]) -> None:
+        """Speichert einen Vektor."""
+        await self.put_many({key: vector})
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Trefferzähler und Speicherbelegung zurück."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "max_bytes": self.max_bytes,
+            "persistent": self._db is not None,
+        }
+
+    def close(self) -> None:
+        """Schließt die SQLite-Verbindung."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
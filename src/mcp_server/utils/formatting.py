@@ -2,6 +2,8 @@
 
 from typing import Any, Dict
 
+from mcp_server.utils.vector_codec import encode_vector
+
 
 def format_model_list(response: Dict[str, Any]) -> Dict[str, Any]:
     """Formatiert die Modell-Liste."""
@@ -49,17 +51,19 @@ def format_chat_response(response: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def format_embedding_response(response: Dict[str, Any]) -> Dict[str, Any]:
-    """Formatiert eine Embedding-Response."""
-    return {
-        "embedding": response.get("embedding", []),
-    }
+def format_embedding_response(response: Dict[str, Any], encoding: str = "float") -> Dict[str, Any]:
+    """Formatiert eine Embedding-Response (optional base64-kodiert, siehe vector_codec)."""
+    return encode_vector(response.get("embedding", []), encoding)
 
 
 def format_error(error: Exception) -> Dict[str, Any]:
     """Formatiert einen Fehler."""
-    return {
+    result = {
         "error": str(error),
         "error_type": type(error).__name__,
     }
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        result["retry_after"] = retry_after
+    return result
 
@@ -0,0 +1,268 @@
+"""Hintergrund-Jobs für lang laufende Operationen (Pull, Create, Batch)."""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+from mcp_server.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+# Fortschritt wird höchstens so oft (Sekunden) auf die Platte geschrieben
+PROGRESS_PERSIST_INTERVAL = 1.0
+
+Report = Callable[[Dict[str, Any]], None]
+Runner = Callable[[Dict[str, Any], Report], Awaitable[Any]]
+
+
+class JobManager:
+    """Führt Jobs mit begrenzter Parallelität aus und persistiert ihren Zustand.
+
+    Jeder Job liegt als JSON-Datei im Store-Verzeichnis. Geschrieben wird in einem
+    Thread pro Job nacheinander; liegen mehrere Stände an, wird nur der neueste
+    geschrieben. Beim Start werden unterbrochene Jobs (``queued``/``running``)
+    erneut eingereiht; Ollama setzt abgebrochene Pulls dabei an den bereits
+    geladenen Blobs fort.
+    """
+
+    def __init__(
+        self,
+        store_path: Path,
+        runners: Dict[str, Runner],
+        max_workers: int = 2,
+        max_history: int = 200,
+    ):
+        """Initialisiert den Job-Manager."""
+        self.store_path = Path(store_path)
+        self.runners = runners
+        self.max_workers = max(1, max_workers)
+        self.max_history = max_history
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._persisted_at: Dict[str, float] = {}
+        # Noch zu schreibender Stand pro Job (None = Datei löschen) und laufende Writer
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
+        self._workers: Optional[asyncio.Semaphore] = None
+        self._closing = False
+        self._load()
+
+    def _load(self) -> None:
+        """Liest gespeicherte Jobs ein."""
+        if not self.store_path.exists():
+            return
+        for path in self.store_path.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = json.load(f)
+                self._jobs[job["id"]] = job
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Job-Datei {path} nicht lesbar: {e}")
+
+    def _write_file(self, job_id: str, job: Optional[Dict[str, Any]]) -> None:
+        """Schreibt den Zustand eines Jobs atomar oder löscht seine Datei (blockiert)."""
+        path = self.store_path / f"{job_id}.json"
+        if job is None:
+            path.unlink(missing_ok=True)
+            return
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _schedule_write(self, job_id: str, job: Optional[Dict[str, Any]]) -> None:
+        """Merkt einen Stand zum Schreiben vor und startet bei Bedarf den Writer."""
+        self._pending[job_id] = job
+        if job_id not in self._writers:
+            task = asyncio.ensure_future(self._write_pending(job_id))
+            self._writers[job_id] = task
+            task.add_done_callback(lambda _: self._writers.pop(job_id, None))
+
+    async def _write_pending(self, job_id: str) -> None:
+        """Schreibt vorgemerkte Stände eines Jobs, bis keiner mehr ansteht."""
+        while job_id in self._pending:
+            job = self._pending.pop(job_id)
+            try:
+                await asyncio.to_thread(self._write_file, job_id, job)
+            except OSError as e:
+                logger.warning(f"Job {job_id} konnte nicht gespeichert werden: {e}")
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        """Speichert den Zustand eines Jobs im Hintergrund."""
+        # Flache Kopie: Änderungen ersetzen nur Top-Level-Werte (siehe _update)
+        self._schedule_write(job["id"], dict(job))
+        self._persisted_at[job["id"]] = time.monotonic()
+
+    async def flush(self) -> None:
+        """Wartet, bis alle vorgemerkten Stände geschrieben sind."""
+        while self._writers:
+            await asyncio.gather(*list(self._writers.values()), return_exceptions=True)
+
+    def _notify(self, job_id: str) -> None:
+        """Weckt alle Beobachter eines Jobs."""
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _update(self, job: Dict[str, Any], persist: bool = True, **changes: Any) -> None:
+        """Ändert einen Job, speichert ihn und benachrichtigt Beobachter."""
+        job.update(changes)
+        job["updated_at"] = time.time()
+        if persist:
+            self._persist(job)
+        self._notify(job["id"])
+
+    def _prune(self) -> None:
+        """Entfernt die ältesten abgeschlossenen Jobs über ``max_history``."""
+        finished = sorted(
+            (job for job in self._jobs.values() if job["status"] in FINISHED_STATES),
+            key=lambda job: job.get("finished_at") or 0,
+        )
+        for job in finished[: max(0, len(finished) - self.max_history)]:
+            del self._jobs[job["id"]]
+            self._persisted_at.pop(job["id"], None)
+            self._schedule_write(job["id"], None)
+
+    def _start(self, job: Dict[str, Any]) -> None:
+        """Startet die Ausführung eines eingereihten Jobs."""
+        if self._workers is None:
+            self._workers = asyncio.Semaphore(self.max_workers)
+        task = asyncio.ensure_future(self._run(job))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["id"], None))
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """Führt einen Job aus, sobald ein Worker frei ist."""
+        runner = self.runners[job["kind"]]
+
+        def report(progress: Dict[str, Any]) -> None:
+            due = (
+                time.monotonic() - self._persisted_at.get(job["id"], 0)
+                >= PROGRESS_PERSIST_INTERVAL
+            )
+            self._update(job, persist=due, progress=progress)
+
+        try:
+            async with self._workers:
+                self._update(job, status=JOB_RUNNING, started_at=time.time())
+                result = await runner(job["arguments"], report)
+        except asyncio.CancelledError:
+            if self._closing:
+                # Shutdown: als wartend speichern, damit resume() ihn wieder aufnimmt
+                self._update(job, status=JOB_QUEUED)
+            else:
+                self._update(job, status=JOB_CANCELLED, finished_at=time.time())
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']}) fehlgeschlagen: {e}")
+            self._update(job, status=JOB_FAILED, error=str(e), finished_at=time.time())
+        else:
+            failed = isinstance(result, dict) and result.get("status") == "error"
+            self._update(
+                job,
+                status=JOB_FAILED if failed else JOB_SUCCEEDED,
+                result=result,
+                error=result.get("error") if failed else None,
+                finished_at=time.time(),
+            )
+        finally:
+            self._prune()
+
+    def resume(self) -> int:
+        """Reiht nach einem Neustart unterbrochene Jobs erneut ein."""
+        resumed = 0
+        for job in self._jobs.values():
+            if job["status"] in (JOB_QUEUED, JOB_RUNNING) and job["id"] not in self._tasks:
+                job["restarts"] = job.get("restarts", 0) + 1
+                self._update(job, status=JOB_QUEUED)
+                self._start(job)
+                resumed += 1
+        return resumed
+
+    def submit(self, kind: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Legt einen Job an und reiht ihn ein."""
+        if kind not in self.runners:
+            raise ValidationError(
+                f"Unbekannter Job-Typ: {kind} (erlaubt: {', '.join(sorted(self.runners))})"
+            )
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "arguments": arguments,
+            "status": JOB_QUEUED,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._jobs[job["id"]] = job
+        self._persist(job)
+        self._start(job)
+        return job
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Gibt einen Job zurück."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise ValidationError(f"Job nicht gefunden: {job_id}")
+        return job
+
+    def list(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Listet Jobs (neueste zuerst), optional gefiltert nach Status."""
+        jobs = [job for job in self._jobs.values() if status is None or job["status"] == status]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Bricht einen laufenden oder wartenden Job ab."""
+        job = self.get(job_id)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        elif job["status"] not in FINISHED_STATES:
+            self._update(job, status=JOB_CANCELLED, finished_at=time.time())
+        return job
+
+    async def watch(self, job_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Liefert den Job bei jeder Änderung, bis er abgeschlossen ist."""
+        job = self.get(job_id)
+        while True:
+            event = self._changed.setdefault(job_id, asyncio.Event())
+            yield dict(job)
+            if job["status"] in FINISHED_STATES:
+                return
+            await event.wait()
+
+    async def close(self) -> None:
+        """Hält laufende Jobs an; sie werden beim nächsten Start fortgesetzt."""
+        self._closing = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt die Anzahl Jobs pro Status zurück."""
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"max_workers": self.max_workers, "jobs": counts}
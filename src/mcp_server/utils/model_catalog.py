@@ -0,0 +1,92 @@
+"""Zwischengespeicherter Modellkatalog (/api/tags und /api/show)."""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class ModelCatalog:
+    """Cacht Modell-Liste und Modell-Details mit TTL.
+
+    Gleichzeitige Abfragen nach einem abgelaufenen Eintrag lösen nur eine
+    Ollama-Anfrage aus. Nach Änderungen an Modellen (pull, delete, copy, create)
+    muss ``invalidate`` aufgerufen werden. Eine Abfrage, die vor ``invalidate``
+    begonnen hat, speichert ihr (möglicherweise veraltetes) Ergebnis nicht mehr.
+    """
+
+    def __init__(self, client, ttl: float):
+        """Initialisiert den Katalog."""
+        self.client = client
+        self.ttl = ttl
+        self._tags: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._details: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._tags_lock = asyncio.Lock()
+        self._detail_locks: Dict[str, asyncio.Lock] = {}
+        # Wird von invalidate() erhöht; ältere Abfragen speichern nicht mehr
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, entry: Optional[Tuple[float, Dict[str, Any]]]) -> bool:
+        """Prüft ob ein Eintrag noch innerhalb der TTL liegt."""
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    async def list_models(self) -> Dict[str, Any]:
+        """Gibt die Antwort von /api/tags zurück (gecacht)."""
+        if self._fresh(self._tags):
+            self.hits += 1
+            return self._tags[1]
+        async with self._tags_lock:
+            if self._fresh(self._tags):
+                self.hits += 1
+                return self._tags[1]
+            self.misses += 1
+            generation = self._generation
+            response = await self.client.list_models()
+            if generation == self._generation:
+                self._tags = (time.monotonic(), response)
+            return response
+
+    async def show_model(self, model: str) -> Dict[str, Any]:
+        """Gibt die Antwort von /api/show für ein Modell zurück (gecacht)."""
+        entry = self._details.get(model)
+        if self._fresh(entry):
+            self.hits += 1
+            return entry[1]
+        lock = self._detail_locks.setdefault(model, asyncio.Lock())
+        async with lock:
+            entry = self._details.get(model)
+            if self._fresh(entry):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+            response = await self.client.show_model(model)
+            if generation == self._generation:
+                self._details[model] = (time.monotonic(), response)
+            return response
+
+    async def get_model(self, model: str) -> Optional[Dict[str, Any]]:
+        """Sucht ein installiertes Modell; ohne Tag wird ``:latest`` angenommen."""
+        response = await self.list_models()
+        for model_data in response.get("models", []):
+            name = model_data.get("name", "")
+            if name == model or name == f"{model}:latest":
+                return model_data
+        return None
+
+    def invalidate(self) -> None:
+        """Verwirft alle gecachten Einträge."""
+        self._generation += 1
+        self._tags = None
+        self._details.clear()
+        self._detail_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Trefferzähler zurück."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_details": len(self._details),
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,157 @@
+"""Token-Bucket Rate Limiting pro Client und Tool."""
+
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from mcp_server.exceptions import RateLimitError
+
+# Tools, deren Kosten im gewichteten Modus von der Generierungslänge abhängen
+GENERATION_TOOLS = {
+    "ollama_generate",
+    "ollama_generate_stream",
+    "ollama_chat",
+    "ollama_chat_stream",
+    "ollama_batch_generate",
+    "ollama_compare_models",
+}
+
+# Grobe Schätzung: Zeichen pro Token bei fehlendem num_predict
+CHARS_PER_TOKEN = 4
+
+
+def request_cost(tool_name: str, arguments: Dict[str, Any], cost_unit: int) -> int:
+    """Berechnet die Kosten eines Tool-Aufrufs in Bucket-Tokens.
+
+    Generierungs-Tools kosten eine Einheit je ``cost_unit`` angeforderter Tokens
+    (``options.num_predict``, sonst geschätzt aus der Prompt-Länge), mindestens 1.
+    """
+    if tool_name not in GENERATION_TOOLS:
+        return 1
+
+    if tool_name == "ollama_batch_generate":
+        texts = [str(prompt) for prompt in arguments.get("prompts") or []]
+    elif "messages" in arguments:
+        texts = ["".join(str(m.get("content", "")) for m in arguments.get("messages") or [])]
+    else:
+        texts = [str(arguments.get("prompt", ""))]
+    repeats = len(arguments.get("models") or []) if tool_name == "ollama_compare_models" else 1
+
+    num_predict = (arguments.get("options") or {}).get("num_predict")
+    if isinstance(num_predict, int) and num_predict > 0:
+        tokens = num_predict * len(texts)
+    else:
+        tokens = sum(len(text) for text in texts) // CHARS_PER_TOKEN
+    return max(1, math.ceil(tokens * max(1, repeats) / max(1, cost_unit)))
+
+
+class TokenBucketLimiter:
+    """Token-Bucket pro Schlüssel mit O(1)-Prüfung.
+
+    Ohne ``store_path`` liegen die Buckets im Prozessspeicher. Mit ``store_path``
+    werden sie in einer gemeinsamen SQLite-Datei gehalten, sodass mehrere
+    Worker-Prozesse auf demselben Host dieselben Limits teilen.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        burst: Optional[int] = None,
+        store_path: Optional[Path] = None,
+        max_keys: int = 100_000,
+    ):
+        """Initialisiert den Limiter."""
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or requests_per_minute)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.rejected = 0
+
+        if store_path is not None:
+            Path(store_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(store_path), timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _take(self, tokens: float, updated: float, now: float, cost: float) -> Tuple[float, float]:
+        """Füllt einen Bucket auf und gibt (neue Tokens, Wartezeit) zurück."""
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= cost:
+            return tokens - cost, 0.0
+        return tokens, (cost - tokens) / self.rate if self.rate else math.inf
+
+    def _acquire_memory(self, key: str, cost: float) -> float:
+        """Prüft einen Bucket im Prozessspeicher."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        tokens, wait = self._take(tokens, updated, now, cost)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def _acquire_shared(self, key: str, cost: float) -> float:
+        """Prüft einen Bucket im gemeinsamen SQLite-Store (blockierend)."""
+        now = time.time()
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (self.capacity, now)
+                tokens, wait = self._take(tokens, updated, now, cost)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self, key: str, cost: int = 1) -> None:
+        """Verbraucht ``cost`` Tokens oder wirft ``RateLimitError``."""
+        # Teurer als ein voller Bucket: höchstens den ganzen Bucket verlangen
+        cost = min(cost, self.capacity)
+        if self._db is None:
+            wait = self._acquire_memory(key, cost)
+        else:
+            wait = await asyncio.to_thread(self._acquire_shared, key, cost)
+        if wait > 0:
+            self.rejected += 1
+            retry_after = max(1, math.ceil(wait)) if math.isfinite(wait) else 60
+            raise RateLimitError(
+                f"Rate Limit überschritten, bitte in {retry_after}s erneut versuchen",
+                retry_after=retry_after,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Kennzahlen des Limiters zurück."""
+        return {
+            "requests_per_minute": round(self.rate * 60, 2),
+            "burst": self.capacity,
+            "tracked_keys": len(self._buckets),
+            "rejected": self.rejected,
+            "shared_store": self._db is not None,
+        }
+
+    def close(self) -> None:
+        """Schließt den gemeinsamen Store."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -0,0 +1,115 @@
+"""Admission Control mit Prioritätswarteschlange pro Modell."""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from mcp_server.exceptions import OverloadedError
+
+# Prioritätsklassen (kleiner = wird zuerst bedient)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_ADMIN = 1
+PRIORITY_BATCH = 2
+
+
+class _ModelQueue:
+    """Slots und Warteschlange eines Modells."""
+
+    def __init__(self):
+        self.active = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.avg_service_time = 1.0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        """Anzahl wartender (nicht abgebrochener) Anfragen."""
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+
+class AdmissionScheduler:
+    """Begrenzt gleichzeitige Ollama-Anfragen pro Modell.
+
+    Überzählige Anfragen warten in einer begrenzten Warteschlange und werden nach
+    Prioritätsklasse bedient. Ist die Warteschlange voll, wird sofort mit
+    ``OverloadedError`` (inkl. geschätztem ``retry_after``) abgelehnt.
+    """
+
+    def __init__(self, max_concurrency_per_model: int, max_queue: int):
+        """Initialisiert den Scheduler."""
+        self.max_concurrency = max(1, max_concurrency_per_model)
+        self.max_queue = max(0, max_queue)
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._sequence = itertools.count()
+
+    def _retry_after(self, queue: _ModelQueue) -> int:
+        """Schätzt die Wartezeit in Sekunden bis wieder Kapazität frei ist."""
+        backlog = queue.queued + 1
+        return max(1, math.ceil(queue.avg_service_time * backlog / self.max_concurrency))
+
+    async def _acquire(self, model: str, priority: int) -> _ModelQueue:
+        """Belegt einen Slot oder reiht die Anfrage ein."""
+        queue = self._queues.setdefault(model, _ModelQueue())
+        if queue.active < self.max_concurrency and queue.queued == 0:
+            queue.active += 1
+            return queue
+
+        if queue.queued >= self.max_queue:
+            queue.rejected += 1
+            retry_after = self._retry_after(queue)
+            raise OverloadedError(
+                f"Modell {model} ausgelastet, bitte in {retry_after}s erneut versuchen",
+                retry_after=retry_after,
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot wurde bereits übergeben: an den Nächsten weiterreichen
+                self._release(queue)
+            raise
+        return queue
+
+    def _release(self, queue: _ModelQueue) -> None:
+        """Gibt einen Slot frei oder übergibt ihn an den wichtigsten Wartenden."""
+        while queue.waiters:
+            _, _, future = heapq.heappop(queue.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        queue.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[None]:
+        """Hält einen Ausführungs-Slot für ein Modell, solange der Block läuft."""
+        queue = await self._acquire(model, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            queue.avg_service_time = 0.8 * queue.avg_service_time + 0.2 * elapsed
+            self._release(queue)
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Auslastung und Ablehnungen pro Modell zurück."""
+        return {
+            "max_concurrency_per_model": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "models": {
+                model: {
+                    "active": queue.active,
+                    "queued": queue.queued,
+                    "rejected": queue.rejected,
+                    "avg_service_time_s": round(queue.avg_service_time, 3),
+                }
+                for model, queue in self._queues.items()
+            },
+        }
@@ -1,76 +1,402 @@
 """Session-Management für Kontext-Speicherung."""
 
-import json
+import asyncio
+import heapq
+import logging
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp_server.config import get_config
 from mcp_server.exceptions import MCPError
+from mcp_server.utils.session_backends import create_session_backend
+
+logger = logging.getLogger(__name__)
 
 
 class SessionManager:
-    """Verwaltet Sessions für Chat-Kontext."""
+    """Verwaltet Sessions für Chat-Kontext.
+
+    Gespeichert wird über ein austauschbares Backend (``session_backend``: ``file``
+    mit einem Append-only-Log pro Session oder ``sqlite``). ``save_context`` schreibt
+    einen ``reset``-Eintrag mit dem ganzen Verlauf, ``update_context`` einen
+    ``append``-Eintrag mit einer Nachricht; beim Datei-Backend werden Logs ab
+    ``session_compact_records`` Einträgen zu einem einzelnen ``reset`` verdichtet.
+
+    Alle Backend-Zugriffe laufen über ``asyncio.to_thread``. Änderungen landen
+    zuerst in einem Write-Behind-Puffer und werden von einem Hintergrund-Task
+    gesammelt (alle ``session_flush_interval`` Sekunden) geschrieben; ``close()``
+    schreibt ausstehende Änderungen.
+
+    ``updated_at`` aller bekannten Sessions steht in einem Index mit Min-Heap
+    ``(updated_at, id)``; ``start()`` füllt ihn einmalig aus dem Backend. Die
+    TTL-Prüfung braucht damit keinen Backend-Zugriff, und der Sweeper löscht
+    abgelaufene Sessions alle ``session_sweep_interval`` Sekunden in Batches von
+    ``session_sweep_batch``. Veraltete Heap-Einträge (Session inzwischen
+    geändert) werden beim Entnehmen übersprungen.
+    """
 
     def __init__(self, config=None):
         """Initialisiert den Session Manager."""
         self.config = config or get_config()
         self.storage_path = Path(self.config.session_storage_path)
         self.ttl = self.config.session_ttl
-        self.storage_path.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = self.config.session_flush_interval
+        self.cache_size = self.config.session_cache_size
+        self.compact_records = self.config.session_compact_records
+        self.backend = create_session_backend(self.config)
+        # Vollständig geladene Sessions (LRU)
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Noch nicht geschriebene Einträge pro Session
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        # Bekannte Anzahl gespeicherter Einträge pro Session (für die Verdichtung)
+        self._records: Dict[str, int] = {}
+        self._io_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+        self.flushes = 0
+        self.written = 0
+        self.compactions = 0
+        self.sweep_interval = self.config.session_sweep_interval
+        self.sweep_batch = max(1, self.config.session_sweep_batch)
+        # Ablauf-Index: aktuelles updated_at pro Session und Min-Heap darüber
+        self._updated_at: Dict[str, float] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._sweep_task: Optional[asyncio.Task] = None
+        self.swept = 0
+
+    # Write-Behind-Puffer
+
+    def _lock(self) -> asyncio.Lock:
+        """Gibt den I/O-Lock zurück (wird im laufenden Loop angelegt)."""
+        if self._io_lock is None:
+            self._io_lock = asyncio.Lock()
+        return self._io_lock
+
+    def _remember(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        """Legt eine Session im Cache ab und verdrängt alte, bereits geschriebene."""
+        self._cache[session_id] = session_data
+        self._cache.move_to_end(session_id)
+        excess = len(self._cache) - self.cache_size
+        for cached_id in list(self._cache):
+            if excess <= 0:
+                break
+            if cached_id not in self._pending:
+                del self._cache[cached_id]
+                excess -= 1
+
+    def _touch(self, session_id: str, updated_at: float) -> None:
+        """Trägt ``updated_at`` einer Session in den Ablauf-Index ein."""
+        self._updated_at[session_id] = updated_at
+        heapq.heappush(self._expiry, (updated_at, session_id))
+        # Veraltete Einträge begrenzen: Heap aus dem aktuellen Stand neu aufbauen
+        if len(self._expiry) > 2 * len(self._updated_at) + 1024:
+            self._expiry = [(t, sid) for sid, t in self._updated_at.items()]
+            heapq.heapify(self._expiry)
+
+    def _forget(self, session_id: str) -> None:
+        """Entfernt eine Session aus Cache, Puffer und Ablauf-Index."""
+        self._cache.pop(session_id, None)
+        self._pending.pop(session_id, None)
+        self._records.pop(session_id, None)
+        self._updated_at.pop(session_id, None)
+
+    def _is_expired(self, updated_at: float) -> bool:
+        """Prüft die TTL."""
+        return time.time() - updated_at > self.ttl
+
+    def _record(self, session_id: str, record: Dict[str, Any]) -> None:
+        """Merkt einen Log-Eintrag zum Schreiben vor."""
+        self._touch(session_id, record["t"])
+        if record["op"] == "reset":
+            # Ein reset macht alle vorherigen ausstehenden Einträge überflüssig
+            self._pending[session_id] = [record]
+            self._records[session_id] = 1
+        else:
+            self._pending.setdefault(session_id, []).append(record)
+            self._records[session_id] = self._records.get(session_id, 0) + 1
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Startet den Flush-Task, falls er noch nicht läuft."""
+        if self._flush_requested is None:
+            self._flush_requested = asyncio.Event()
+        self._flush_requested.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        """Sammelt Änderungen und schreibt sie periodisch."""
+        while True:
+            await self._flush_requested.wait()
+            await asyncio.sleep(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Einträge bleiben vorgemerkt und werden beim nächsten Lauf erneut versucht
+                logger.error(f"Fehler beim Schreiben der Sessions: {e}")
+                self._flush_requested.set()
+
+    def _compact(self, session_id: str) -> None:
+        """Ersetzt ausstehende Einträge durch einen reset, wenn das Log zu lang wird."""
+        session_data = self._cache.get(session_id)
+        if (
+            not self.backend.compacts
+            or session_data is None
+            or self._records.get(session_id, 0) <= self.compact_records
+        ):
+            return
+        self._pending[session_id] = [
+            {"t": session_data["updated_at"], "op": "reset",
+             "messages": list(session_data["messages"])}
+        ]
+        self._records[session_id] = 1
+        self.compactions += 1
+
+    async def flush(self) -> int:
+        """Schreibt alle ausstehenden Einträge; gibt die Anzahl Sessions zurück."""
+        async with self._lock():
+            if not self._pending:
+                return 0
+            for session_id in list(self._pending):
+                self._compact(session_id)
+            pending, self._pending = self._pending, {}
+            batch = {
+                session_id: (self._created_at(session_id, records), records)
+                for session_id, records in pending.items()
+            }
+            write = asyncio.ensure_future(asyncio.to_thread(self.backend.write, batch))
+            cancelled = False
+            while not write.done():
+                try:
+                    # wait() bricht den Schreib-Thread bei einem Abbruch nicht ab
+                    await asyncio.wait({write})
+                except asyncio.CancelledError:
+                    # Erst nach Ende des Threads steht fest, ob geschrieben wurde; sonst
+                    # würden Einträge erneut vorgemerkt und doppelt angehängt
+                    cancelled = True
+            error = write.exception()
+            if error is not None:
+                for session_id, records in pending.items():
+                    self._pending[session_id] = records + self._pending.get(session_id, [])
+            if cancelled:
+                raise asyncio.CancelledError()
+            if error is not None:
+                raise error
+            self.flushes += 1
+            self.written += len(batch)
+            return len(batch)
+
+    def _created_at(self, session_id: str, records: List[Dict[str, Any]]) -> float:
+        """Ermittelt ``created_at`` für eine neu geschriebene Session."""
+        session_data = self._cache.get(session_id)
+        if session_data is not None:
+            return session_data["created_at"]
+        return records[0]["t"]
+
+    async def _existing_created_at(self, session_id: str) -> Optional[float]:
+        """Ermittelt ``created_at`` einer bestehenden Session, ohne den Verlauf zu laden."""
+        session_data = self._cache.get(session_id)
+        if session_data is not None:
+            return session_data["created_at"]
+        async with self._lock():
+            timestamps = await asyncio.to_thread(self.backend.read_timestamps, session_id)
+        if timestamps is not None:
+            return timestamps[0]
+        # Unbekannt oder altes Dateiformat: nur dann wird der Verlauf gelesen
+        existing = await self._get(session_id)
+        return existing["created_at"] if existing else None
+
+    async def _get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Gibt eine Session aus Cache oder Backend zurück (inkl. ausstehender Einträge)."""
+        session_data = self._cache.get(session_id)
+        if session_data is not None:
+            self._cache.move_to_end(session_id)
+            return session_data
+        async with self._lock():
+            loaded = await asyncio.to_thread(self.backend.read, session_id)
+        if session_id in self._cache:
+            return self._cache[session_id]
+        if loaded is None and session_id not in self._pending:
+            return None
+
+        session_data, records = loaded or (
+            {"session_id": session_id, "messages": [], "created_at": 0, "updated_at": 0},
+            0,
+        )
+        # Noch nicht geschriebene Anhänge einspielen
+        for record in self._pending.get(session_id, []):
+            session_data["messages"].append(record["message"])
+            session_data["updated_at"] = record["t"]
+        self._records[session_id] = records + len(self._pending.get(session_id, []))
+        self._remember(session_id, session_data)
+        if session_id not in self._updated_at:
+            self._touch(session_id, session_data["updated_at"])
+        return session_data
+
+    # Ablauf
+
+    async def start(self) -> None:
+        """Füllt den Ablauf-Index aus dem Backend und startet den Sweeper."""
+        async with self._lock():
+            expiry = await asyncio.to_thread(self.backend.list_expiry)
+        for updated_at, session_id in expiry:
+            # Seit dem Start bereits geänderte Sessions behalten ihren neueren Stand
+            if session_id not in self._updated_at:
+                self._updated_at[session_id] = updated_at
+        self._expiry = [(t, sid) for sid, t in self._updated_at.items()]
+        heapq.heapify(self._expiry)
+        if self._sweep_task is None and self.sweep_interval > 0:
+            self._sweep_task = asyncio.ensure_future(self._sweep_loop())
+
+    async def _sweep_loop(self) -> None:
+        """Löscht periodisch abgelaufene Sessions."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info(f"{removed} abgelaufene Sessions gelöscht")
+            except Exception as e:
+                logger.error(f"Fehler beim Löschen abgelaufener Sessions: {e}")
 
-    def _get_session_path(self, session_id: str) -> Path:
-        """Gibt den Pfad für eine Session zurück."""
-        return self.storage_path / f"{session_id}.json"
+    def _pop_expired(self, cutoff: float) -> List[str]:
+        """Entnimmt bis zu ``sweep_batch`` abgelaufene Sessions aus dem Heap."""
+        batch: List[str] = []
+        while self._expiry and len(batch) < self.sweep_batch and self._expiry[0][0] < cutoff:
+            updated_at, session_id = heapq.heappop(self._expiry)
+            if self._updated_at.get(session_id) == updated_at:
+                self._forget(session_id)
+                batch.append(session_id)
+        return batch
 
-    def save_context(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
-        """Speichert Chat-Kontext für eine Session."""
+    async def sweep(self) -> int:
+        """Löscht alle abgelaufenen Sessions in Batches; gibt die Anzahl zurück."""
+        removed = 0
+        while True:
+            batch = self._pop_expired(time.time() - self.ttl)
+            if not batch:
+                return removed
+            async with self._lock():
+                await asyncio.to_thread(self.backend.delete_many, batch)
+            removed += len(batch)
+            self.swept += len(batch)
+
+    # Öffentliche API
+
+    async def save_context(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """Speichert Chat-Kontext für eine Session (ersetzt den Verlauf)."""
         try:
+            created_at = await self._existing_created_at(session_id)
+            now = time.time()
             session_data = {
                 "session_id": session_id,
-                "messages": messages,
-                "created_at": time.time(),
-                "updated_at": time.time(),
+                "messages": list(messages),
+                "created_at": created_at or now,
+                "updated_at": now,
             }
-            session_path = self._get_session_path(session_id)
-            with open(session_path, "w", encoding="utf-8") as f:
-                json.dump(session_data, f, indent=2)
+            self._remember(session_id, session_data)
+            self._record(session_id, {"t": now, "op": "reset", "messages": list(messages)})
             return True
         except Exception as e:
             raise MCPError(f"Fehler beim Speichern der Session: {e}")
 
-    def load_context(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+    async def load_context(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
         """Lädt Chat-Kontext für eine Session."""
         try:
-            session_path = self._get_session_path(session_id)
-            if not session_path.exists():
+            # Prüfe TTL über den Index, bevor der Verlauf gelesen wird
+            updated_at = self._updated_at.get(session_id)
+            if updated_at is not None and self._is_expired(updated_at):
+                await self.clear_context(session_id)
                 return None
 
-            with open(session_path, "r", encoding="utf-8") as f:
-                session_data = json.load(f)
+            session_data = await self._get(session_id)
+            if session_data is None:
+                return None
 
-            # Prüfe TTL
-            if time.time() - session_data.get("updated_at", 0) > self.ttl:
-                self.clear_context(session_id)
+            if self._is_expired(session_data.get("updated_at", 0)):
+                await self.clear_context(session_id)
                 return None
 
-            return session_data.get("messages", [])
+            return list(session_data.get("messages", []))
         except Exception as e:
             raise MCPError(f"Fehler beim Laden der Session: {e}")
 
-    def clear_context(self, session_id: str) -> bool:
+    async def clear_context(self, session_id: str) -> bool:
         """Löscht Chat-Kontext für eine Session."""
         try:
-            session_path = self._get_session_path(session_id)
-            if session_path.exists():
-                session_path.unlink()
+            self._forget(session_id)
+            async with self._lock():
+                await asyncio.to_thread(self.backend.delete, session_id)
             return True
         except Exception as e:
             raise MCPError(f"Fehler beim Löschen der Session: {e}")
 
-    def update_context(self, session_id: str, message: Dict[str, Any]) -> bool:
-        """Aktualisiert den Kontext mit einer neuen Nachricht."""
-        messages = self.load_context(session_id) or []
-        messages.append(message)
-        return self.save_context(session_id, messages)
+    async def update_context(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Hängt eine Nachricht an den Kontext an.
+
+        Ist die Session nicht im Cache, wird die TTL über den Ablauf-Index oder die
+        Zeitstempel des Backends geprüft; der Verlauf selbst wird nicht geladen.
+        """
+        session_data = self._cache.get(session_id)
+        if session_data is None and session_id not in self._pending:
+            if session_id in self._updated_at:
+                timestamps = (None, self._updated_at[session_id])
+            else:
+                async with self._lock():
+                    timestamps = await asyncio.to_thread(
+                        self.backend.read_timestamps, session_id
+                    )
+            if timestamps is not None and self._is_expired(timestamps[1]):
+                await self.clear_context(session_id)
+                return await self.save_context(session_id, [message])
+            if timestamps is None:
+                # Neue Session oder altes Dateiformat (wird beim Schreiben migriert)
+                session_data = await self._get(session_id)
+                if session_data is None:
+                    return await self.save_context(session_id, [message])
+        elif session_data is None:
+            session_data = await self._get(session_id)
+
+        if session_data is not None:
+            if self._is_expired(session_data.get("updated_at", 0)):
+                await self.clear_context(session_id)
+                return await self.save_context(session_id, [message])
+            session_data["messages"].append(message)
+
+        now = time.time()
+        if session_data is not None:
+            session_data["updated_at"] = now
+        self._record(session_id, {"t": now, "op": "append", "message": message})
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Cache-, Schreib- und Ablaufstatistiken zurück."""
+        cutoff = time.time() - self.ttl
+        overdue = sum(1 for updated_at in self._updated_at.values() if updated_at < cutoff)
+        return {
+            "live": len(self._updated_at) - overdue,
+            "expired": overdue,
+            "swept": self.swept,
+            "cached": len(self._cache),
+            "dirty": len(self._pending),
+            "flushes": self.flushes,
+            "written": self.written,
+            "compactions": self.compactions,
+            "backend": self.config.session_backend,
+        }
 
+    async def close(self) -> None:
+        """Beendet Hintergrund-Tasks, schreibt ausstehende Einträge und schließt das Backend."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            await asyncio.gather(self._sweep_task, return_exceptions=True)
+            self._sweep_task = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        self.backend.close()
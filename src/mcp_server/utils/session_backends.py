@@ -0,0 +1,407 @@
+"""Speicher-Backends für Sessions (Datei-Logs oder SQLite)."""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_server.exceptions import ConfigError
+from mcp_server.utils.compression import Compressor, decompress
+from mcp_server.utils.validation import SESSION_ID_PATTERN, validate_session_id
+
+# Formatversion des Session-Logs (Kopfzeile jeder .jsonl-Datei)
+SESSION_LOG_VERSION = 1
+
+# Feste Länge der Kopfzeile inkl. Zeilenumbruch; wird beim Anhängen überschrieben
+SESSION_LOG_HEADER_SIZE = 128
+
+Record = Dict[str, Any]
+Batch = Dict[str, Tuple[float, List[Record]]]
+
+
+def _dump_json(value: Any) -> str:
+    """Serialisiert kompakt ohne ASCII-Escapes."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _payload_key(record: Record) -> str:
+    """Gibt das Feld mit den Nachrichten eines Eintrags zurück."""
+    return "messages" if record["op"] == "reset" else "message"
+
+
+def _pack_record(record: Record, compressor: Compressor) -> Record:
+    """Ersetzt große Nachrichten eines Eintrags durch komprimiertes base64 (``z``)."""
+    key = _payload_key(record)
+    packed = compressor.compress(_dump_json(record[key]).encode("utf-8"), base64_encoded=True)
+    if packed is None:
+        return record
+    record = {name: value for name, value in record.items() if name != key}
+    record["z"] = base64.b64encode(packed).decode("ascii")
+    return record
+
+
+def _unpack_record(record: Record) -> Record:
+    """Kehrt ``_pack_record`` um; rohe Einträge bleiben unverändert."""
+    if "z" in record:
+        record[_payload_key(record)] = json.loads(decompress(base64.b64decode(record.pop("z"))))
+    return record
+
+
+class SessionBackend:
+    """Schnittstelle der Session-Speicher.
+
+    Geschrieben werden Einträge ``{"t", "op": "reset", "messages"}`` (kompletter
+    Verlauf) und ``{"t", "op": "append", "message"}`` (eine Nachricht). Alle Methoden
+    blockieren und werden vom ``SessionManager`` über ``asyncio.to_thread`` und unter
+    seinem I/O-Lock aufgerufen.
+    """
+
+    # Ob lange Verläufe vom Manager zu einem reset verdichtet werden sollen
+    compacts = False
+
+    def read(self, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Liest eine Session; gibt (Session, Anzahl gespeicherter Einträge) zurück."""
+        raise NotImplementedError
+
+    def read_timestamps(self, session_id: str) -> Optional[Tuple[float, float]]:
+        """Liest (created_at, updated_at), ohne den Verlauf zu laden.
+
+        ``None`` bedeutet, dass der Manager die Session vollständig über ``read``
+        laden muss (unbekannt oder nicht direkt lesbar).
+        """
+        raise NotImplementedError
+
+    def write(self, batch: Batch) -> None:
+        """Schreibt ausstehende Einträge mehrerer Sessions: {id: (created_at, Einträge)}."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        """Löscht eine Session."""
+        raise NotImplementedError
+
+    def delete_many(self, session_ids: List[str]) -> None:
+        """Löscht mehrere Sessions."""
+        for session_id in session_ids:
+            self.delete(session_id)
+
+    def list_expiry(self) -> List[Tuple[float, str]]:
+        """Gibt (updated_at, id) aller gespeicherten Sessions zurück (für den Start)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Gibt Ressourcen frei."""
+
+
+class FileSessionBackend(SessionBackend):
+    """Ein Append-only-Log (``<id>.jsonl``) pro Session.
+
+    Eine Kopfzeile fester Länge mit Version, ``created_at`` und ``updated_at``,
+    danach die Einträge. Die Kopfzeile wird bei jedem Anhängen an Ort und Stelle
+    überschrieben, sodass die Zeitstempel ohne Lesen des Verlaufs verfügbar sind.
+    Jeder Eintrag trägt zusätzlich seinen eigenen Zeitstempel. Mit Kompression
+    stehen große Nachrichten als ``z`` (base64, Verfahren per Magic Bytes erkannt)
+    im Eintrag; Logs mit rohen und komprimierten Einträgen bleiben lesbar. Alte
+    ``<id>.json``-Dateien werden gelesen und beim nächsten Schreiben migriert.
+    """
+
+    compacts = True
+
+    def __init__(
+        self, storage_path: Path, compact_records: int, compressor: Optional[Compressor] = None
+    ):
+        """Initialisiert das Backend."""
+        self.storage_path = Path(storage_path)
+        self.compact_records = compact_records
+        self.compressor = compressor or Compressor()
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+
+    def _get_session_path(self, session_id: str) -> Path:
+        """Gibt den Pfad des Session-Logs zurück."""
+        return self.storage_path / f"{validate_session_id(session_id)}.jsonl"
+
+    def _get_legacy_path(self, session_id: str) -> Path:
+        """Gibt den Pfad im alten Ein-Datei-JSON-Format zurück."""
+        return self.storage_path / f"{validate_session_id(session_id)}.json"
+
+    def read(self, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Liest und wiederholt ein Session-Log."""
+        session_path = self._get_session_path(session_id)
+        if not session_path.exists():
+            legacy_path = self._get_legacy_path(session_id)
+            if not legacy_path.exists():
+                return None
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                session_data = json.load(f)
+            # Erzwingt beim nächsten Schreiben ein vollständiges Log im neuen Format
+            return session_data, self.compact_records + 1
+
+        with open(session_path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            session_data = {
+                "session_id": session_id,
+                "messages": [],
+                "created_at": header.get("created_at", 0),
+                "updated_at": header.get("created_at", 0),
+            }
+            records = 0
+            for line in f:
+                try:
+                    record = _unpack_record(json.loads(line))
+                except json.JSONDecodeError:
+                    # Unvollständige Zeile nach Absturz beim Anhängen
+                    continue
+                if record.get("op") == "reset":
+                    session_data["messages"] = record.get("messages", [])
+                else:
+                    session_data["messages"].append(record.get("message"))
+                session_data["updated_at"] = record.get("t", session_data["updated_at"])
+                records += 1
+        return session_data, records
+
+    def _read_header(self, session_path: Path) -> Optional[Dict[str, Any]]:
+        """Liest die Kopfzeile eines Logs (``None`` wenn nicht vorhanden)."""
+        try:
+            with open(session_path, "rb") as f:
+                return json.loads(f.readline())
+        except FileNotFoundError:
+            return None
+
+    def read_timestamps(self, session_id: str) -> Optional[Tuple[float, float]]:
+        """Liest die Zeitstempel aus der Kopfzeile."""
+        header = self._read_header(self._get_session_path(session_id))
+        if header is None:
+            return None
+        return header["created_at"], header["updated_at"]
+
+    @staticmethod
+    def _header_line(created_at: float, updated_at: float) -> bytes:
+        """Serialisiert die Kopfzeile, mit Leerzeichen auf feste Länge aufgefüllt."""
+        header = _dump_json(
+            {"v": SESSION_LOG_VERSION, "created_at": created_at, "updated_at": updated_at}
+        ).encode("utf-8")
+        return header.ljust(SESSION_LOG_HEADER_SIZE - 1) + b"\n"
+
+    def _dump_line(self, record: Record) -> str:
+        """Serialisiert einen Eintrag (ggf. komprimiert) als eine Zeile."""
+        if "op" in record:
+            record = _pack_record(record, self.compressor)
+        return _dump_json(record) + "\n"
+
+    def write(self, batch: Batch) -> None:
+        """Hängt Einträge an oder schreibt das Log bei einem reset atomar neu."""
+        for session_id, (created_at, records) in batch.items():
+            session_path = self._get_session_path(session_id)
+            resets = [i for i, record in enumerate(records) if record["op"] == "reset"]
+            header = None if resets else self._read_header(session_path)
+            if not resets and header is None:
+                legacy = self.read(session_id)
+                if legacy is not None:
+                    # Altes Format: Verlauf als reset vor die neuen Einträge stellen
+                    records = [
+                        {"t": legacy[0]["updated_at"], "op": "reset",
+                         "messages": legacy[0]["messages"]}
+                    ] + records
+            updated_at = records[-1]["t"]
+            if header is None:
+                records = records[resets[-1]:] if resets else records
+                tmp_path = session_path.with_suffix(".tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(self._header_line(created_at, updated_at))
+                    f.write("".join(self._dump_line(record) for record in records).encode("utf-8"))
+                os.replace(tmp_path, session_path)
+                self._get_legacy_path(session_id).unlink(missing_ok=True)
+            else:
+                with open(session_path, "r+b") as f:
+                    # Kopfzeile zuerst: ein zu neues updated_at verlängert nur die TTL
+                    f.write(self._header_line(header["created_at"], updated_at))
+                    # Abgebrochene letzte Zeile abschließen, bevor angehängt wird
+                    f.seek(-1, os.SEEK_END)
+                    lines = [] if f.read(1) == b"\n" else ["\n"]
+                    lines.extend(self._dump_line(record) for record in records)
+                    f.write("".join(lines).encode("utf-8"))
+
+    def delete(self, session_id: str) -> None:
+        """Löscht alle Dateien einer Session."""
+        self._get_session_path(session_id).unlink(missing_ok=True)
+        self._get_legacy_path(session_id).unlink(missing_ok=True)
+
+    def list_expiry(self) -> List[Tuple[float, str]]:
+        """Liest das Verzeichnis einmal; ``updated_at`` ist die Änderungszeit der Datei."""
+        expiry = []
+        with os.scandir(self.storage_path) as entries:
+            for entry in entries:
+                stem, suffix = os.path.splitext(entry.name)
+                if (
+                    suffix in (".jsonl", ".json")
+                    and SESSION_ID_PATTERN.match(stem)
+                    and entry.is_file()
+                ):
+                    expiry.append((entry.stat().st_mtime, stem))
+        return expiry
+
+
+# Feste SQL-Texte: sqlite3 hält die vorbereiteten Statements pro Verbindung im Cache
+_SELECT_SESSION = "SELECT created_at, updated_at, message_count FROM sessions WHERE id = ?"
+_SELECT_MESSAGES = "SELECT message FROM session_messages WHERE session_id = ? ORDER BY seq"
+_UPSERT_SESSION = (
+    "INSERT INTO sessions (id, created_at, updated_at, message_count) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    "updated_at = excluded.updated_at, message_count = excluded.message_count"
+)
+_INSERT_MESSAGE = "INSERT INTO session_messages (session_id, seq, message) VALUES (?, ?, ?)"
+_DELETE_MESSAGES = "DELETE FROM session_messages WHERE session_id = ?"
+_DELETE_SESSION = "DELETE FROM sessions WHERE id = ?"
+_SELECT_EXPIRY = "SELECT updated_at, id FROM sessions ORDER BY updated_at"
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Alle Sessions in einer SQLite-Datenbank (WAL).
+
+    ``sessions`` hält die Metadaten (Primärschlüssel ``id``, Index auf
+    ``updated_at``), ``session_messages`` eine Zeile pro Nachricht. Anhängen ist
+    damit ein einzelnes INSERT; ein Flush schreibt alle Sessions in einer
+    Transaktion. Mit Kompression werden große Nachrichten als BLOB gespeichert,
+    rohe als TEXT; beim Lesen entscheidet der Typ der Spalte.
+    """
+
+    def __init__(self, path: Path, compressor: Optional[Compressor] = None):
+        """Öffnet bzw. erstellt die Datenbank."""
+        self.path = Path(path)
+        self.compressor = compressor or Compressor()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "message_count INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_messages (session_id TEXT NOT NULL, "
+            "seq INTEGER NOT NULL, message TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+
+    def read(self, session_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Liest Metadaten und Nachrichten einer Session."""
+        with self._db_lock:
+            row = self._db.execute(_SELECT_SESSION, (session_id,)).fetchone()
+            if row is None:
+                return None
+            messages = [
+                json.loads(decompress(message) if isinstance(message, bytes) else message)
+                for (message,) in self._db.execute(_SELECT_MESSAGES, (session_id,))
+            ]
+        session_data = {
+            "session_id": session_id,
+            "messages": messages,
+            "created_at": row[0],
+            "updated_at": row[1],
+        }
+        return session_data, 0
+
+    def read_timestamps(self, session_id: str) -> Optional[Tuple[float, float]]:
+        """Liest die Zeitstempel aus der Metadaten-Tabelle."""
+        with self._db_lock:
+            row = self._db.execute(_SELECT_SESSION, (session_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def write(self, batch: Batch) -> None:
+        """Schreibt alle Einträge des Batches in einer Transaktion."""
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for session_id, (created_at, records) in batch.items():
+                    self._write_session(session_id, created_at, records)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _encode(self, message: Any) -> Any:
+        """Serialisiert eine Nachricht als TEXT oder komprimierten BLOB."""
+        text = _dump_json(message)
+        packed = self.compressor.compress(text.encode("utf-8"))
+        return text if packed is None else packed
+
+    def _write_session(self, session_id: str, created_at: float, records: List[Record]) -> None:
+        """Schreibt die Einträge einer Session (innerhalb der Transaktion)."""
+        resets = [i for i, record in enumerate(records) if record["op"] == "reset"]
+        if resets:
+            reset = records[resets[-1]]
+            records = records[resets[-1] + 1:]
+            self._db.execute(_DELETE_MESSAGES, (session_id,))
+            messages = reset["messages"]
+            count = 0
+        else:
+            row = self._db.execute(_SELECT_SESSION, (session_id,)).fetchone()
+            messages = []
+            count = row[2] if row else 0
+        messages = messages + [record["message"] for record in records]
+        self._db.executemany(
+            _INSERT_MESSAGE,
+            [
+                (session_id, count + offset, self._encode(message))
+                for offset, message in enumerate(messages)
+            ],
+        )
+        updated_at = (records or [reset])[-1]["t"]
+        self._db.execute(
+            _UPSERT_SESSION, (session_id, created_at, updated_at, count + len(messages))
+        )
+
+    def delete(self, session_id: str) -> None:
+        """Löscht eine Session samt Nachrichten."""
+        self.delete_many([session_id])
+
+    def delete_many(self, session_ids: List[str]) -> None:
+        """Löscht mehrere Sessions in einer Transaktion."""
+        params = [(session_id,) for session_id in session_ids]
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(_DELETE_MESSAGES, params)
+                self._db.executemany(_DELETE_SESSION, params)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def list_expiry(self) -> List[Tuple[float, str]]:
+        """Liest die Zeitstempel über den Index auf ``updated_at``."""
+        with self._db_lock:
+            return self._db.execute(_SELECT_EXPIRY).fetchall()
+
+    def close(self) -> None:
+        """Schließt die Datenbank."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+
+SESSION_BACKENDS = ("file", "sqlite")
+
+
+def create_session_backend(config) -> SessionBackend:
+    """Erstellt das in ``session_backend`` konfigurierte Backend."""
+    storage_path = Path(config.session_storage_path)
+    compressor = Compressor(config.session_compression, config.session_compression_threshold)
+    if config.session_backend == "file":
+        return FileSessionBackend(storage_path, config.session_compact_records, compressor)
+    if config.session_backend == "sqlite":
+        return SQLiteSessionBackend(storage_path / "sessions.db", compressor)
+    raise ConfigError(
+        f"Unbekanntes Session-Backend: {config.session_backend} "
+        f"(erlaubt: {', '.join(SESSION_BACKENDS)})"
+    )
@@ -1,5 +1,6 @@
 """Parameter-Validierung für Tools."""
 
+import re
 from typing import Any, Dict, Type, get_type_hints
 
 from pydantic import BaseModel, ValidationError as PydanticValidationError
@@ -16,6 +17,19 @@ def validate_params(params: Dict[str, Any], schema: Type[BaseModel]) -> BaseMode
         raise ValidationError(f"Validierungsfehler: {'; '.join(errors)}")
 
 
+# Session-IDs werden Teil von Dateinamen: keine Pfadtrenner, Punkte oder Steuerzeichen
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+def validate_session_id(session_id: Any) -> str:
+    """Validiert eine Session-ID (wird als Dateiname verwendet)."""
+    if not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id):
+        raise ValidationError(
+            "Ungültige session_id (erlaubt: A-Z, a-z, 0-9, '_' und '-', max. 128 Zeichen)"
+        )
+    return session_id
+
+
 def validate_model_name(model: str) -> str:
     """Validiert einen Modellnamen."""
     if not model or not isinstance(model, str):
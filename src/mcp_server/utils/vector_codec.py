@@ -0,0 +1,109 @@
+"""Kompakte Binär-Kodierung von Embedding-Vektoren (base64)."""
+
+import base64
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from mcp_server.exceptions import ValidationError
+
+# "float" = JSON-Liste wie bisher, alle anderen werden als base64 geliefert
+EMBEDDING_ENCODINGS = ("float", "float32", "float16", "int8")
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """Importiert NumPy erst beim ersten Gebrauch; ``None`` wenn nicht installiert."""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - NumPy ist optional
+        return None
+    return numpy
+
+
+def validate_encoding(encoding: Any) -> str:
+    """Prüft ein Embedding-Encoding (leer = ``float``).
+
+    ``int8`` benötigt NumPy, damit die Quantisierung nicht pro Element in Python läuft.
+    """
+    encoding = encoding or "float"
+    if encoding not in EMBEDDING_ENCODINGS:
+        raise ValidationError(
+            f"Unbekanntes Encoding: {encoding} (erlaubt: {', '.join(EMBEDDING_ENCODINGS)})"
+        )
+    if encoding == "int8" and _numpy() is None:
+        raise ValidationError("Encoding int8 benötigt das Paket 'numpy'")
+    return encoding
+
+
+def _float32_bytes(vector: Sequence[float]) -> bytes:
+    """Packt einen Vektor als little-endian float32."""
+    packed = array("f", vector)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _float16_bytes(vector: Sequence[float]) -> bytes:
+    """Packt einen Vektor als little-endian float16."""
+    np = _numpy()
+    if np is not None:
+        return np.asarray(vector, dtype="<f2").tobytes()
+    return struct.pack(f"<{len(vector)}e", *vector)
+
+
+def _int8_bytes(vector: Sequence[float]) -> tuple:
+    """Quantisiert symmetrisch auf int8; gibt (Bytes, Skalierung) zurück."""
+    np = _numpy()
+    values = np.asarray(vector, dtype=np.float32)
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    scale = peak / 127 or 1.0
+    quantized = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+    return quantized.tobytes(), scale
+
+
+def encode_vector(vector: Sequence[float], encoding: str = "float") -> Dict[str, Any]:
+    """Kodiert einen Embedding-Vektor.
+
+    Binäre Formate liefern ``embedding`` als base64 (little-endian) mit ``encoding``
+    und ``dimensions``; bei ``int8`` gilt ``wert ≈ int8 * scale``.
+    """
+    encoding = validate_encoding(encoding)
+    if encoding == "float":
+        return {"embedding": list(vector)}
+    if encoding == "float32":
+        data, extra = _float32_bytes(vector), {}
+    elif encoding == "float16":
+        data, extra = _float16_bytes(vector), {}
+    else:
+        data, scale = _int8_bytes(vector)
+        extra = {"scale": scale}
+    return {
+        "embedding": base64.b64encode(data).decode("ascii"),
+        "encoding": encoding,
+        "dimensions": len(vector),
+        **extra,
+    }
+
+
+def decode_vector(encoded: Dict[str, Any]) -> List[float]:
+    """Dekodiert ein Ergebnis von ``encode_vector`` zurück in eine Float-Liste."""
+    encoding = encoded.get("encoding", "float")
+    if encoding == "float":
+        return list(encoded["embedding"])
+    data = base64.b64decode(encoded["embedding"])
+    if encoding == "float32":
+        values = array("f")
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tolist()
+    if encoding == "float16":
+        return list(struct.unpack(f"<{len(data) // 2}e", data))
+    if encoding == "int8":
+        validate_encoding(encoding)
+        np = _numpy()
+        return (np.frombuffer(data, dtype=np.int8) * encoded["scale"]).tolist()
+    raise ValidationError(f"Unbekanntes Encoding: {encoding}")
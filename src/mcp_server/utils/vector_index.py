@@ -0,0 +1,302 @@
+"""Lokaler Vektor-Index mit benannten Collections (memory-mapped float32)."""
+
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from mcp_server.exceptions import MCPError, ValidationError
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Startkapazität (Zeilen) der Vektor-Matrix; wächst danach durch Verdopplung
+INITIAL_CAPACITY = 1024
+
+
+# NumPy wird erst beim ersten Zugriff auf eine Collection importiert (schneller Start)
+np: Any = None
+
+
+def _require_numpy() -> None:
+    """Importiert NumPy bei Bedarf und stellt sicher, dass es verfügbar ist."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise MCPError("Vektor-Collections benötigen das Paket 'numpy'") from None
+        np = numpy
+
+
+def validate_collection_name(name: str) -> str:
+    """Validiert einen Collection-Namen (wird als Verzeichnisname verwendet)."""
+    if not name or not COLLECTION_NAME_PATTERN.match(name):
+        raise ValidationError(f"Ungültiger Collection-Name: {name}")
+    return name
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    """Schreibt JSON über eine temporäre Datei, damit nie eine halbe Datei entsteht."""
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class VectorCollection:
+    """Eine Collection: Texte, Metadaten und eine normierte float32-Matrix.
+
+    Die Vektoren liegen zeilenweise in ``vectors.f32`` und werden per ``np.memmap``
+    eingeblendet; Kosinus-Ähnlichkeit ist damit ein einzelnes Matrix-Vektor-Produkt.
+    IDs, Texte und Metadaten werden an ``records.jsonl`` angehängt (spätere Zeilen
+    ersetzen frühere), ``meta.json`` enthält nur Modell, Dimension und Kapazität.
+    Alle Methoden blockieren und werden vom Handler über ``asyncio.to_thread``
+    aufgerufen.
+    """
+
+    def __init__(self, path: Path, meta: Dict[str, Any]):
+        """Initialisiert die Collection aus ihren Metadaten."""
+        _require_numpy()
+        self.path = path
+        self.model: str = meta["model"]
+        self.dimensions: Optional[int] = meta.get("dimensions")
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.capacity: int = meta.get("capacity", 0)
+        self._rows: Dict[str, int] = {}
+        self._log_lines = 0
+        self._matrix = None
+        self._lock = threading.Lock()
+        if self.dimensions and self.capacity:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+",
+                shape=(self.capacity, self.dimensions),
+            )
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def _records_path(self) -> Path:
+        return self.path / "records.jsonl"
+
+    @classmethod
+    def create(cls, path: Path, model: str) -> "VectorCollection":
+        """Legt eine leere Collection an."""
+        path.mkdir(parents=True)
+        collection = cls(path, {"model": model})
+        collection._save_meta()
+        return collection
+
+    @classmethod
+    def load(cls, path: Path) -> "VectorCollection":
+        """Lädt eine Collection von der Platte."""
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            collection = cls(path, json.load(f))
+        collection._read_records()
+        return collection
+
+    def _save_meta(self) -> None:
+        _write_json_atomic(
+            self.path / "meta.json",
+            {"model": self.model, "dimensions": self.dimensions, "capacity": self.capacity},
+        )
+
+    def _read_records(self) -> None:
+        """Liest ``records.jsonl``; eine abgeschnittene letzte Zeile wird ignoriert."""
+        if not self._records_path.exists():
+            return
+        with open(self._records_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._log_lines += 1
+                row = self._rows.get(record["id"])
+                if row is None:
+                    self._rows[record["id"]] = len(self.ids)
+                    self.ids.append(record["id"])
+                    self.texts.append(record["text"])
+                    self.metadata.append(record["metadata"])
+                else:
+                    self.texts[row] = record["text"]
+                    self.metadata[row] = record["metadata"]
+
+    @staticmethod
+    def _record_line(doc_id: str, text: str, meta: Dict[str, Any]) -> str:
+        return json.dumps({"id": doc_id, "text": text, "metadata": meta}, ensure_ascii=False)
+
+    def _append_records(self, rows: Sequence[int]) -> None:
+        """Hängt die geänderten Zeilen an; schreibt neu, sobald Ersetzungen überwiegen."""
+        if self._log_lines + len(rows) > 2 * max(len(self.ids), INITIAL_CAPACITY):
+            self._compact()
+            return
+        with open(self._records_path, "a", encoding="utf-8") as f:
+            f.write(
+                "".join(
+                    self._record_line(self.ids[row], self.texts[row], self.metadata[row]) + "\n"
+                    for row in rows
+                )
+            )
+        self._log_lines += len(rows)
+
+    def _compact(self) -> None:
+        """Schreibt ``records.jsonl`` mit genau einer Zeile pro Eintrag neu."""
+        tmp_path = self._records_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc_id, text, meta in zip(self.ids, self.texts, self.metadata):
+                f.write(self._record_line(doc_id, text, meta) + "\n")
+        os.replace(tmp_path, self._records_path)
+        self._log_lines = len(self.ids)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Vergrößert die Matrix-Datei, bis ``rows`` Zeilen hineinpassen."""
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2, INITIAL_CAPACITY)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dimensions * 4)
+        self.capacity = capacity
+        self._matrix = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions)
+        )
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadata: Sequence[Dict[str, Any]],
+    ) -> int:
+        """Fügt Einträge hinzu oder ersetzt bestehende IDs; gibt die Anzahl neuer zurück."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(ids):
+            raise ValidationError("Embeddings haben keine einheitliche Dimension")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = matrix.shape[1]
+            elif matrix.shape[1] != self.dimensions:
+                raise ValidationError(
+                    f"Dimension {matrix.shape[1]} passt nicht zur Collection ({self.dimensions})"
+                )
+
+            rows = []
+            added = 0
+            for doc_id, text, meta in zip(ids, texts, metadata):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = len(self.ids)
+                    self._rows[doc_id] = row
+                    self.ids.append(doc_id)
+                    self.texts.append(text)
+                    self.metadata.append(meta)
+                    added += 1
+                else:
+                    self.texts[row] = text
+                    self.metadata[row] = meta
+                rows.append(row)
+
+            capacity = self.capacity
+            self._ensure_capacity(len(self.ids))
+            if self.capacity != capacity:
+                self._save_meta()
+            self._matrix[rows] = matrix
+            self._matrix.flush()
+            self._append_records(rows)
+        return added
+
+    def query(self, vector: Sequence[float], top_k: int) -> List[Dict[str, Any]]:
+        """Gibt die ``top_k`` ähnlichsten Einträge nach Kosinus-Ähnlichkeit zurück."""
+        with self._lock:
+            count = len(self.ids)
+            if not count:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            if query.shape != (self.dimensions,):
+                raise ValidationError(
+                    f"Dimension {query.size} passt nicht zur Collection ({self.dimensions})"
+                )
+            norm = np.linalg.norm(query)
+            scores = self._matrix[:count] @ (query / norm if norm else query)
+
+            top_k = min(top_k, count)
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best])]
+            return [
+                {
+                    "id": self.ids[row],
+                    "score": round(float(scores[row]), 6),
+                    "text": self.texts[row],
+                    "metadata": self.metadata[row],
+                }
+                for row in best
+            ]
+
+    def info(self) -> Dict[str, Any]:
+        """Gibt Kenndaten der Collection zurück."""
+        return {"model": self.model, "dimensions": self.dimensions, "count": len(self.ids)}
+
+
+class VectorIndex:
+    """Verwaltet Collections unter einem Basisverzeichnis.
+
+    Beim Start werden nur die Verzeichnisnamen gelesen; eine Collection wird erst
+    beim ersten Zugriff geladen.
+    """
+
+    def __init__(self, root: Path):
+        """Initialisiert den Index."""
+        self.root = Path(root)
+        self._collections: Dict[str, Optional[VectorCollection]] = {}
+        self._lock = threading.Lock()
+        if self.root.exists():
+            for path in self.root.iterdir():
+                if (path / "meta.json").exists():
+                    self._collections[path.name] = None
+
+    def names(self) -> List[str]:
+        """Gibt die Namen aller Collections zurück."""
+        return sorted(self._collections)
+
+    def create(self, name: str, model: str) -> VectorCollection:
+        """Legt eine neue Collection an."""
+        _require_numpy()
+        validate_collection_name(name)
+        with self._lock:
+            if name in self._collections:
+                raise ValidationError(f"Collection existiert bereits: {name}")
+            collection = VectorCollection.create(self.root / name, model)
+            self._collections[name] = collection
+        return collection
+
+    def get(self, name: str) -> VectorCollection:
+        """Gibt eine Collection zurück und lädt sie bei Bedarf."""
+        _require_numpy()
+        with self._lock:
+            if name not in self._collections:
+                raise ValidationError(f"Collection nicht gefunden: {name}")
+            collection = self._collections[name]
+            if collection is None:
+                collection = VectorCollection.load(self.root / name)
+                self._collections[name] = collection
+        return collection
+
+    def delete(self, name: str) -> bool:
+        """Löscht eine Collection samt Dateien."""
+        with self._lock:
+            if self._collections.pop(name, False) is False:
+                return False
+        shutil.rmtree(self.root / name, ignore_errors=True)
+        return True
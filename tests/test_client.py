@@ -1,5 +1,7 @@
 """Tests für Ollama Client."""
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 
@@ -17,6 +19,16 @@ def client():
             {
                 "ollama_base_url": "http://localhost:11434",
                 "ollama_timeout": 60,
+                "ollama_connect_timeout": 10.0,
+                "ollama_read_timeout": None,
+                "ollama_write_timeout": 30.0,
+                "ollama_pool_timeout": 10.0,
+                "ollama_stream_idle_timeout": 120.0,
+                "ollama_max_connections": 100,
+                "ollama_max_keepalive_connections": 20,
+                "ollama_keepalive_expiry": 5.0,
+                "ollama_http2": False,
+                "ollama_single_flight": True,
             },
         )()
         return OllamaClient()
@@ -43,3 +55,54 @@ async def test_connection_error(client):
         with pytest.raises(Exception):
             await client.list_models()
 
+
+
+@pytest.mark.asyncio
+async def test_embed_batch_chunks_inputs(client):
+    """Test dass embed_batch in Chunks aufteilt und die Reihenfolge erhält."""
+    calls = []
+
+    async def fake_embed(model, inputs, options=None):
+        calls.append(list(inputs))
+        return {"embeddings": [[float(len(text))] for text in inputs]}
+
+    client.embed = fake_embed
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    result = await client.embed_batch("nomic", texts, batch_size=2, max_concurrency=2)
+
+    assert result == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert calls == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_and_limits(client):
+    """Test dass Pool-Limits gesetzt werden und Statistiken abrufbar sind."""
+    http_client = await client._get_client()
+    assert http_client.timeout.connect == 10.0
+    assert http_client.timeout.read == 60
+
+    stats = client.stats()
+    assert stats["in_flight"] == 0
+    assert stats["max_connections"] == 100
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced(client):
+    """Test dass gleichzeitige identische Leseanfragen nur einmal gesendet werden."""
+    calls = []
+
+    async def slow_request(*args, **kwargs):
+        calls.append(kwargs["url"])
+        await asyncio.sleep(0.01)
+        response = Mock()
+        response.json.return_value = {"models": []}
+        return response
+
+    with patch("httpx.AsyncClient.request", side_effect=slow_request):
+        results = await asyncio.gather(*(client.list_models() for _ in range(5)))
+        await asyncio.gather(client.show_model("a"), client.show_model("b"))
+
+    assert results == [{"models": []}] * 5
+    assert calls == ["/api/tags", "/api/show", "/api/show"]
+    assert client.stats()["coalesced_requests"] == 4
@@ -0,0 +1,520 @@
+"""Tests für Tool-Handler."""
+
+import asyncio
+import json
+
+import pytest
+
+from mcp_server.config import Config
+from mcp_server.handlers import ToolHandler
+
+
+class FakeOllamaClient:
+    """Ollama-Client-Ersatz mit steuerbaren Antworten."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.digest = "sha256:aaa"
+        self.embedded = []
+        self.tags_calls = 0
+
+    async def list_models(self):
+        self.tags_calls += 1
+        return {"models": [{"name": "nomic:latest", "digest": self.digest}]}
+
+    async def delete_model(self, model):
+        return {}
+
+    async def embed_batch(self, model, inputs, options=None, batch_size=None):
+        self.embedded.extend(inputs)
+        return [[float(len(text))] for text in inputs]
+
+    async def generate(self, model, prompt, system=None, template=None, context=None,
+                       stream=False, options=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Spätere Prompts sind schneller fertig, um die Reihenfolge zu prüfen
+            await asyncio.sleep(0.01 * (5 - len(prompt)))
+            if prompt == "boom":
+                raise RuntimeError("kaputt")
+            self.last_context = context
+            yield {"response": prompt.upper(), "done": True, "context": [1, 2, len(prompt)],
+                   "eval_count": 10, "eval_duration": 500_000_000}
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_client():
+    """Fake Ollama Client."""
+    return FakeOllamaClient()
+
+
+@pytest.fixture
+def handler(fake_client, tmp_path):
+    """Tool-Handler mit Fake-Client."""
+    config = Config(
+        session_storage_path=tmp_path,
+        job_store_path=tmp_path / "jobs",
+        batch_max_concurrency=2,
+        fanout_max_concurrency=2,
+    )
+    return ToolHandler(fake_client, None, config)
+
+
+@pytest.mark.asyncio
+async def test_batch_generate_keeps_order_and_limits_concurrency(handler, fake_client):
+    """Test Reihenfolge, Fehler pro Prompt und Parallelitätslimit."""
+    result = await handler.handle_tool_call(
+        "ollama_batch_generate",
+        {"model": "llama2", "prompts": ["a", "bb", "boom", "dddd"]},
+    )
+    responses = [r.get("response") for r in result["results"]]
+    assert responses == ["A", "BB", None, "DDDD"]
+    assert result["results"][2]["error"] == "kaputt"
+    assert result["errors"] == 1
+    assert fake_client.max_in_flight == 2
+    assert result["eval_count"] == 30
+    assert result["tokens_per_second"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_batch_generate_capped_at_scheduler_slots(fake_client, tmp_path):
+    """Test dass ein großer Batch die eigene Admission-Warteschlange nicht überläuft."""
+    config = Config(
+        job_store_path=tmp_path / "jobs",
+        scheduler_enabled=True,
+        scheduler_max_concurrency_per_model=2,
+        scheduler_max_queue=1,
+    )
+    handler = ToolHandler(fake_client, None, config)
+    result = await handler.handle_tool_call(
+        "ollama_batch_generate",
+        {"model": "llama2", "prompts": ["a"] * 20, "max_concurrency": 100},
+    )
+    assert result["errors"] == 0
+    assert result["max_concurrency"] == 2
+    assert fake_client.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_create_embeddings_uses_cache(handler, fake_client):
+    """Test dass wiederholte Texte aus dem Cache kommen und Digest-Wechsel invalidiert."""
+    args = {"model": "nomic", "prompts": ["eins", "zwei", "eins"]}
+    first = await handler.handle_tool_call("ollama_create_embeddings", args)
+    second = await handler.handle_tool_call("ollama_create_embeddings", args)
+
+    assert first == second == [{"embedding": [4.0]}, {"embedding": [4.0]}, {"embedding": [4.0]}]
+    assert fake_client.embedded == ["eins", "zwei"]
+    assert handler.embedding_cache.stats()["hits"] == 3
+
+    # Neu gepulltes Modell: neuer Digest nach Invalidierung des Katalogs
+    fake_client.digest = "sha256:bbb"
+    handler.catalog.invalidate()
+    await handler.handle_tool_call("ollama_create_embeddings", args)
+    assert fake_client.embedded == ["eins", "zwei", "eins", "zwei"]
+
+
+@pytest.mark.asyncio
+async def test_embed_and_embeddings_do_not_share_cache_entries(handler, fake_client):
+    """Test dass normierte (/api/embed) und rohe (/api/embeddings) Vektoren getrennt sind."""
+
+    async def embed_batch(model, inputs, options=None, batch_size=None):
+        return [[0.6, 0.8] for _ in inputs]
+
+    async def embeddings(model, prompt, options=None):
+        return {"embedding": [3.0, 4.0]}
+
+    fake_client.embed_batch = embed_batch
+    fake_client.embeddings = embeddings
+    args = {"model": "nomic", "prompts": ["text"]}
+    assert await handler.handle_tool_call("ollama_create_embeddings", args) == [
+        {"embedding": [0.6, 0.8]}
+    ]
+    raw = await handler.handle_tool_call("ollama_embeddings", {"model": "nomic", "prompt": "text"})
+    assert raw == {"embedding": [3.0, 4.0]}
+    again = await handler.handle_tool_call("ollama_create_embeddings", args)
+    assert again[0]["embedding"] == pytest.approx([0.6, 0.8])
+
+
+@pytest.mark.asyncio
+async def test_model_catalog_cached_and_invalidated(handler, fake_client):
+    """Test dass /api/tags gecacht und nach Modelländerungen neu geladen wird."""
+    await handler.handle_tool_call("ollama_list_models", {})
+    size = await handler.handle_tool_call("ollama_get_model_size", {"model": "nomic"})
+    await handler.handle_tool_call("ollama_search_models", {"query": "nom"})
+    assert size["model"] == "nomic"
+    assert fake_client.tags_calls == 1
+
+    await handler.handle_tool_call("ollama_delete_model", {"model": "nomic"})
+    await handler.handle_tool_call("ollama_list_models", {})
+    assert fake_client.tags_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_health_bypasses_catalog_and_stale_fetch_is_dropped(handler, fake_client):
+    """Test dass der Health-Check Ollama direkt fragt und alte Abfragen nicht speichern."""
+    await handler.handle_tool_call("ollama_list_models", {})
+
+    async def offline():
+        raise ConnectionError("weg")
+
+    original = fake_client.list_models
+    fake_client.list_models = offline
+    health = await handler.handle_tool_call("ollama_check_health", {})
+    assert health["status"] == "unhealthy"
+
+    # Abfrage läuft noch, während invalidate() aufgerufen wird
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return {"models": [{"name": "alt:latest"}]}
+
+    handler.catalog.invalidate()
+    fake_client.list_models = slow
+    pending = asyncio.ensure_future(handler.catalog.list_models())
+    await asyncio.sleep(0)
+    handler.catalog.invalidate()
+    release.set()
+    assert (await pending)["models"][0]["name"] == "alt:latest"
+    fake_client.list_models = original
+    models = await handler.catalog.list_models()
+    assert models["models"][0]["name"] == "nomic:latest"
+
+
+@pytest.mark.asyncio
+async def test_compare_models_runs_concurrently_with_timings(handler, fake_client):
+    """Test nebenläufigen Modellvergleich mit Latenzangaben."""
+    result = await handler.handle_tool_call(
+        "ollama_compare_models", {"models": ["m1", "m2", "m3"], "prompt": "ab"}
+    )
+    assert fake_client.max_in_flight == 2
+    for model_result in result["results"].values():
+        assert model_result["response"] == "AB"
+        assert model_result["wall_time_ms"] >= model_result["time_to_first_token_ms"] > 0
+
+
+class _ErrorChunkClient:
+    """Ollama-Client-Ersatz, dessen Stream nach einem Fehler-Chunk weiterliefe."""
+
+    def __init__(self):
+        self.closed = 0
+        self.streams = []
+
+    def generate(self, model, prompt, stream=False, options=None):
+        # Referenz halten, damit nicht die Garbage Collection den Stream schließt
+        self.streams.append(self._stream())
+        return self.streams[-1]
+
+    async def _stream(self):
+        try:
+            yield {"error": "model not found"}
+            while True:
+                yield {"response": "x"}
+        finally:
+            self.closed += 1
+
+
+@pytest.mark.asyncio
+async def test_compare_models_closes_stream_on_error_chunk(tmp_path):
+    """Test dass ein Fehler-Chunk den Ollama-Stream sofort schließt."""
+    client = _ErrorChunkClient()
+    handler = ToolHandler(client, None, Config(session_storage_path=tmp_path))
+    result = await handler.handle_tool_call(
+        "ollama_compare_models", {"models": ["m1", "m2"], "prompt": "ab"}
+    )
+    assert result["results"]["m1"]["error"]
+    assert client.closed == 2
+
+
+class _EndlessChatClient:
+    """Ollama-Client-Ersatz mit endlosem Chat-Stream."""
+
+    def __init__(self):
+        self.closed = False
+
+    async def chat(self, model, messages, stream=False, options=None):
+        try:
+            while True:
+                await asyncio.sleep(0)
+                yield {"message": {"role": "assistant", "content": "x"}, "done": False}
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_closes_upstream_and_counts_saved_tokens(monkeypatch, tmp_path):
+    """Test dass ein Abbruch den Ollama-Stream schließt und Metriken erfasst."""
+    from mcp_server.metrics import Metrics
+
+    metrics = Metrics()
+    monkeypatch.setattr("mcp_server.handlers.get_metrics", lambda: metrics)
+    client = _EndlessChatClient()
+    handler = ToolHandler(client, None, Config(session_storage_path=tmp_path))
+    arguments = {
+        "model": "llama2",
+        "messages": [{"role": "user", "content": "Hi"}],
+        "options": {"num_predict": 100},
+    }
+
+    stream = handler.stream_tool_call("ollama_chat_stream", arguments)
+    for _ in range(3):
+        await stream.__anext__()
+    await stream.aclose()
+
+    assert client.closed
+    assert metrics.tool_cancelled.values[("ollama_chat_stream",)] == 1
+    assert metrics.tokens_saved.values[("llama2",)] == 97
+    assert ("ollama_chat_stream",) not in metrics.tool_errors.values
+
+
+@pytest.mark.asyncio
+async def test_generate_returns_and_expands_context_handle(handler, fake_client):
+    """Test dass Kontexte als Handle zurückgegeben und serverseitig aufgelöst werden."""
+    first = await handler.handle_tool_call("ollama_generate", {"model": "m", "prompt": "abc"})
+    assert "context" not in first
+    assert first["context_handle"].startswith("ctx_")
+
+    second = await handler.handle_tool_call(
+        "ollama_generate",
+        {"model": "m", "prompt": "d", "context": first["context_handle"], "include_context": True},
+    )
+    assert fake_client.last_context == [1, 2, 3]
+    assert second["context"] == [1, 2, 1]
+
+    result = await handler.handle_tool_call(
+        "ollama_generate", {"model": "m", "prompt": "d", "context": "ctx_unbekannt"}
+    )
+    assert result["error_type"] == "ValidationError"
+
+
+@pytest.mark.asyncio
+async def test_create_embeddings_binary_encoding(handler):
+    """Test base64-Encoding der Embeddings inklusive int8-Skalierung."""
+    from mcp_server.utils.vector_codec import decode_vector
+
+    result = await handler.handle_tool_call(
+        "ollama_create_embeddings",
+        {"model": "nomic", "prompts": ["eins", "drei"], "encoding": "int8"},
+    )
+    assert [r["encoding"] for r in result] == ["int8", "int8"]
+    assert decode_vector(result[0]) == pytest.approx([4.0])
+
+    invalid = await handler.handle_tool_call(
+        "ollama_create_embeddings", {"model": "nomic", "prompts": ["x"], "encoding": "bf16"}
+    )
+    assert invalid["error_type"] == "ValidationError"
+
+
+class _VectorClient(FakeOllamaClient):
+    """Fake-Client mit themenabhängigen Embeddings."""
+
+    async def embed_batch(self, model, inputs, options=None, batch_size=None):
+        topics = ["katze", "auto", "wetter"]
+        return [[1.0 if topic in text else 0.0 for topic in topics] for text in inputs]
+
+
+@pytest.mark.asyncio
+async def test_vector_collection_upsert_query_and_reload(tmp_path):
+    """Test Collection anlegen, Texte einfügen, suchen und nach Neustart neu laden."""
+    config = Config(session_storage_path=tmp_path, vector_index_path=tmp_path / "index")
+    handler = ToolHandler(_VectorClient(), None, config)
+
+    await handler.handle_tool_call("ollama_create_collection", {"name": "docs", "model": "nomic"})
+    upserted = await handler.handle_tool_call(
+        "ollama_upsert_texts",
+        {
+            "collection": "docs",
+            "texts": ["die katze schläft", "das auto fährt", "das wetter ist gut"],
+            "ids": ["k", "a", "w"],
+        },
+    )
+    assert upserted["added"] == 3 and upserted["dimensions"] == 3
+    await handler.handle_tool_call(
+        "ollama_upsert_texts",
+        {"collection": "docs", "texts": ["katze und auto"], "ids": ["a"]},
+    )
+
+    restarted = ToolHandler(_VectorClient(), None, config)
+    listed = await restarted.handle_tool_call("ollama_list_collections", {})
+    assert listed["collections"] == ["docs"]
+    result = await restarted.handle_tool_call(
+        "ollama_query_collection", {"collection": "docs", "query": "katze", "top_k": 2}
+    )
+    assert [m["id"] for m in result["matches"]] == ["k", "a"]
+    assert result["matches"][0]["score"] == pytest.approx(1.0)
+    assert result["matches"][1]["text"] == "katze und auto"
+
+    missing = await restarted.handle_tool_call(
+        "ollama_query_collection", {"collection": "fehlt", "query": "x"}
+    )
+    assert missing["error_type"] == "ValidationError"
+    negative = await restarted.handle_tool_call(
+        "ollama_query_collection", {"collection": "docs", "query": "katze", "top_k": -1}
+    )
+    assert negative["error_type"] == "ValidationError"
+
+
+def test_vector_collection_appends_records(monkeypatch, tmp_path):
+    """Test dass Upserts nur anhängen und Ersetzungen verdichtet werden."""
+    from mcp_server.utils import vector_index
+    from mcp_server.utils.vector_index import VectorCollection
+
+    collection = VectorCollection.create(tmp_path / "docs", "nomic")
+    for index in range(50):
+        collection.upsert([f"d{index}"], [f"text {index}"], [[1.0, float(index)]], [{}])
+    collection.upsert(["d0"], ["neu"], [[0.0, 1.0]], [{"v": 2}])
+    meta = json.loads((tmp_path / "docs" / "meta.json").read_text())
+    assert "ids" not in meta
+    assert len((tmp_path / "docs" / "records.jsonl").read_text().splitlines()) == 51
+
+    reloaded = VectorCollection.load(tmp_path / "docs")
+    assert reloaded.info()["count"] == 50
+    assert reloaded.query([0.0, 1.0], 1)[0] == {
+        "id": "d0", "score": 1.0, "text": "neu", "metadata": {"v": 2},
+    }
+
+    # Ersetzungen lösen ab einer Schwelle ein Neuschreiben aus
+    monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 1)
+    for _ in range(60):
+        reloaded.upsert(["d1"], ["x"], [[1.0, 1.0]], [{}])
+    assert len((tmp_path / "docs" / "records.jsonl").read_text().splitlines()) <= 100
+
+
+class _PullClient(FakeOllamaClient):
+    """Fake-Client mit Pull-Fortschritt, der auf Freigabe wartet."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def pull_model(self, model, insecure=False):
+        yield {"status": "pulling manifest"}
+        for completed in (50, 100):
+            await self.release.wait()
+            await asyncio.sleep(0.001)
+            yield {
+                "status": "downloading", "digest": "sha256:x", "completed": completed, "total": 100,
+            }
+        yield {"status": "success"}
+
+
+@pytest.mark.asyncio
+async def test_pull_job_progress_watch_and_restart(tmp_path):
+    """Test Job-Fortschritt, Beobachtung und Wiederaufnahme nach Neustart."""
+    config = Config(session_storage_path=tmp_path, job_store_path=tmp_path / "jobs")
+    client = _PullClient()
+    handler = ToolHandler(client, None, config)
+
+    submitted = await handler.handle_tool_call(
+        "ollama_submit_job", {"kind": "pull", "arguments": {"model": "llama2"}}
+    )
+    job_id = submitted["job_id"]
+    await asyncio.sleep(0.01)
+    status = await handler.handle_tool_call("ollama_job_status", {"job_id": job_id})
+    assert status["status"] == "running"
+    assert status["progress"] == {"status": "pulling manifest"}
+
+    # Neustart während des Downloads: Job bleibt erhalten und läuft weiter
+    await handler.close()
+    restarted = ToolHandler(client, None, config)
+    await restarted.start()
+    client.release.set()
+    updates = [u async for u in restarted.stream_tool_call("ollama_watch_job", {"job_id": job_id})]
+
+    assert updates[-1]["status"] == "succeeded"
+    assert updates[-1]["result"]["status"] == "success"
+    byte_progress = [u["progress"] for u in updates if "total" in u["progress"]]
+    assert byte_progress and byte_progress[0]["digest"] == "sha256:x"
+    assert updates[-1]["progress"] == {"status": "success"}
+    listed = await restarted.handle_tool_call("ollama_list_jobs", {})
+    assert listed["jobs"][0]["restarts"] == 1
+
+    invalid = await restarted.handle_tool_call("ollama_submit_job", {"kind": "rm", "arguments": {}})
+    assert invalid["error_type"] == "ValidationError"
+
+
+@pytest.mark.asyncio
+async def test_cancel_job(handler, tmp_path):
+    """Test dass ein laufender Job abgebrochen werden kann."""
+    handler.client = _PullClient()
+    submitted = await handler.handle_tool_call(
+        "ollama_submit_job", {"kind": "pull", "arguments": {"model": "llama2"}}
+    )
+    await asyncio.sleep(0.01)
+    cancelled = await handler.handle_tool_call("ollama_cancel_job", {"job_id": submitted["job_id"]})
+    assert cancelled["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_jobs_persist_off_the_event_loop(monkeypatch, tmp_path):
+    """Test dass Job-Dateien in einem Thread geschrieben und Stände zusammengefasst werden."""
+    import threading
+
+    from mcp_server.utils import jobs
+    from mcp_server.utils.jobs import JobManager
+
+    monkeypatch.setattr(jobs, "PROGRESS_PERSIST_INTERVAL", 0)
+    written = []
+    write_file = JobManager._write_file
+
+    def recording_write(self, job_id, job):
+        written.append((threading.get_ident(), job and job["status"]))
+        write_file(self, job_id, job)
+
+    monkeypatch.setattr(JobManager, "_write_file", recording_write)
+
+    async def runner(arguments, report):
+        for step in range(100):
+            report({"step": step})
+        return {"status": "success", "rows": ["x" * 1000] * 100}
+
+    manager = JobManager(tmp_path / "jobs", {"batch": runner}, max_history=0)
+    job = manager.submit("batch", {})
+    await manager._tasks[job["id"]]
+    await manager.flush()
+
+    assert all(ident != threading.get_ident() for ident, _ in written)
+    # 1 Anlage + 1 running + 100 Fortschritte + 1 Ende, zusammengefasst
+    assert len(written) < 10
+    # max_history=0: der abgeschlossene Job wird zuletzt gelöscht
+    assert written[-1][1] is None
+    assert not list((tmp_path / "jobs").glob("*.json"))
+
+
+@pytest.mark.asyncio
+async def test_stream_surfaces_upstream_error_line(monkeypatch, tmp_path):
+    """Test dass eine Fehlerzeile von Ollama als Fehler-Event endet und gezählt wird."""
+    import httpx
+
+    from mcp_server.client import OllamaClient
+    from mcp_server.metrics import Metrics
+
+    metrics = Metrics()
+    monkeypatch.setattr("mcp_server.handlers.get_metrics", lambda: metrics)
+    config = Config(session_storage_path=tmp_path, scheduler_enabled=False)
+    client = OllamaClient(config)
+    client._client = httpx.AsyncClient(
+        base_url="http://ollama",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(404, json={"error": "model 'nope' not found"})
+        ),
+    )
+    handler = ToolHandler(client, None, config)
+
+    for tool_name, arguments in (
+        ("ollama_generate_stream", {"model": "nope", "prompt": "Hi"}),
+        ("ollama_chat_stream", {"model": "nope", "messages": [{"role": "user", "content": "Hi"}]}),
+    ):
+        chunks = [chunk async for chunk in handler.stream_tool_call(tool_name, arguments)]
+        assert len(chunks) == 1
+        assert chunks[0]["error_type"] == "OllamaAPIError"
+        assert "not found" in chunks[0]["error"]
+        assert metrics.tool_errors.values[(tool_name,)] == 1
+
+    result = await handler.handle_tool_call("ollama_generate", {"model": "nope", "prompt": "Hi"})
+    assert result["error_type"] == "OllamaAPIError"
+    await client.close()
@@ -0,0 +1,115 @@
+"""Tests für den Ollama Backend-Pool."""
+
+import json
+
+import httpx
+import pytest
+
+from mcp_server.config import Config
+from mcp_server.exceptions import OllamaConnectionError
+from mcp_server.pool import BackendPool
+
+
+class FakeOllamaServer:
+    """Simulierter Ollama-Server hinter einem httpx.MockTransport."""
+
+    def __init__(self, name, loaded=(), installed=()):
+        self.name = name
+        self.loaded = list(loaded)
+        self.installed = list(installed) + list(loaded)
+        self.up = True
+        self.generated = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if not self.up:
+            raise httpx.ConnectError("down", request=request)
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": m} for m in self.loaded]})
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": m} for m in self.installed]})
+        if request.url.path == "/api/pull":
+            self.installed.append(json.loads(request.read())["name"])
+            lines = [{"status": "pulling manifest"}, {"status": "success"}]
+            return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+        if request.url.path == "/api/delete":
+            name = json.loads(request.read())["name"]
+            self.installed = [m for m in self.installed if m != name]
+            self.loaded = [m for m in self.loaded if m != name]
+            return httpx.Response(200, json={})
+        if request.url.path == "/api/generate":
+            self.generated.append(request.read())
+            return httpx.Response(200, json={"response": self.name, "done": True})
+        return httpx.Response(404, json={"error": "not found"})
+
+
+@pytest.fixture
+def servers():
+    """Drei Fake-Backends: geladen, installiert, leer."""
+    return {
+        "a": FakeOllamaServer("a", loaded=["llama2:latest"]),
+        "b": FakeOllamaServer("b", installed=["llama2:latest"]),
+        "c": FakeOllamaServer("c"),
+    }
+
+
+@pytest.fixture
+async def pool(servers, tmp_path):
+    """Pool, dessen Backends an die Fake-Server gebunden sind."""
+    config = Config(session_storage_path=tmp_path)
+    pool = BackendPool(config, urls=[f"http://{name}:11434" for name in servers])
+    for backend, server in zip(pool.backends, servers.values()):
+        backend.client._client = httpx.AsyncClient(
+            base_url=backend.url, transport=httpx.MockTransport(server.handle)
+        )
+    await pool.refresh()
+    yield pool
+    await pool.close()
+
+
+async def _generate(pool, model):
+    async for response in pool.generate(model, "Hi"):
+        return response["response"]
+
+
+@pytest.mark.asyncio
+async def test_routes_to_backend_with_loaded_model(pool, servers):
+    """Test Routing: geladen > installiert > am wenigsten ausgelastet."""
+    assert await _generate(pool, "llama2") == "a"
+
+    servers["a"].up = False
+    with pytest.raises(OllamaConnectionError):
+        await _generate(pool, "llama2")
+    assert not pool.backends[0].healthy
+    assert await _generate(pool, "llama2") == "b"
+
+    pool.backends[1].in_flight = 5
+    assert await _generate(pool, "mistral") == "c"
+
+
+@pytest.mark.asyncio
+async def test_ejected_backend_recovers(pool, servers):
+    """Test dass ein entferntes Backend nach erfolgreicher Abfrage zurückkehrt."""
+    servers["a"].up = False
+    await pool.refresh()
+    assert [b.healthy for b in pool.backends] == [False, True, True]
+
+    servers["a"].up = True
+    await pool.refresh()
+    assert await _generate(pool, "llama2") == "a"
+    assert (await pool.list_models())["models"] == [{"name": "llama2:latest"}]
+
+
+@pytest.mark.asyncio
+async def test_routing_follows_pull_and_delete_without_poll(pool, servers):
+    """Test dass Pull und Delete das Routing sofort ändern, nicht erst beim Polling."""
+    pool.backends[0].in_flight = pool.backends[1].in_flight = 5
+    chunks = [chunk async for chunk in pool.pull_model("mistral")]
+    assert chunks[-1]["status"] == "success"
+    assert servers["c"].installed == ["mistral"]
+
+    pool.backends[0].in_flight = pool.backends[1].in_flight = 0
+    assert await _generate(pool, "mistral") == "c"
+
+    await pool.delete_model("llama2")
+    pool.backends[0].in_flight, pool.backends[1].in_flight = 3, 2
+    assert await _generate(pool, "llama2") == "c"
@@ -1,5 +1,7 @@
 """Tests für MCP Server."""
 
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -49,3 +51,239 @@ def test_tools_have_required_fields(client):
         assert "inputSchema" in tool
         assert tool["name"].startswith("ollama_")
 
+
+
+class _StreamingClient:
+    """Minimaler Ollama-Client-Ersatz, der Generate-Chunks liefert."""
+
+    async def generate(self, model, prompt, system=None, template=None, context=None,
+                       stream=False, options=None):
+        for token in ["Hal", "lo"]:
+            yield {"response": token, "done": False}
+        yield {"response": "", "done": True, "eval_count": 2}
+
+
+def test_call_tool_streams_ndjson(client, monkeypatch):
+    """Test dass Streaming-Tools Chunks als NDJSON weiterreichen."""
+    import json
+
+    from mcp_server import server
+    from mcp_server.handlers import ToolHandler
+
+    monkeypatch.setattr(server, "tool_handler", ToolHandler(_StreamingClient(), None))
+    response = client.post(
+        "/mcp/tools/call",
+        json={
+            "name": "ollama_generate_stream",
+            "arguments": {"model": "llama2", "prompt": "Hi"},
+            "stream": True,
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    chunks = [json.loads(line) for line in response.text.splitlines()]
+    assert [c["result"]["response"] for c in chunks] == ["Hal", "lo", ""]
+    assert chunks[-1]["result"]["done"] is True
+
+
+def test_rate_limit_rejects_with_retry_after(client, monkeypatch):
+    """Test dass überschrittene Limits mit 429 und Retry-After beantwortet werden."""
+    from mcp_server import server
+    from mcp_server.handlers import ToolHandler
+    from mcp_server.utils.rate_limit import TokenBucketLimiter
+
+    monkeypatch.setattr(server, "tool_handler", ToolHandler(_StreamingClient(), None))
+    monkeypatch.setattr(server, "rate_limiter", TokenBucketLimiter(60, burst=1))
+    monkeypatch.setattr(server, "config", server.get_config())
+    payload = {"name": "ollama_generate", "arguments": {"model": "llama2", "prompt": "Hi"}}
+
+    assert client.post("/mcp/tools/call", json=payload).status_code == 200
+    response = client.post("/mcp/tools/call", json=payload)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+
+def test_metrics_endpoint_exports_tool_and_ollama_metrics(client, monkeypatch):
+    """Test dass /metrics Tool-Zähler und Ollama-Zeiten im Textformat liefert."""
+    from mcp_server import server
+    from mcp_server.handlers import ToolHandler
+    from mcp_server.metrics import Metrics
+
+    metrics = Metrics()
+    monkeypatch.setattr("mcp_server.handlers.get_metrics", lambda: metrics)
+    monkeypatch.setattr(server, "get_metrics", lambda: metrics)
+    monkeypatch.setattr(server, "tool_handler", ToolHandler(_StreamingClient(), None))
+    metrics.observe_ollama_timings(
+        "llama2", {"load_duration": 2_000_000_000, "eval_count": 50, "eval_duration": 10**9}
+    )
+
+    client.post("/mcp/tools/call", json={"name": "ollama_unknown", "arguments": {}})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'mcp_tool_requests_total{tool="unknown"} 1' in body
+    assert 'mcp_tool_errors_total{tool="unknown"} 1' in body
+    assert 'mcp_tool_duration_seconds_count{tool="unknown"} 1' in body
+    assert "ollama_unknown" not in body
+    assert 'ollama_model_load_seconds_bucket{model="llama2",le="2.5"} 1' in body
+    assert 'ollama_eval_tokens_per_second_bucket{model="llama2",le="30"} 0' in body
+    assert 'ollama_eval_tokens_per_second_bucket{model="llama2",le="50"} 1' in body
+
+
+def test_rpc_batch_runs_calls_and_skips_notifications(client, monkeypatch):
+    """Test JSON-RPC Batch mit passenden IDs, Fehlern und Notifications."""
+    from mcp_server import server
+    from mcp_server.handlers import ToolHandler
+
+    monkeypatch.setattr(server, "tool_handler", ToolHandler(_StreamingClient(), None))
+    response = client.post(
+        "/rpc",
+        json=[
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+            {
+                "jsonrpc": "2.0",
+                "id": "gen",
+                "method": "tools/call",
+                "params": {"name": "ollama_generate", "arguments": {"model": "m", "prompt": "Hi"}},
+            },
+            {"jsonrpc": "2.0", "method": "tools/list"},
+            {"jsonrpc": "2.0", "id": 3, "method": "unknown"},
+        ],
+    )
+    assert response.status_code == 200
+    responses = {r["id"]: r for r in response.json()}
+    assert set(responses) == {1, "gen", 3}
+    assert "tools" in responses[1]["result"]
+    assert responses["gen"]["result"]["result"]["response"] == "Hal"
+    assert responses[3]["error"]["code"] == -32601
+
+    notifications_only = client.post("/rpc", json=[{"jsonrpc": "2.0", "method": "tools/list"}])
+    assert notifications_only.status_code == 204
+
+
+class _SlowClient(_StreamingClient):
+    """Ollama-Client-Ersatz, dessen Chat nie fertig wird."""
+
+    async def chat(self, model, messages, stream=False, options=None):
+        await asyncio.sleep(30)
+        yield {"done": True}
+
+
+def test_websocket_multiplexes_streams_and_cancels_by_id(client, monkeypatch):
+    """Test gleichzeitige Aufrufe über eine WebSocket-Verbindung inkl. Abbruch."""
+    from mcp_server import server
+    from mcp_server.handlers import ToolHandler
+
+    monkeypatch.setattr(server, "tool_handler", ToolHandler(_SlowClient(), None))
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json(
+            {
+                "jsonrpc": "2.0",
+                "id": "slow",
+                "method": "tools/call",
+                "params": {
+                    "name": "ollama_chat",
+                    "arguments": {"model": "m", "messages": [{"role": "user", "content": "Hi"}]},
+                },
+            }
+        )
+        ws.send_json(
+            {
+                "jsonrpc": "2.0",
+                "id": "fast",
+                "method": "tools/call",
+                "params": {
+                    "name": "ollama_generate_stream",
+                    "arguments": {"model": "m", "prompt": "Hi"},
+                    "stream": True,
+                },
+            }
+        )
+        messages = []
+        while not messages or messages[-1].get("id") != "fast":
+            messages.append(ws.receive_json())
+        chunks = [m["params"]["chunk"]["response"] for m in messages if m.get("method")]
+        assert chunks == ["Hal", "lo", ""]
+        assert messages[-1]["result"]["result"]["done"] is True
+
+        ws.send_json(
+            {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": "slow"}}
+        )
+        cancelled = ws.receive_json()
+        assert cancelled["id"] == "slow"
+        assert cancelled["error"]["code"] == -32800
+
+
+@pytest.mark.asyncio
+async def test_rpc_session_rejects_over_limit_and_still_reads_cancels():
+    """Test dass volle In-Flight-Plätze den Empfang (und damit Abbrüche) nicht blockieren."""
+    import json
+
+    from mcp_server.handlers import ToolHandler
+    from mcp_server.rpc import RPCSession
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    session = RPCSession(ToolHandler(_SlowClient(), None), send, max_in_flight=1)
+    call = {
+        "jsonrpc": "2.0",
+        "method": "tools/call",
+        "params": {
+            "name": "ollama_chat",
+            "arguments": {"model": "m", "messages": [{"role": "user", "content": "Hi"}]},
+        },
+    }
+    await session.handle_text(json.dumps({**call, "id": 1}))
+    await asyncio.sleep(0)
+    await asyncio.wait_for(session.handle_text(json.dumps({**call, "id": 2})), 1)
+    assert sent[0]["id"] == 2 and sent[0]["error"]["code"] == -32001
+
+    cancel = {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}}
+    await asyncio.wait_for(session.handle_text(json.dumps(cancel)), 1)
+    await session.drain()
+    assert sent[1]["id"] == 1 and sent[1]["error"]["code"] == -32800
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_tool_call():
+    """Test dass ein getrennter Client den laufenden Tool-Aufruf abbricht."""
+    from mcp_server.server import ClientDisconnected, _cancel_on_disconnect
+
+    class _DisconnectingRequest:
+        async def receive(self):
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+    cancelled = asyncio.Event()
+
+    async def slow_tool():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnected):
+        await _cancel_on_disconnect(_DisconnectingRequest(), slow_tool())
+    assert cancelled.is_set()
+
+
+def test_rate_limit_key_ignores_unknown_api_keys(monkeypatch):
+    """Test dass nur API-Keys aus der Allow-List einen eigenen Bucket bekommen."""
+    from starlette.requests import Request
+
+    from mcp_server import server
+    from mcp_server.config import Config
+
+    monkeypatch.setattr(server, "config", Config(rate_limit_api_keys="geheim, zweiter"))
+
+    def request(key):
+        headers = [(b"x-api-key", key.encode())] if key else []
+        return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 1234)})
+
+    assert server._client_key(request(None)) == "ip:10.0.0.1"
+    assert server._client_key(request("zufall123")) == "ip:10.0.0.1"
+    assert server._client_key(request("zweiter")).startswith("key:")
@@ -0,0 +1,285 @@
+"""Tests für das Session-Management."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from mcp_server.config import Config
+from mcp_server.exceptions import ConfigError
+from mcp_server.utils.session import SessionManager
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Konfiguration mit Session-Verzeichnis im Temp-Pfad."""
+    return Config(session_storage_path=tmp_path, session_flush_interval=0.01)
+
+
+@pytest.mark.asyncio
+async def test_write_behind_flush_and_reload(config, tmp_path):
+    """Test dass Änderungen gesammelt, atomar geschrieben und neu geladen werden."""
+    manager = SessionManager(config)
+    await manager.save_context("s1", [{"role": "user", "content": "Hallo"}])
+    await manager.update_context("s1", {"role": "assistant", "content": "Hi"})
+    assert manager.stats()["dirty"] == 1
+
+    # Hintergrund-Task schreibt beide Änderungen in einem Durchgang
+    await asyncio.sleep(0.05)
+    assert manager.stats()["dirty"] == 0
+    assert manager.stats()["flushes"] == 1
+    await manager.close()
+    assert not list(tmp_path.glob("*.tmp"))
+    lines = (tmp_path / "s1.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line).get("op") for line in lines] == [None, "reset", "append"]
+
+    reloaded = SessionManager(config)
+    assert len(await reloaded.load_context("s1")) == 2
+    assert await reloaded.clear_context("s1")
+    assert await reloaded.load_context("s1") is None
+    assert not (tmp_path / "s1.jsonl").exists()
+
+
+@pytest.mark.asyncio
+async def test_expired_session_is_removed(config):
+    """Test dass abgelaufene Sessions nicht mehr geladen werden."""
+    config.session_ttl = 0
+    manager = SessionManager(config)
+    await manager.save_context("alt", [{"role": "user", "content": "x"}])
+    await manager.flush()
+    manager._cache["alt"]["updated_at"] -= 10
+    assert await manager.load_context("alt") is None
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_update_appends_without_loading_history(config, tmp_path, monkeypatch):
+    """Test dass update_context bei nicht geladener Session nur eine Zeile anhängt."""
+    manager = SessionManager(config)
+    await manager.save_context("s1", [{"role": "user", "content": str(i)} for i in range(50)])
+    await manager.close()
+    size = (tmp_path / "s1.jsonl").stat().st_size
+
+    manager = SessionManager(config)
+    monkeypatch.setattr(manager.backend, "read", lambda session_id: pytest.fail("Log gelesen"))
+    await manager.update_context("s1", {"role": "assistant", "content": "neu"})
+    await manager.close()
+    assert manager.stats()["cached"] == 0
+    appended = (tmp_path / "s1.jsonl").read_bytes()[size:].decode("utf-8")
+    assert json.loads(appended)["message"]["content"] == "neu"
+
+    messages = await SessionManager(config).load_context("s1")
+    assert len(messages) == 51 and messages[-1]["content"] == "neu"
+
+
+@pytest.mark.asyncio
+async def test_log_is_compacted(config, tmp_path):
+    """Test dass lange Logs zu einem einzelnen reset verdichtet werden."""
+    config.session_compact_records = 5
+    manager = SessionManager(config)
+    await manager.save_context("s1", [])
+    for i in range(8):
+        await manager.update_context("s1", {"role": "user", "content": str(i)})
+        await manager.flush()
+    await manager.close()
+
+    assert manager.stats()["compactions"] >= 1
+    lines = (tmp_path / "s1.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 1 + config.session_compact_records
+    messages = await SessionManager(config).load_context("s1")
+    assert [m["content"] for m in messages] == [str(i) for i in range(8)]
+
+
+@pytest.mark.asyncio
+async def test_legacy_json_is_migrated(config, tmp_path):
+    """Test dass alte JSON-Sessions gelesen und ins Log-Format überführt werden."""
+    now = time.time()
+    (tmp_path / "alt.json").write_text(
+        json.dumps({
+            "session_id": "alt",
+            "messages": [{"role": "user", "content": "a"}],
+            "created_at": now,
+            "updated_at": now,
+        }),
+        encoding="utf-8",
+    )
+    manager = SessionManager(config)
+    await manager.update_context("alt", {"role": "assistant", "content": "b"})
+    await manager.close()
+
+    assert not (tmp_path / "alt.json").exists()
+    messages = await SessionManager(config).load_context("alt")
+    assert [m["content"] for m in messages] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend(config, tmp_path):
+    """Test des SQLite-Backends: reset, Anhängen, Neuladen und Löschen."""
+    config.session_backend = "sqlite"
+    manager = SessionManager(config)
+    await manager.save_context("s1", [{"role": "user", "content": "a"}])
+    await manager.update_context("s1", {"role": "assistant", "content": "b"})
+    await manager.save_context("s2", [])
+    await manager.close()
+    assert (tmp_path / "sessions.db").exists()
+    assert not list(tmp_path.glob("*.jsonl"))
+
+    manager = SessionManager(config)
+    await manager.update_context("s1", {"role": "user", "content": "c"})
+    await manager.flush()
+    assert manager.stats()["cached"] == 0
+    reloaded = SessionManager(config)
+    assert [m["content"] for m in await reloaded.load_context("s1")] == ["a", "b", "c"]
+    assert await reloaded.load_context("s2") == []
+    assert await reloaded.clear_context("s1")
+    assert await reloaded.load_context("s1") is None
+    await reloaded.close()
+    await manager.close()
+
+
+def test_unknown_backend_is_rejected(config):
+    """Test dass ein unbekanntes Backend abgelehnt wird."""
+    config.session_backend = "redis"
+    with pytest.raises(ConfigError):
+        SessionManager(config)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+async def test_sweeper_deletes_expired_sessions_in_batches(config, backend):
+    """Test dass der Sweeper abgelaufene Sessions aus dem beim Start gefüllten Index löscht."""
+    config.session_backend = backend
+    config.session_sweep_batch = 2
+    manager = SessionManager(config)
+    for i in range(5):
+        await manager.save_context(f"s{i}", [{"role": "user", "content": str(i)}])
+    await manager.close()
+
+    config.session_ttl = 3600
+    manager = SessionManager(config)
+    await manager.start()
+    assert manager.stats()["live"] == 5
+    # Drei Sessions künstlich altern lassen
+    for i in range(3):
+        manager._touch(f"s{i}", time.time() - 7200)
+    assert manager.stats()["expired"] == 3
+
+    assert await manager.sweep() == 3
+    stats = manager.stats()
+    assert (stats["live"], stats["expired"], stats["swept"]) == (2, 0, 3)
+    await manager.close()
+
+    reloaded = SessionManager(config)
+    assert await reloaded.load_context("s0") is None
+    assert len(await reloaded.load_context("s4")) == 1
+    await reloaded.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+async def test_compressed_storage_reads_raw_and_compressed(config, tmp_path, backend):
+    """Test dass große Nachrichten komprimiert werden und rohe Daten lesbar bleiben."""
+    config.session_backend = backend
+    manager = SessionManager(config)
+    await manager.save_context("s1", [{"role": "user", "content": "klein"}])
+    await manager.close()
+
+    # Kompression nachträglich einschalten: bestehende Daten bleiben lesbar
+    config.session_compression = "gzip"
+    config.session_compression_threshold = 1024
+    big = {"role": "tool", "content": "Ergebnis " * 2000}
+    manager = SessionManager(config)
+    await manager.update_context("s1", big)
+    await manager.update_context("s1", {"role": "user", "content": "noch klein"})
+    await manager.close()
+
+    stored = b"".join(path.read_bytes() for path in tmp_path.iterdir() if path.is_file())
+    assert b"Ergebnis Ergebnis" not in stored
+    messages = await SessionManager(config).load_context("s1")
+    assert [m["content"] for m in messages] == ["klein", big["content"], "noch klein"]
+
+
+def test_timestamps_read_from_header_with_large_last_record(tmp_path):
+    """Test dass updated_at bei einem mehrere MB großen letzten Eintrag sofort vorliegt."""
+    from mcp_server.utils.session_backends import FileSessionBackend
+
+    backend = FileSessionBackend(tmp_path, compact_records=200)
+    big = [{"role": "tool", "content": "x" * 1024} for _ in range(8 * 1024)]
+    backend.write({"s1": (100.0, [{"t": 150.0, "op": "reset", "messages": big}])})
+    assert (tmp_path / "s1.jsonl").stat().st_size > 8 * 2**20
+
+    started = time.perf_counter()
+    assert backend.read_timestamps("s1") == (100.0, 150.0)
+    assert time.perf_counter() - started < 0.1
+
+    message = {"role": "user", "content": "neu"}
+    backend.write({"s1": (100.0, [{"t": 200.0, "op": "append", "message": message}])})
+    assert backend.read_timestamps("s1") == (100.0, 200.0)
+    session, records = backend.read("s1")
+    assert len(session["messages"]) == len(big) + 1 and records == 2
+
+
+@pytest.mark.asyncio
+async def test_close_during_slow_write_does_not_duplicate_records(config):
+    """Test dass ein Abbruch während des Schreibens Einträge nicht doppelt anhängt."""
+    manager = SessionManager(config)
+    await manager.save_context("s1", [{"role": "user", "content": "a"}])
+    await manager.flush()
+
+    write = manager.backend.write
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_write(batch):
+        loop.call_soon_threadsafe(started.set)
+        time.sleep(0.1)
+        write(batch)
+
+    manager.backend.write = slow_write
+    await manager.update_context("s1", {"role": "assistant", "content": "b"})
+    await started.wait()
+    await manager.close()
+
+    messages = await SessionManager(config).load_context("s1")
+    assert [m["content"] for m in messages] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_session_ids_cannot_escape_storage_path(config, tmp_path):
+    """Test dass Session-IDs mit Pfadanteilen abgelehnt werden."""
+    from mcp_server.exceptions import ValidationError
+    from mcp_server.handlers import ToolHandler
+
+    victim = tmp_path / "jobs" / "x.json"
+    victim.parent.mkdir()
+    victim.write_text("{}", encoding="utf-8")
+    config.session_storage_path = tmp_path / "sessions"
+    manager = SessionManager(config)
+    for session_id in ("../jobs/x", "a.b", "", "x" * 129):
+        with pytest.raises(ValidationError):
+            manager.backend.delete(session_id)
+    assert victim.exists()
+
+    handler = ToolHandler(None, manager, config)
+    result = await handler.handle_tool_call("ollama_clear_context", {"session_id": "../jobs/x"})
+    assert result["error_type"] == "ValidationError"
+    assert victim.exists()
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_save_keeps_created_at_without_loading_history(config, monkeypatch):
+    """Test dass save_context created_at aus den Zeitstempeln statt dem Verlauf liest."""
+    manager = SessionManager(config)
+    await manager.save_context("s1", [{"role": "user", "content": "a"}])
+    await manager.close()
+    created_at = manager.backend.read_timestamps("s1")[0]
+
+    manager = SessionManager(config)
+    monkeypatch.setattr(manager.backend, "read", lambda session_id: pytest.fail("Log gelesen"))
+    await manager.save_context("s1", [{"role": "user", "content": "b"}])
+    await manager.close()
+
+    assert manager.backend.read_timestamps("s1")[0] == created_at
+    assert [m["content"] for m in await SessionManager(config).load_context("s1")] == ["b"]
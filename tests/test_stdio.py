@@ -0,0 +1,82 @@
+"""Tests für den stdio-Transport."""
+
+import asyncio
+import json
+import subprocess
+import sys
+
+from mcp_server.handlers import ToolHandler
+from mcp_server.stdio import run_session
+
+
+class _StreamingClient:
+    """Minimaler Ollama-Client-Ersatz, der Generate-Chunks liefert."""
+
+    async def generate(self, model, prompt, system=None, template=None, context=None,
+                       stream=False, options=None):
+        for token in ["Hal", "lo"]:
+            yield {"response": token, "done": False}
+        yield {"response": "", "done": True, "eval_count": 2}
+
+
+async def _run(messages):
+    """Schickt Nachrichten zeilenweise durch eine stdio-Sitzung."""
+    reader = asyncio.StreamReader()
+    for message in messages:
+        text = message if isinstance(message, str) else json.dumps(message)
+        reader.feed_data(text.encode() + b"\n")
+    reader.feed_eof()
+
+    output = []
+
+    async def write(data: bytes) -> None:
+        output.append(json.loads(data))
+
+    await run_session(ToolHandler(_StreamingClient(), None), reader, write)
+    return output
+
+
+async def test_stdio_initialize_list_and_stream():
+    """Test Handshake, Tool-Liste und Streaming über Progress-Notifications."""
+    output = await _run(
+        [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+            {
+                "jsonrpc": "2.0",
+                "id": 3,
+                "method": "tools/call",
+                "params": {
+                    "name": "ollama_generate_stream",
+                    "arguments": {"model": "llama2", "prompt": "Hi"},
+                    "stream": True,
+                },
+            },
+            "{kein json",
+        ]
+    )
+    responses = {m["id"]: m for m in output if "id" in m and "method" not in m}
+    assert responses[1]["result"]["serverInfo"]["name"] == "Ollama MCP Server"
+    assert len(responses[2]["result"]["tools"]) > 0
+    assert responses[3]["result"]["result"]["done"] is True
+    assert responses[None]["error"]["code"] == -32700
+
+    progress = [m["params"]["chunk"]["response"] for m in output if m.get("method")]
+    assert progress == ["Hal", "lo", ""]
+    # Die Response folgt nach allen Chunks derselben Anfrage
+    assert output.index(responses[3]) > max(
+        i for i, m in enumerate(output) if m.get("method") == "notifications/progress"
+    )
+
+
+def test_stdio_does_not_import_web_stack():
+    """Test dass der stdio-Transport ohne FastAPI/uvicorn und NumPy startet."""
+    code = (
+        "import sys, mcp_server.stdio; "
+        "print(any(m in sys.modules for m in ('fastapi', 'uvicorn', 'numpy')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
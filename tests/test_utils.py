@@ -0,0 +1,160 @@
+"""Tests für Utilities."""
+
+import asyncio
+import math
+import random
+
+import pytest
+
+from mcp_server.exceptions import OverloadedError, RateLimitError
+from mcp_server.utils.context_store import ContextStore
+from mcp_server.utils.embedding_cache import EmbeddingCache
+from mcp_server.utils.rate_limit import TokenBucketLimiter, request_cost
+from mcp_server.utils import vector_codec
+from mcp_server.utils.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, AdmissionScheduler
+
+
+@pytest.mark.asyncio
+async def test_embedding_cache_lru_and_disk_tier(tmp_path):
+    """Test LRU-Verdrängung nach Byte-Budget und Nachladen aus SQLite."""
+    # Budget für genau zwei Vektoren mit je 2 float32-Werten
+    cache = EmbeddingCache(max_bytes=16, path=tmp_path / "emb.sqlite")
+    await cache.put_many({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    await cache.put("c", [5.0, 6.0])
+    assert cache.stats()["memory_entries"] == 2
+
+    assert await cache.get("a") == [1.0, 2.0]
+    assert cache.stats()["disk_hits"] == 1
+    assert await cache.get("missing") is None
+    assert cache.stats()["misses"] == 1
+    cache.close()
+
+    reopened = EmbeddingCache(max_bytes=16, path=tmp_path / "emb.sqlite")
+    assert await reopened.get_many(["b", "c"]) == [[3.0, 4.0], [5.0, 6.0]]
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_priority_and_rejection():
+    """Test Prioritätsreihenfolge und sofortige Ablehnung bei voller Warteschlange."""
+    scheduler = AdmissionScheduler(max_concurrency_per_model=1, max_queue=2)
+    order = []
+    release = asyncio.Event()
+
+    async def job(name, priority):
+        async with scheduler.slot("llama2", priority):
+            order.append(name)
+            await release.wait()
+
+    holder = asyncio.create_task(job("holder", PRIORITY_BATCH))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(job("batch", PRIORITY_BATCH))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(job("interactive", PRIORITY_INTERACTIVE))
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError) as excinfo:
+        async with scheduler.slot("llama2"):
+            pass
+    assert excinfo.value.retry_after >= 1
+    assert scheduler.stats()["models"]["llama2"]["queued"] == 2
+
+    release.set()
+    await asyncio.gather(holder, batch, interactive)
+    assert order == ["holder", "interactive", "batch"]
+    assert scheduler.stats()["models"]["llama2"]["active"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared", [False, True])
+async def test_token_bucket_limits_per_key(tmp_path, shared):
+    """Test Token-Bucket im Speicher und im gemeinsamen SQLite-Store."""
+    store = tmp_path / "limits.sqlite" if shared else None
+    limiter = TokenBucketLimiter(requests_per_minute=60, burst=2, store_path=store)
+    await limiter.acquire("ip:1:ollama_generate")
+    await limiter.acquire("ip:1:ollama_generate")
+    with pytest.raises(RateLimitError) as excinfo:
+        await limiter.acquire("ip:1:ollama_generate")
+    assert excinfo.value.retry_after == 1
+
+    # Anderes Tool und anderer Client haben eigene Buckets
+    await limiter.acquire("ip:1:ollama_list_models")
+    await limiter.acquire("ip:2:ollama_generate")
+    assert limiter.stats()["rejected"] == 1
+    limiter.close()
+
+
+def test_weighted_request_cost():
+    """Test gewichtete Kosten nach num_predict und Prompt-Länge."""
+    assert request_cost("ollama_list_models", {}, 256) == 1
+    assert request_cost("ollama_generate", {"prompt": "x" * 4096}, 256) == 4
+    assert request_cost(
+        "ollama_batch_generate", {"prompts": ["a", "b"], "options": {"num_predict": 512}}, 256
+    ) == 4
+
+
+def test_context_store_dedup_and_lru_budget():
+    """Test Handles, Deduplizierung und Verdrängung nach Byte-Budget."""
+    store = ContextStore(max_bytes=4 * 10)
+    first = store.put(list(range(5)))
+    assert first.startswith("ctx_")
+    assert store.put(list(range(5))) == first
+    assert store.get(first) == list(range(5))
+
+    second = store.put(list(range(100, 105)))
+    store.get(first)  # first zuletzt benutzt
+    store.put(list(range(200, 205)))
+    assert store.get(second) is None
+    assert store.get(first) == list(range(5))
+    assert store.put(list(range(50))) is None  # größer als das Budget
+    assert store.stats()["evictions"] == 1
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize(
+    "encoding,tolerance", [("float32", 1e-6), ("float16", 1e-3), ("int8", 0.01)]
+)
+def test_vector_encodings_round_trip(monkeypatch, use_numpy, encoding, tolerance):
+    """Test dass binäre Encodings kompakt sind und sich zurückwandeln lassen."""
+    vector = [math.sin(i) for i in range(1024)]
+    if not use_numpy:
+        monkeypatch.setattr(vector_codec, "_numpy", lambda: None)
+        if encoding == "int8":
+            with pytest.raises(vector_codec.ValidationError, match="numpy"):
+                vector_codec.encode_vector(vector, encoding)
+            return
+
+    encoded = vector_codec.encode_vector(vector, encoding)
+    assert encoded["dimensions"] == 1024
+    assert len(encoded["embedding"]) < len(str(vector)) / 2
+    decoded = vector_codec.decode_vector(encoded)
+    assert max(abs(a - b) for a, b in zip(vector, decoded)) <= tolerance
+
+    with pytest.raises(vector_codec.ValidationError):
+        vector_codec.encode_vector(vector, "bfloat16")
+
+
+def test_compressor_threshold_and_magic():
+    """Test der Kompression: Schwellwert, Magic-Erkennung und Konfigurationsfehler."""
+    from mcp_server.exceptions import ConfigError
+    from mcp_server.utils.compression import Compressor, decompress, is_compressed
+    from mcp_server.utils.session_backends import _pack_record
+
+    compressor = Compressor("gzip", threshold=100)
+    assert compressor.compress(b"x" * 50) is None
+    packed = compressor.compress(b"x" * 5000)
+    assert is_compressed(packed) and decompress(packed) == b"x" * 5000
+    assert Compressor("none").compress(b"x" * 5000) is None
+
+    # Kaum komprimierbar: als BLOB kleiner, als base64 aber größer als roh
+    rng = random.Random(1)
+    text = bytes(rng.randrange(32, 127) for _ in range(5000))
+    packed = compressor.compress(text)
+    assert packed is not None and len(packed) < len(text) < len(packed) * 4 / 3
+    assert compressor.compress(text, base64_encoded=True) is None
+    record = {"t": 1.0, "op": "append", "message": text.decode("ascii")}
+    assert _pack_record(dict(record), compressor) == record
+    noise = bytes(rng.randrange(256) for _ in range(5000))
+    assert compressor.compress(noise) is None
+    with pytest.raises(ConfigError):
+        Compressor("lz4")